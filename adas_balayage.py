@@ -0,0 +1,278 @@
+"""
+Balayage de paramètres ADAS sur tous les coeurs.
+
+Chaque combinaison des grilles (marge_distance_relative,
+seuil_blocage_lateral, vitesse_laterale, v_ego_base, v_cible) est jouée
+avec chaque chronologie d'entrées scriptée (actions datées en secondes).
+Les scénarios sont regroupés en lots simulés par le moteur vectorisé
+(adas_batch) ; les lots sont répartis sur un pool de processus.
+
+Résultat : une table (tableau structuré NumPy, sauvé en .npy ou .csv)
+avec une ligne par scénario :
+- les paramètres et l'indice de la chronologie ;
+- ecart_min : plus petit écart longitudinal ego -> cible quand l'ego
+  suit la cible dans sa voie (inf si jamais) ;
+- nb_changements_bloques : changements de voie refusés (voie bloquée) ;
+- duree_distance_min : temps passé avec distance_min_atteinte (s) ;
+- ttc_min, temps_inter_min, nb_collisions, nb_changements_demandes :
+  voir adas_metriques.
+
+    python adas_balayage.py --marge 0.05:0.3:10 --seuil 0.1:0.4:10 \\
+        --vitesse-laterale 200:800:10 --v-ego=-0.4:-0.1:10 --duree 30 \\
+        --sortie balayage.csv
+"""
+
+import json
+import multiprocessing
+import os
+
+import numpy as np
+
+from adas_batch import CODES_ACTIONS, creer_etat_batch, step_batch
+from adas_horloge import PAS_TEMPS
+from adas_metriques import MetriquesBatch
+from adas_moteur import ACTION_DROITE, ACTION_GAUCHE
+
+PARAMETRES_BALAYES = (
+    "marge_distance_relative",
+    "seuil_blocage_lateral",
+    "vitesse_laterale",
+    "v_ego_base",
+    "v_cible",
+)
+
+# Chronologies par défaut : [(temps en s, action), ...]
+CHRONOLOGIES = {
+    "acc": [(0.0, "ACC")],
+    "acc_changements_voie": [
+        (0.0, "ACC"),
+        (2.0, ACTION_GAUCHE),
+        (6.0, ACTION_DROITE),
+        (10.0, ACTION_DROITE),
+        (14.0, ACTION_GAUCHE),
+    ],
+    "manuel_changements_voie": [
+        (1.0, ACTION_DROITE),
+        (3.0, ACTION_GAUCHE),
+        (5.0, ACTION_GAUCHE),
+        (7.0, ACTION_DROITE),
+    ],
+    "lka_derive": [(0.0, "LKA"), (1.0, ACTION_GAUCHE), (3.0, ACTION_DROITE)],
+}
+
+DTYPE_RESULTATS = np.dtype(
+    [(nom, np.float64) for nom in PARAMETRES_BALAYES] + [
+        ("chronologie", np.int32),
+        ("ecart_min", np.float64),
+        ("nb_changements_bloques", np.int32),
+        ("duree_distance_min", np.float64),
+        ("ttc_min", np.float64),
+        ("temps_inter_min", np.float64),
+        ("nb_collisions", np.int32),
+        ("nb_changements_demandes", np.int32),
+    ]
+)
+
+# Colonnes calculées (le reste décrit le scénario)
+MESURES = DTYPE_RESULTATS.names[len(PARAMETRES_BALAYES) + 1:]
+
+
+def grille(**valeurs):
+    """
+    Produit cartésien de listes de valeurs.
+    Retourne {nom: tableau aplati} (une entrée par combinaison).
+    """
+    noms = list(valeurs)
+    axes = np.meshgrid(*(np.asarray(valeurs[nom], dtype=np.float64) for nom in noms), indexing="ij")
+    return {nom: axe.ravel() for nom, axe in zip(noms, axes)}
+
+
+def chronologie_en_ticks(chronologie, dt=PAS_TEMPS):
+    """
+    [(temps, action)] -> {tick: code d'action adas_batch}.
+    Deux actions au même tick : la dernière l'emporte.
+    """
+    return {int(round(temps / dt)): CODES_ACTIONS[action] for temps, action in chronologie}
+
+
+# ==============================
+# Simulation d'un lot
+# ==============================
+
+def mesurer_lot(etat, nb_pas, actions=None):
+    """
+    Simule nb_pas pas d'un EtatBatch en relevant les mesures du balayage.
+    actions : {tick: code} appliqué à tous les scénarios du lot.
+    Retourne {mesure: tableau de etat.n valeurs} (colonnes MESURES).
+    """
+    if actions is None:
+        actions = {}
+    metriques = MetriquesBatch(etat.n)
+    codes = {code: np.full(etat.n, code, dtype=np.int8) for code in set(actions.values())}
+
+    debut = etat.tick
+    for i in range(nb_pas):
+        code = actions.get(debut + i)
+        step_batch(etat, codes[code] if code is not None else None)
+        metriques.mettre_a_jour(etat)
+
+    resume = metriques.resume()
+    resume["nb_changements_bloques"] = etat.nb_changements_bloques.copy()
+    return {nom: resume[nom] for nom in MESURES}
+
+
+def _simuler_lot(tache):
+    """
+    Tâche d'un processus du pool : un lot de scénarios, une chronologie.
+    """
+    debut, n, parametres, chronologie, nb_pas, largeur, hauteur, nb_voies = tache
+    etat = creer_etat_batch(
+        n, largeur, hauteur, nb_voies=nb_voies, mode_adas="MANUEL", **parametres
+    )
+    return debut, mesurer_lot(etat, nb_pas, chronologie_en_ticks(chronologie, etat.dt))
+
+
+# ==============================
+# Balayage
+# ==============================
+
+def balayer(valeurs, chronologies=None, duree=30.0, nb_processus=None, taille_lot=2048,
+            largeur=900, hauteur=600, nb_voies=3):
+    """
+    valeurs : {paramètre: liste de valeurs} (paramètres de PARAMETRES_BALAYES ;
+    ceux absents gardent la valeur par défaut du moteur).
+    chronologies : liste de chronologies [(temps, action)] (CHRONOLOGIES
+    par défaut). Chaque combinaison est jouée avec chaque chronologie,
+    sur une route à nb_voies voies.
+    Retourne le tableau DTYPE_RESULTATS (une ligne par scénario).
+    """
+    if chronologies is None:
+        chronologies = list(CHRONOLOGIES.values())
+    inconnus = set(valeurs) - set(PARAMETRES_BALAYES)
+    if inconnus:
+        raise ValueError(f"Paramètres non balayables : {sorted(inconnus)}")
+
+    combinaisons = grille(**valeurs)
+    nb_combinaisons = len(next(iter(combinaisons.values()))) if combinaisons else 1
+    nb_pas = int(round(duree / PAS_TEMPS))
+
+    resultats = np.zeros(nb_combinaisons * len(chronologies), dtype=DTYPE_RESULTATS)
+    # Valeurs par défaut du moteur pour les paramètres non balayés
+    etat_defaut = creer_etat_batch(1)
+    for nom in PARAMETRES_BALAYES:
+        resultats[nom] = getattr(etat_defaut, nom)[0]
+
+    taches = []
+    for i_chrono, chronologie in enumerate(chronologies):
+        for debut in range(0, nb_combinaisons, taille_lot):
+            fin = min(debut + taille_lot, nb_combinaisons)
+            parametres = {nom: axe[debut:fin] for nom, axe in combinaisons.items()}
+            taches.append((
+                i_chrono * nb_combinaisons + debut, fin - debut, parametres, chronologie,
+                nb_pas, largeur, hauteur, nb_voies
+            ))
+        lignes = resultats[i_chrono * nb_combinaisons:(i_chrono + 1) * nb_combinaisons]
+        lignes["chronologie"] = i_chrono
+        for nom, axe in combinaisons.items():
+            lignes[nom] = axe
+
+    if nb_processus is None:
+        nb_processus = os.cpu_count() or 1
+    if nb_processus > 1 and len(taches) > 1:
+        with multiprocessing.Pool(min(nb_processus, len(taches))) as pool:
+            lots = list(pool.imap_unordered(_simuler_lot, taches))
+    else:
+        lots = [_simuler_lot(tache) for tache in taches]
+
+    for debut, mesures in lots:
+        for nom, valeurs in mesures.items():
+            resultats[nom][debut:debut + len(valeurs)] = valeurs
+    return resultats
+
+
+def sauver_resultats(resultats, chemin):
+    """
+    .npy : tableau structuré tel quel ; sinon CSV avec en-tête.
+    """
+    if chemin.endswith(".npy"):
+        np.save(chemin, resultats)
+        return
+    formats = ["%d" if resultats.dtype[nom].kind == "i" else "%.6g" for nom in resultats.dtype.names]
+    np.savetxt(
+        chemin, resultats, delimiter=",", fmt=formats,
+        header=",".join(resultats.dtype.names), comments=""
+    )
+
+
+def lire_valeurs(texte):
+    """
+    "0.1,0.15,0.2" -> liste ; "debut:fin:nb" -> np.linspace(debut, fin, nb).
+    """
+    if ":" in texte:
+        debut, fin, nb = texte.split(":")
+        return np.linspace(float(debut), float(fin), int(nb))
+    return [float(v) for v in texte.split(",")]
+
+
+def charger_chronologies(chemin):
+    """
+    Fichier JSON {nom: [[temps, action], ...]}.
+    Retourne (noms, chronologies).
+    """
+    with open(chemin, encoding="utf-8") as fichier:
+        donnees = json.load(fichier)
+    return list(donnees), [[(float(t), a) for t, a in c] for c in donnees.values()]
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Balayage de paramètres ADAS (multiprocessus)")
+    options = (
+        ("--marge", "marge_distance_relative"),
+        ("--seuil", "seuil_blocage_lateral"),
+        ("--vitesse-laterale", "vitesse_laterale"),
+        ("--v-ego", "v_ego_base"),
+        ("--v-cible", "v_cible"),
+    )
+    for option, nom in options:
+        parser.add_argument(option, dest=nom, metavar="VALEURS", help=f"{nom} : v1,v2,... ou debut:fin:nb")
+    parser.add_argument(
+        "--chronologies", metavar="FICHIER.json",
+        help="chronologies {nom: [[temps_s, action], ...]} (défaut : CHRONOLOGIES)"
+    )
+    parser.add_argument("--duree", type=float, default=30.0, help="durée simulée par scénario (s)")
+    parser.add_argument("--voies", type=int, default=3, help="nombre de voies de la route")
+    parser.add_argument("--processus", type=int, default=None, help="nombre de processus (défaut : tous les coeurs)")
+    parser.add_argument("--taille-lot", type=int, default=2048, help="scénarios par lot vectorisé")
+    parser.add_argument("--sortie", metavar="FICHIER", default="balayage.csv", help=".csv ou .npy")
+    args = parser.parse_args()
+
+    valeurs = {
+        nom: lire_valeurs(getattr(args, nom))
+        for _, nom in options if getattr(args, nom) is not None
+    }
+    if args.chronologies:
+        noms, chronologies = charger_chronologies(args.chronologies)
+    else:
+        noms, chronologies = list(CHRONOLOGIES), list(CHRONOLOGIES.values())
+
+    debut = time.perf_counter()
+    resultats = balayer(
+        valeurs, chronologies, args.duree, args.processus, args.taille_lot, nb_voies=args.voies
+    )
+    duree = time.perf_counter() - debut
+    sauver_resultats(resultats, args.sortie)
+
+    print(
+        f"{len(resultats)} scénarios ({len(chronologies)} chronologies) en {duree:.1f} s "
+        f"-> {args.sortie}"
+    )
+    for i, nom in enumerate(noms):
+        lignes = resultats[resultats["chronologie"] == i]
+        print(
+            f"  {i} {nom:28s} écart min {np.min(lignes['ecart_min']):.3f}  "
+            f"bloqués {lignes['nb_changements_bloques'].mean():.2f}/scénario  "
+            f"distance min {lignes['duree_distance_min'].mean():.2f} s/scénario"
+        )
@@ -0,0 +1,369 @@
+"""
+Simulation ADAS vectorisée : N scénarios ego/cible avancés en même temps.
+
+Même logique que adas_moteur (ACC, blocage latéral, dérive "out"/"back",
+changement de voie) mais en "struct of arrays" NumPy : chaque champ de
+EtatSimulation devient un tableau de N valeurs et les branches Python
+deviennent des masques (np.where).
+
+Sert à balayer marge_distance_relative, seuil_blocage_lateral,
+vitesse_laterale, v_ego_base... sur des milliers de scénarios d'un coup.
+"""
+
+import numpy as np
+
+from adas_moteur import (
+    ACTION_ACCELERER,
+    ACTION_DROITE,
+    ACTION_GAUCHE,
+    ACTION_RALENTIR,
+    MODES_ADAS,
+    PAS_V_EGO,
+    V_EGO_MAX,
+    V_EGO_MIN,
+    ZONE_SIMULATION,
+    calculer_zone_adas,
+)
+from adas_horloge import PAS_TEMPS
+
+# ==============================
+# Codes (entiers) des modes, phases et actions
+# ==============================
+
+MODE_MANUEL = 0
+MODE_ACC = 1
+MODE_LKA = 2
+MODE_EMERGENCY = 3
+
+PHASE_IDLE = 0
+PHASE_OUT = 1
+PHASE_BACK = 2
+
+CODE_AUCUNE = 0
+CODE_MANUEL = 1      # code mode = index dans MODES_ADAS + 1
+CODE_ACC = 2
+CODE_LKA = 3
+CODE_EMERGENCY = 4
+CODE_GAUCHE = 5
+CODE_DROITE = 6
+CODE_ACCELERER = 7
+CODE_RALENTIR = 8
+
+CODES_ACTIONS = {
+    None: CODE_AUCUNE,
+    "MANUEL": CODE_MANUEL,
+    "ACC": CODE_ACC,
+    "LKA": CODE_LKA,
+    "EMERGENCY": CODE_EMERGENCY,
+    ACTION_GAUCHE: CODE_GAUCHE,
+    ACTION_DROITE: CODE_DROITE,
+    ACTION_ACCELERER: CODE_ACCELERER,
+    ACTION_RALENTIR: CODE_RALENTIR,
+}
+
+PHASES = ("idle", "out", "back")
+
+
+def coder_actions(actions):
+    """
+    Convertit une liste d'actions adas_moteur (chaînes ou None)
+    en tableau de codes int8 utilisable par step_batch.
+    """
+    return np.array([CODES_ACTIONS[a] for a in actions], dtype=np.int8)
+
+
+# ==============================
+# Etat vectorisé
+# ==============================
+
+class EtatBatch:
+    """
+    N scénarios en "struct of arrays".
+    Les paramètres (marge, seuil, vitesses...) peuvent être des scalaires
+    ou des tableaux de taille N : c'est ce qui permet de les balayer.
+    """
+
+    def __init__(
+        self,
+        n,
+        zone_params,
+        mode_adas="MANUEL",
+        position_relative_ego=0.8,
+        position_relative_cible=0.3,
+        v_ego_base=-0.2,
+        v_cible=-0.15,
+        marge_distance_relative=0.15,
+        seuil_blocage_lateral=0.20,
+        indice_voie_ego=None,
+        indice_voie_cible=None,
+        vitesse_laterale=500.0,
+        dt=PAS_TEMPS
+    ):
+        def tableau(valeur, dtype):
+            return np.array(np.broadcast_to(valeur, (n,)), dtype=dtype)
+
+        self.n = n
+        self.zone_params = zone_params
+
+        # Géométrie partagée par tous les scénarios (tables de GeometrieRoute) :
+        # bords[(direction + 1) // 2, voie] = ligne visée par une dérive
+        self.centres_voies = np.array(zone_params.centres_voies, dtype=np.float64)
+        self.bords = np.array([zone_params.bords_gauche, zone_params.bords_droite], dtype=np.float64)
+        self.nb_voies = zone_params.nb_voies
+
+        self.mode = tableau(MODES_ADAS.index(mode_adas), np.int8)
+
+        self.position_relative_ego = tableau(position_relative_ego, np.float64)
+        self.position_relative_cible = tableau(position_relative_cible, np.float64)
+
+        self.v_ego_base = tableau(v_ego_base, np.float64)
+        self.v_cible = tableau(v_cible, np.float64)
+        self.v_ego = self.v_ego_base.copy()
+
+        self.marge_distance_relative = tableau(marge_distance_relative, np.float64)
+        self.seuil_blocage_lateral = tableau(seuil_blocage_lateral, np.float64)
+
+        # Voies par défaut : zone_params.voie_defaut
+        if indice_voie_ego is None:
+            indice_voie_ego = zone_params.voie_defaut
+        if indice_voie_cible is None:
+            indice_voie_cible = zone_params.voie_defaut
+        self.indice_voie_cible = tableau(indice_voie_cible, np.int8)
+        self.indice_voie_ego = tableau(indice_voie_ego, np.int8)
+        for nom, voies in (("indice_voie_ego", self.indice_voie_ego), ("indice_voie_cible", self.indice_voie_cible)):
+            if n and not ((voies >= 0) & (voies < self.nb_voies)).all():
+                raise ValueError(f"{nom} hors de la route ({self.nb_voies} voies)")
+        self.indice_voie_ego_cible = self.indice_voie_ego.copy()
+
+        self.x_centre_ego = self.centres_voies[self.indice_voie_ego]
+
+        self.changement_voie_en_cours = np.zeros(n, dtype=bool)
+
+        self.lateral_phase = np.full(n, PHASE_IDLE, dtype=np.int8)
+        self.lateral_direction = np.zeros(n, dtype=np.int8)
+        self.lateral_boundary_x = np.zeros(n, dtype=np.float64)
+
+        self.vitesse_laterale = tableau(vitesse_laterale, np.float64)
+
+        self.distance_min_atteinte = np.zeros(n, dtype=bool)
+        self.dt = dt     # durée d'un pas (s), commune à tous les scénarios
+        self.tick = 0
+
+        self.nb_changements_demandes = np.zeros(n, dtype=np.int32)
+        self.nb_changements_bloques = np.zeros(n, dtype=np.int32)
+        self.nb_changements_annules = np.zeros(n, dtype=np.int32)
+
+        # Tampons de travail réutilisés à chaque pas
+        self._tampon_distance = np.empty(n, dtype=np.float64)
+        self._tampon_deplacement = np.empty(n, dtype=np.float64)
+        self._tampon_masque = np.empty(n, dtype=bool)
+
+        _maj_masques(self)
+
+
+def _maj_masques(etat):
+    """
+    Recalcule les masques qui ne changent qu'avec le mode ou la voie ego
+    (évite de les reconstruire à chaque pas).
+    """
+    etat.suivi_acc = (etat.mode == MODE_ACC) & (etat.indice_voie_ego == etat.indice_voie_cible)
+    etat.urgence = etat.mode == MODE_EMERGENCY
+    etat.nb_suivi_acc = np.count_nonzero(etat.suivi_acc)
+    etat.nb_urgence = np.count_nonzero(etat.urgence)
+
+
+def creer_etat_batch(n, largeur=900, hauteur=600, zone=ZONE_SIMULATION, nb_voies=3, **parametres):
+    """
+    Crée un EtatBatch de n scénarios pour une fenêtre largeur x hauteur.
+    """
+    return EtatBatch(n, calculer_zone_adas(largeur, hauteur, zone, nb_voies), **parametres)
+
+
+# ==============================
+# Pas de simulation vectorisé
+# ==============================
+
+def appliquer_actions_batch(etat, actions):
+    """
+    Applique un tableau de codes d'action (un par scénario).
+    Même logique que adas_moteur.appliquer_action, par masques.
+    """
+    # Changement de mode
+    est_mode = (actions >= CODE_MANUEL) & (actions <= CODE_EMERGENCY)
+    if est_mode.any():
+        nouveau = actions.astype(np.int8) - CODE_MANUEL
+        change = est_mode & (nouveau != etat.mode)
+        etat.mode[change] = nouveau[change]
+
+        # Entrée en LKA : on annule un éventuel changement de voie
+        lka = change & (nouveau == MODE_LKA)
+        if lka.any():
+            etat.nb_changements_annules += lka & etat.changement_voie_en_cours
+            etat.changement_voie_en_cours[lka] = False
+            etat.indice_voie_ego_cible[lka] = etat.indice_voie_ego[lka]
+            etat.x_centre_ego[lka] = etat.centres_voies[etat.indice_voie_ego[lka]]
+            etat.lateral_phase[lka] = PHASE_IDLE
+        _maj_masques(etat)
+
+    # Vitesse demandée par le conducteur (z/s)
+    accel = actions == CODE_ACCELERER
+    ralenti = actions == CODE_RALENTIR
+    if accel.any() or ralenti.any():
+        etat.v_ego_base = np.where(
+            accel, np.maximum(etat.v_ego_base - PAS_V_EGO, V_EGO_MAX), etat.v_ego_base
+        )
+        etat.v_ego_base = np.where(
+            ralenti, np.minimum(etat.v_ego_base + PAS_V_EGO, V_EGO_MIN), etat.v_ego_base
+        )
+
+    # Gauche / droite
+    direction = np.where(
+        actions == CODE_GAUCHE, -1, np.where(actions == CODE_DROITE, 1, 0)
+    ).astype(np.int8)
+    lateral = direction != 0
+    if not lateral.any():
+        return
+
+    idle = etat.lateral_phase == PHASE_IDLE
+    lka = etat.mode == MODE_LKA
+
+    # Hors LKA : tentative de changement de voie
+    tentative = lateral & ~lka & idle & ~etat.changement_voie_en_cours
+    target_lane = etat.indice_voie_ego + direction
+    valide = tentative & (target_lane >= 0) & (target_lane < etat.nb_voies)
+    bloquee = (
+        (target_lane == etat.indice_voie_cible) &
+        (np.abs(etat.position_relative_ego - etat.position_relative_cible)
+         <= etat.seuil_blocage_lateral)
+    )
+
+    # LKA, ou voie bloquée : dérive vers la ligne puis retour
+    etat.nb_changements_demandes += valide
+    etat.nb_changements_bloques += valide & bloquee
+    derive = (lateral & lka & idle) | (valide & bloquee)
+    bord = etat.bords[(direction + 1) >> 1, etat.indice_voie_ego]
+    derive &= np.where(direction == -1, etat.x_centre_ego > bord, etat.x_centre_ego < bord)
+    etat.lateral_direction[derive] = direction[derive]
+    etat.lateral_boundary_x[derive] = bord[derive]
+    etat.lateral_phase[derive] = PHASE_OUT
+
+    # Voie libre : changement de voie normal
+    change = valide & ~bloquee
+    etat.indice_voie_ego_cible[change] = target_lane[change]
+    etat.changement_voie_en_cours[change] = True
+
+
+def avancer_batch(etat):
+    """
+    Avance tous les scénarios d'un pas (longitudinal puis latéral).
+    """
+    # ------------------------------
+    # Longitudinal (en place, dans des tampons préalloués)
+    # ------------------------------
+    dt = etat.dt
+    masque = etat._tampon_masque
+    deplacement = etat._tampon_deplacement
+    pc = etat.position_relative_cible
+    pc += np.multiply(etat.v_cible, dt, out=deplacement)
+    np.less(pc, 0.0, out=masque)
+    np.copyto(pc, 1.0, where=masque)
+
+    pe = etat.position_relative_ego
+    v_ego = etat.v_ego
+    distance_min_atteinte = etat.distance_min_atteinte
+    np.copyto(v_ego, etat.v_ego_base)
+    if etat.nb_suivi_acc:
+        # ACC : ego derrière la cible, dans la même voie, trop proche
+        distance = np.subtract(pe, pc, out=etat._tampon_distance)
+        np.greater(distance, 0.0, out=distance_min_atteinte)
+        distance_min_atteinte &= etat.suivi_acc
+        np.less_equal(distance, etat.marge_distance_relative, out=masque)
+        distance_min_atteinte &= masque
+        np.copyto(v_ego, etat.v_cible, where=distance_min_atteinte)
+    else:
+        distance_min_atteinte.fill(False)
+    if etat.nb_urgence:
+        np.copyto(v_ego, 0.0, where=etat.urgence)
+
+    pe += np.multiply(v_ego, dt, out=deplacement)
+    np.less(pe, 0.0, out=masque)
+    np.copyto(pe, 1.0, where=masque)
+
+    # ------------------------------
+    # Latéral : uniquement sur les scénarios concernés
+    # ------------------------------
+    phase = etat.lateral_phase
+    x = etat.x_centre_ego
+    vl = etat.vitesse_laterale
+
+    # 1) Phase "out": dérive vers la ligne
+    if np.count_nonzero(phase):
+        i_out = np.flatnonzero(phase == PHASE_OUT)
+        i_back = np.flatnonzero(phase == PHASE_BACK)
+    else:
+        i_out = i_back = np.empty(0, dtype=np.intp)
+    if i_out.size:
+        d = etat.lateral_direction[i_out]
+        b = etat.lateral_boundary_x[i_out]
+        xo = x[i_out] + d * (vl[i_out] * dt)
+        atteint = np.where(d == -1, xo <= b, xo >= b)
+        x[i_out] = np.where(atteint, b, xo)
+        phase[i_out[atteint]] = PHASE_BACK
+
+    # 2) Phase "back": retour au centre de la même voie
+    if i_back.size:
+        xb = x[i_back]
+        vb = vl[i_back] * dt
+        centre = etat.centres_voies[etat.indice_voie_ego[i_back]]
+        diff = centre - xb
+        arrive = np.abs(diff) <= vb
+        x[i_back] = np.where(arrive, centre, xb + vb * np.where(diff > 0, 1.0, -1.0))
+        phase[i_back[arrive]] = PHASE_IDLE
+
+    # 3) Changement de voie "classique"
+    if np.count_nonzero(etat.changement_voie_en_cours):
+        i_chg = np.flatnonzero(
+            etat.changement_voie_en_cours & (phase == PHASE_IDLE) & (etat.mode != MODE_LKA)
+        )
+    else:
+        i_chg = np.empty(0, dtype=np.intp)
+    if i_chg.size:
+        xc = x[i_chg]
+        vc = vl[i_chg] * dt
+        voie_cible = etat.indice_voie_ego_cible[i_chg]
+        cible_x = etat.centres_voies[voie_cible]
+        diff = cible_x - xc
+        arrive = np.abs(diff) <= vc
+        x[i_chg] = np.where(arrive, cible_x, xc + vc * np.where(diff > 0, 1.0, -1.0))
+        fini = i_chg[arrive]
+        etat.indice_voie_ego[fini] = voie_cible[arrive]
+        etat.changement_voie_en_cours[fini] = False
+        if fini.size:
+            _maj_masques(etat)
+
+    etat.tick += 1
+
+
+def step_batch(etat, actions=None):
+    """
+    Un pas pour les N scénarios.
+    actions : None ou tableau de N codes (CODE_AUCUNE = pas d'action).
+    """
+    if actions is not None:
+        appliquer_actions_batch(etat, actions)
+    avancer_batch(etat)
+
+
+def simuler_batch(etat, nb_pas, actions=None):
+    """
+    Enchaîne nb_pas pas vectorisés.
+    actions : dict {tick: tableau de codes} (optionnel), tick absolu comme
+    pour adas_moteur.simuler.
+    Retourne l'état final.
+    """
+    if actions is None:
+        actions = {}
+    debut = etat.tick
+    for i in range(nb_pas):
+        step_batch(etat, actions.get(debut + i))
+    return etat
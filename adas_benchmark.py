@@ -0,0 +1,250 @@
+"""
+Banc de mesures de performance (hors ligne, sans écran).
+
+Mesure :
+- pas de simulation par seconde (moteur scalaire, moteur vectorisé) ;
+- coût de dessiner_scene, dessiner_tableau_adas et dessiner_legende
+  à plusieurs résolutions ;
+- débit du comptage des doigts (vectorisé) ;
+- FPS de bout en bout de la chaîne gestes (source -> miroir -> MediaPipe
+  -> comptage) sur des images synthétiques ou enregistrées.
+
+Les résultats sont écrits en JSON ; avec --reference, ils sont comparés à
+un fichier de référence et le script sort en erreur si une mesure se
+dégrade de plus de --seuil (15 % par défaut).
+
+    python adas_benchmark.py --sortie mesures.json
+    python adas_benchmark.py --reference mesures.json
+"""
+
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+RESOLUTIONS = ((640, 480), (1280, 720), (1920, 1080))
+
+# Sens d'une mesure : plus grand = mieux ("debit") ou plus petit = mieux ("duree")
+DEBIT = "debit"
+DUREE = "duree"
+
+
+def chronometrer(fonction, duree_min=0.2, repetitions=5):
+    """
+    Appelle fonction() en boucle pendant au moins duree_min secondes,
+    repetitions fois ; retourne le meilleur temps par appel (s).
+    """
+    meilleur = float("inf")
+    for _ in range(repetitions):
+        nb = 0
+        debut = time.perf_counter()
+        while True:
+            fonction()
+            nb += 1
+            ecoule = time.perf_counter() - debut
+            if ecoule >= duree_min:
+                break
+        meilleur = min(meilleur, ecoule / nb)
+    return meilleur
+
+
+# ==============================
+# Mesures
+# ==============================
+
+def mesurer_simulation(resultats):
+    from adas_batch import creer_etat_batch, simuler_batch
+    from adas_moteur import creer_etat, simuler
+
+    nb_pas = 2000
+    etat = creer_etat(mode_adas="ACC")
+    duree = chronometrer(lambda: simuler(etat, nb_pas))
+    resultats["simulation_scalaire"] = (nb_pas / duree, "pas/s", DEBIT)
+
+    n = 10000
+    etat_batch = creer_etat_batch(n, mode_adas="ACC")
+    duree = chronometrer(lambda: simuler_batch(etat_batch, 100))
+    resultats["simulation_batch_10000"] = (n * 100 / duree, "pas/s", DEBIT)
+
+
+def mesurer_dessin_scene(resultats):
+    from adas_moteur import creer_etat
+    from adas_simulation_2cars import CacheScene, dessiner_scene
+
+    for largeur, hauteur in RESOLUTIONS:
+        image = np.zeros((hauteur, largeur, 3), dtype=np.uint8)
+        etat = creer_etat(largeur, hauteur)
+        cache = CacheScene()
+
+        def dessiner(cache):
+            dessiner_scene(
+                image, etat.mode_adas, etat.position_relative_ego, etat.position_relative_cible,
+                etat.distance_min_atteinte, etat.x_centre_ego, etat.indice_voie_ego,
+                etat.indice_voie_cible, etat.v_ego_base, etat.v_cible, etat.zone_params,
+                None, cache
+            )
+
+        resultats[f"dessiner_scene_{hauteur}p"] = (
+            chronometrer(lambda: dessiner(None)) * 1000, "ms", DUREE
+        )
+        resultats[f"dessiner_scene_cache_{hauteur}p"] = (
+            chronometrer(lambda: dessiner(cache)) * 1000, "ms", DUREE
+        )
+
+
+def mesurer_dessin_webcam(resultats):
+    from adas_moteur import ZONE_WEBCAM, calculer_zone_adas
+    from adas_webcam_demo import dessiner_legende, dessiner_tableau_adas
+
+    for largeur, hauteur in RESOLUTIONS:
+        image = np.zeros((hauteur, largeur, 3), dtype=np.uint8)
+        zone_params = calculer_zone_adas(largeur, hauteur, ZONE_WEBCAM)
+        x_centre_ego = float(zone_params.centres_voies[zone_params.voie_defaut])
+
+        resultats[f"dessiner_tableau_adas_{hauteur}p"] = (
+            chronometrer(lambda: dessiner_tableau_adas(
+                image, "ACC", 0.5, 0.4, True, x_centre_ego, 1, zone_params
+            )) * 1000, "ms", DUREE
+        )
+        resultats[f"dessiner_legende_{hauteur}p"] = (
+            chronometrer(lambda: dessiner_legende(image)) * 1000, "ms", DUREE
+        )
+
+
+def mesurer_comptage_doigts(resultats):
+    from adas_doigts import compter_doigts_batch
+
+    rng = np.random.default_rng(0)
+    nb = 100000
+    points = rng.uniform(0.0, 1.0, (nb, 21, 3)).astype(np.float32)
+    mains = rng.integers(-1, 2, nb).astype(np.int8)
+    duree = chronometrer(lambda: compter_doigts_batch(points, mains, 1280, 720))
+    resultats["comptage_doigts"] = (nb / duree, "mains/s", DEBIT)
+
+
+def mesurer_pipeline_gestes(resultats, description_source="synthetique:1280x720", nb_frames=300):
+    import cv2
+    import mediapipe as mp
+
+    from adas_doigts import compter_doigts
+    from adas_inference import DetecteurMainsROI
+    from adas_landmarks import extraire_main
+    from adas_sources import ouvrir_source
+
+    source = ouvrir_source(description_source, rapide=True)
+    # Suivi par ROI : MediaPipe en mode image (voir DetecteurMainsROI)
+    detecteur = DetecteurMainsROI(mp.solutions.hands.Hands(static_image_mode=True, max_num_hands=1))
+
+    nb = 0
+    debut = time.perf_counter()
+    while nb < nb_frames:
+        ret, frame = source.read()
+        if not ret:
+            break
+        frame = cv2.flip(frame, 1)
+        presente, lateralite, points = extraire_main(detecteur.process(frame))
+        if presente:
+            compter_doigts(points, lateralite, frame.shape[1], frame.shape[0])
+        nb += 1
+    duree = time.perf_counter() - debut
+    source.release()
+
+    if nb:
+        resultats["pipeline_gestes"] = (nb / duree, "FPS", DEBIT)
+
+
+MESURES = (
+    mesurer_simulation,
+    mesurer_dessin_scene,
+    mesurer_dessin_webcam,
+    mesurer_comptage_doigts,
+    mesurer_pipeline_gestes,
+)
+
+
+def lancer(mesures=MESURES, description_source=None):
+    """
+    Lance les mesures ; celles dont une dépendance manque (MediaPipe...)
+    sont ignorées et signalées. description_source : images de la chaîne
+    gestes (voir adas_sources.ouvrir_source), synthétiques par défaut.
+    Retourne le dictionnaire JSON des résultats.
+    """
+    resultats = {}
+    ignorees = {}
+    for mesure in mesures:
+        try:
+            if mesure is mesurer_pipeline_gestes and description_source is not None:
+                mesure(resultats, description_source)
+            else:
+                mesure(resultats)
+        except ImportError as erreur:
+            ignorees[mesure.__name__] = str(erreur)
+
+    return {
+        "machine": {
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "plateforme": platform.platform(),
+            "processeur": platform.processor() or platform.machine(),
+        },
+        "mesures": {
+            nom: {"valeur": valeur, "unite": unite, "sens": sens}
+            for nom, (valeur, unite, sens) in resultats.items()
+        },
+        "ignorees": ignorees,
+    }
+
+
+def comparer(mesures, reference, seuil=0.15):
+    """
+    Compare deux jeux de mesures.
+    Retourne la liste des régressions (nom, valeur de référence, valeur, écart).
+    """
+    regressions = []
+    for nom, ref in reference["mesures"].items():
+        if nom not in mesures["mesures"]:
+            continue
+        valeur = mesures["mesures"][nom]["valeur"]
+        if ref["sens"] == DEBIT:
+            ecart = (ref["valeur"] - valeur) / ref["valeur"]
+        else:
+            ecart = (valeur - ref["valeur"]) / ref["valeur"]
+        if ecart > seuil:
+            regressions.append((nom, ref["valeur"], valeur, ecart))
+    return regressions
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mesures de performance ADAS")
+    parser.add_argument("--sortie", metavar="FICHIER.json", help="écrit les mesures en JSON")
+    parser.add_argument("--reference", metavar="FICHIER.json", help="mesures de référence à comparer")
+    parser.add_argument("--seuil", type=float, default=0.15, help="dégradation tolérée (0.15 = 15 %%)")
+    parser.add_argument(
+        "--source", default=None,
+        help="images de la chaîne gestes : fichier vidéo, dossier, synthetique[:LxH]"
+    )
+    args = parser.parse_args()
+
+    mesures = lancer(description_source=args.source)
+    for nom, mesure in mesures["mesures"].items():
+        print(f"{nom:32s} {mesure['valeur']:14.3f} {mesure['unite']}")
+    for nom, raison in mesures["ignorees"].items():
+        print(f"{nom:32s} ignorée ({raison})")
+
+    if args.sortie:
+        with open(args.sortie, "w", encoding="utf-8") as fichier:
+            json.dump(mesures, fichier, indent=2)
+
+    if args.reference:
+        with open(args.reference, encoding="utf-8") as fichier:
+            reference = json.load(fichier)
+        regressions = comparer(mesures, reference, args.seuil)
+        for nom, valeur_ref, valeur, ecart in regressions:
+            print(f"❌ Régression {nom} : {valeur_ref:.3f} -> {valeur:.3f} ({ecart:+.0%})")
+        if regressions:
+            raise SystemExit(1)
+        print("✅ Aucune régression au-delà du seuil")
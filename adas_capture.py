@@ -0,0 +1,145 @@
+"""
+Capture caméra dans un thread dédié.
+
+La boucle principale (MediaPipe, dessin, imshow) ne lit plus la caméra
+elle-même : un thread lit en continu et ne garde que les dernières frames
+dans un petit tampon borné. Quand l'inférence est lente, les frames
+périmées sont jetées au lieu de s'accumuler dans le tampon du pilote,
+et la boucle traite toujours la plus récente.
+
+Chaque frame est accompagnée de son horodatage de capture
+(time.perf_counter()) pour que les étapes suivantes puissent mesurer
+son âge.
+
+Avec un pool (adas_tampons.PoolTampons), les frames sont lues dans des
+tampons réutilisés (source.read(tampon)) : les frames jetées retournent
+au pool, et celle rendue par lire() y retourne à l'appel suivant.
+
+Les sources enregistrées (fichier vidéo, dossier, images synthétiques)
+ne doivent rien perdre : avec sans_perte=True, le thread attend qu'il y
+ait de la place dans le tampon au lieu de jeter une frame, et lire()
+rend les frames dans l'ordre, une à une.
+"""
+
+import collections
+import threading
+import time
+
+
+class CaptureThread:
+    """
+    Lit `source` (cv2.VideoCapture ou objet avec read()) en continu.
+    lire() rend toujours la frame la plus récente ("la dernière gagne").
+    pool : la source doit accepter read(tampon) ; la frame rendue par
+    lire() n'est alors valable que jusqu'à l'appel suivant.
+    sans_perte : aucune frame jetée (sources hors caméra), lire() rend
+    la plus ancienne.
+    """
+
+    def __init__(self, source, taille_tampon=2, pool=None, sans_perte=False):
+        self.source = source
+        self.pool = pool
+        self.sans_perte = sans_perte
+        self.forme = None            # forme des dernières frames lues
+        self.frame_rendue = None     # frame prêtée à l'appelant de lire()
+        self.tampon = collections.deque(maxlen=taille_tampon)
+        self.condition = threading.Condition()
+        self.thread = None
+        self.actif = False
+        self.termine = False
+
+        self.nb_capturees = 0
+        self.nb_rendues = 0
+        self.nb_jetees = 0           # écrasées dans le tampon ou sautées par lire()
+        self.dernier_numero_lu = -1
+
+    def demarrer(self):
+        self.actif = True
+        self.thread = threading.Thread(target=self._boucle, name="capture", daemon=True)
+        self.thread.start()
+        return self
+
+    def _boucle(self):
+        while self.actif:
+            if self.pool is not None and self.forme is not None:
+                tampon = self.pool.prendre(self.forme)
+                ret, frame = self.source.read(tampon)
+                if frame is not tampon:
+                    # Echec de lecture ou nouvelle résolution
+                    self.pool.rendre(tampon)
+            else:
+                ret, frame = self.source.read()
+            horodatage = time.perf_counter()
+            with self.condition:
+                if not ret:
+                    self.termine = True
+                    self.condition.notify_all()
+                    break
+                self.forme = frame.shape
+                if self.sans_perte:
+                    # Attente d'une place libre plutôt que de jeter une frame
+                    self.condition.wait_for(lambda: len(self.tampon) < self.tampon.maxlen or not self.actif)
+                    if not self.actif:
+                        break
+                elif len(self.tampon) == self.tampon.maxlen:
+                    # La plus ancienne frame va être jetée
+                    self.nb_jetees += 1
+                    if self.pool is not None:
+                        self.pool.rendre(self.tampon[0][1])
+                self.tampon.append((self.nb_capturees, frame, horodatage))
+                self.nb_capturees += 1
+                self.condition.notify_all()
+
+    def lire(self, timeout=None):
+        """
+        Attend une frame plus récente que la précédente et la rend.
+        Retourne (ok, frame, horodatage) ; ok=False si la source est
+        épuisée (ou timeout écoulé) et qu'il n'y a plus rien de neuf.
+        """
+        if self.sans_perte:
+            return self._lire_suivante(timeout)
+        with self.condition:
+            nouvelle = self.condition.wait_for(
+                lambda: (self.tampon and self.tampon[-1][0] > self.dernier_numero_lu)
+                or self.termine or not self.actif,
+                timeout
+            )
+            if not nouvelle or not self.tampon or self.tampon[-1][0] <= self.dernier_numero_lu:
+                return False, None, None
+
+            numero, frame, horodatage = self.tampon[-1]
+            self.nb_jetees += len(self.tampon) - 1
+            if self.pool is not None:
+                for _, jetee, _ in list(self.tampon)[:-1]:
+                    self.pool.rendre(jetee)
+                self.pool.rendre(self.frame_rendue)
+                self.frame_rendue = frame
+            self.tampon.clear()
+            self.dernier_numero_lu = numero
+            self.nb_rendues += 1
+            return True, frame, horodatage
+
+    def _lire_suivante(self, timeout):
+        """
+        lire() sans perte : la plus ancienne frame du tampon.
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.tampon or self.termine or not self.actif, timeout)
+            if not self.tampon:
+                return False, None, None
+
+            numero, frame, horodatage = self.tampon.popleft()
+            if self.pool is not None:
+                self.pool.rendre(self.frame_rendue)
+                self.frame_rendue = frame
+            self.dernier_numero_lu = numero
+            self.nb_rendues += 1
+            self.condition.notify_all()
+            return True, frame, horodatage
+
+    def arreter(self):
+        self.actif = False
+        with self.condition:
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
@@ -0,0 +1,71 @@
+"""
+Comptage des doigts levés à partir des 21 landmarks d'une main.
+
+Reprend la règle de la démo webcam, sans dépendre de MediaPipe :
+- pouce levé si la pointe (4) dépasse l'articulation (3) horizontalement,
+  du côté qui dépend de la main (droite / gauche) ;
+- autres doigts levés si la pointe est au-dessus de l'articulation PIP.
+
+Les comparaisons se font, comme dans la démo, sur les coordonnées
+converties en pixels entiers (int(lm.x * largeur), int(lm.y * hauteur)).
+Les produits sont faits en double précision, comme avec les floats
+Python de MediaPipe, même si les points arrivent en float32.
+
+La règle n'est écrite qu'une fois, dans compter_doigts_batch, qui traite
+un tableau (F, 21, 3) en quelques opérations NumPy (relecture de millions
+de frames enregistrées) ; compter_doigts en est le cas F = 1.
+"""
+
+import numpy as np
+
+# Codes de latéralité (champ "main" des enregistrements)
+MAIN_INCONNUE = -1
+MAIN_GAUCHE = 0
+MAIN_DROITE = 1
+
+POINTES_DOIGTS = (8, 12, 16, 20)
+ARTICULATIONS_PIP = (6, 10, 14, 18)
+
+
+def code_main(main_label):
+    """
+    'Right' / 'Left' / None (label MediaPipe) -> code de latéralité.
+    """
+    if main_label is None:
+        return MAIN_INCONNUE
+    return MAIN_DROITE if main_label == "Right" else MAIN_GAUCHE
+
+
+def compter_doigts(points, main, largeur, hauteur):
+    """
+    Nombre de doigts levés pour une main.
+    points : 21 landmarks (x, y[, z]) en coordonnées normalisées
+    main   : MAIN_DROITE / MAIN_GAUCHE / MAIN_INCONNUE (pouce ignoré)
+    """
+    return int(compter_doigts_batch(np.asarray(points)[None], [main], largeur, hauteur)[0])
+
+
+def compter_doigts_batch(points, mains, largeur, hauteur):
+    """
+    Version vectorisée de compter_doigts pour F mains d'un coup.
+    points  : tableau (F, 21, 2+) de coordonnées normalisées
+    mains   : codes de latéralité (F,)
+    largeur, hauteur : scalaires ou tableaux (F,)
+    Retourne un tableau (F,) d'entiers.
+    """
+    points = np.asarray(points)
+    mains = np.asarray(mains)
+    largeur = np.asarray(largeur, dtype=np.float64)
+    hauteur = np.asarray(hauteur, dtype=np.float64)
+
+    # Pixels entiers (troncature vers 0, comme int()), en double précision
+    x_pouce = (points[:, [4, 3], 0].astype(np.float64) * largeur[..., None]).astype(np.int64)
+    y_doigts = (points[:, POINTES_DOIGTS + ARTICULATIONS_PIP, 1].astype(np.float64)
+                * hauteur[..., None]).astype(np.int64)
+
+    pouce = np.where(
+        mains == MAIN_DROITE, x_pouce[:, 0] < x_pouce[:, 1], x_pouce[:, 0] > x_pouce[:, 1]
+    ) & (mains != MAIN_INCONNUE)
+    autres = (y_doigts[:, :4] < y_doigts[:, 4:]).sum(axis=1)
+
+    return autres + pouce
@@ -0,0 +1,217 @@
+"""
+Export vidéo sans fenêtre d'une simulation 2 voitures.
+
+La simulation avance au plus vite (pas de HorlogeSimulation ni de
+waitKey) ; chaque image dessinée par dessiner_scene est recopiée dans un
+tampon libre puis confiée à un thread d'encodage par une file bornée.
+Simulation + dessin d'un côté et codec de l'autre travaillent en
+parallèle (cv2.VideoWriter.write relâche le GIL) ; si le codec est plus
+lent, la file pleine fait attendre la simulation au lieu de faire
+grossir la mémoire.
+
+Les tampons circulent entre deux files : libres -> remplis par ecrire()
+-> encodés -> rendus libres. Aucune allocation par image.
+
+    python adas_export_video.py simulation.mp4 --duree 60 --trafic 40
+    python adas_export_video.py session.mp4 --journal session.npz
+"""
+
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from adas_moteur import appliquer_action, avancer
+from adas_replay import JournalEntrees, charger_journal
+from adas_simulation_2cars import CacheScene, dessiner_scene
+
+
+class EncodeurVideo:
+    """
+    cv2.VideoWriter alimenté par un thread dédié.
+
+        encodeur = EncodeurVideo("sortie.mp4", 900, 600, fps=50).demarrer()
+        encodeur.ecrire(image)     # copie : image peut être redessinée aussitôt
+        encodeur.fermer()
+    """
+
+    def __init__(self, chemin, largeur, hauteur, fps=50.0, codec="mp4v", taille_file=8):
+        self.chemin = chemin
+        self.writer = cv2.VideoWriter(
+            chemin, cv2.VideoWriter_fourcc(*codec), fps, (largeur, hauteur)
+        )
+        if not self.writer.isOpened():
+            raise IOError(f"Impossible d'ouvrir {chemin} en écriture (codec {codec})")
+
+        # taille_file images en attente + une en cours d'encodage
+        self.a_encoder = queue.Queue(maxsize=taille_file)
+        self.libres = queue.Queue()
+        for _ in range(taille_file + 1):
+            self.libres.put(np.empty((hauteur, largeur, 3), dtype=np.uint8))
+
+        self.thread = None
+        self.erreur = None
+
+        self.nb_images = 0
+        self.nb_attentes = 0      # ecrire() bloqué faute de tampon libre
+
+    def demarrer(self):
+        self.thread = threading.Thread(target=self._boucle, name="encodage", daemon=True)
+        self.thread.start()
+        return self
+
+    def _boucle(self):
+        try:
+            while True:
+                tampon = self.a_encoder.get()
+                if tampon is None:
+                    break
+                self.writer.write(tampon)
+                self.libres.put(tampon)
+        except Exception as erreur:
+            self.erreur = erreur
+            # Débloque un ecrire() en attente d'un tampon libre
+            self.libres.put(None)
+
+    def ecrire(self, image):
+        """
+        Met une copie de l'image dans la file d'encodage (attend si elle est pleine).
+        """
+        if self.erreur is not None:
+            raise self.erreur
+        try:
+            tampon = self.libres.get_nowait()
+        except queue.Empty:
+            self.nb_attentes += 1
+            tampon = self.libres.get()
+        if tampon is None:
+            raise self.erreur
+        np.copyto(tampon, image)
+        self.a_encoder.put(tampon)
+        self.nb_images += 1
+
+    def fermer(self):
+        """
+        Encode les images restantes puis ferme le fichier.
+        """
+        if self.thread is not None:
+            if self.erreur is None:
+                self.a_encoder.put(None)
+            self.thread.join()
+            self.thread = None
+        self.writer.release()
+        if self.erreur is not None:
+            raise self.erreur
+        return self.nb_images
+
+
+def exporter(chemin, journal=None, nb_pas=None, pas_par_image=1, codec="mp4v", taille_file=8):
+    """
+    Simule et encode une image tous les pas_par_image pas.
+    journal : JournalEntrees (état de départ + actions) ; nb_pas vaut par
+    défaut journal.nb_pas.
+    Retourne (état final, encodeur) ; l'encodeur (fermé) garde ses
+    compteurs nb_images et nb_attentes.
+    La vidéo est à 1 / (dt * pas_par_image) images par seconde : elle se
+    lit en temps réel quelle que soit la vitesse d'export.
+    """
+    if journal is None:
+        journal = JournalEntrees()
+    if journal.zones:
+        # La vidéo garde la taille de départ : la scène ne peut pas suivre
+        raise ValueError("journal avec changement de résolution : export vidéo impossible")
+    if nb_pas is None:
+        nb_pas = journal.nb_pas
+
+    etat = journal.creer_etat()
+    actions = {}
+    for tick, action in zip(journal.ticks, journal.actions):
+        actions.setdefault(tick, []).append(action)
+
+    image = np.zeros((journal.hauteur, journal.largeur, 3), dtype=np.uint8)
+    cache = CacheScene()
+    encodeur = EncodeurVideo(
+        chemin, journal.largeur, journal.hauteur,
+        fps=1.0 / (etat.dt * pas_par_image), codec=codec, taille_file=taille_file
+    ).demarrer()
+
+    try:
+        for i in range(nb_pas):
+            for action in actions.get(etat.tick, ()):
+                appliquer_action(etat, action)
+            avancer(etat)
+
+            if (i + 1) % pas_par_image:
+                continue
+
+            dessiner_scene(
+                image,
+                etat.mode_adas,
+                etat.position_relative_ego,
+                etat.position_relative_cible,
+                etat.distance_min_atteinte,
+                etat.x_centre_ego,
+                etat.indice_voie_ego,
+                etat.indice_voie_cible,
+                etat.v_ego_base,
+                etat.v_cible,
+                etat.zone_params,
+                etat.trafic,
+                cache
+            )
+            encodeur.ecrire(image)
+    finally:
+        encodeur.fermer()
+    return etat, encodeur
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export vidéo d'une simulation ADAS (sans fenêtre)")
+    parser.add_argument("sortie", help="fichier vidéo (.mp4, .avi...)")
+    parser.add_argument(
+        "--journal", metavar="FICHIER.npz",
+        help="rejoue une session enregistrée (adas_simulation_2cars.py --journal)"
+    )
+    parser.add_argument("--duree", type=float, default=None, help="durée simulée (s)")
+    parser.add_argument(
+        "--trafic", type=int, metavar="NB_VEHICULES", default=0,
+        help="sans journal : NB_VEHICULES véhicules au lieu de la cible unique"
+    )
+    parser.add_argument("--voies", type=int, default=3, help="sans journal : nombre de voies")
+    parser.add_argument(
+        "--mode", default="MANUEL", choices=("MANUEL", "ACC", "LKA", "EMERGENCY"),
+        help="sans journal : mode ADAS de toute la simulation"
+    )
+    parser.add_argument(
+        "--pas-par-image", type=int, default=1,
+        help="une image tous les N pas (2 : vidéo à 25 images/s)"
+    )
+    parser.add_argument("--codec", default="mp4v", help="code FOURCC (mp4v, MJPG, XVID...)")
+    args = parser.parse_args()
+
+    if args.journal:
+        journal = charger_journal(args.journal)
+    else:
+        journal = JournalEntrees(
+            nb_vehicules=args.trafic, proba_changement_voie=0.002, nb_voies=args.voies
+        )
+        journal.ajouter(0, args.mode)
+        journal.nb_pas = int(round((args.duree or 20.0) / journal.dt))
+
+    nb_pas = journal.nb_pas
+    if args.journal and args.duree is not None:
+        nb_pas = int(round(args.duree / journal.dt))
+
+    debut = time.perf_counter()
+    etat, encodeur = exporter(args.sortie, journal, nb_pas, args.pas_par_image, args.codec)
+    duree = time.perf_counter() - debut
+    nb_images = encodeur.nb_images
+    print(
+        f"{nb_images} images ({nb_pas * journal.dt:.0f} s simulées) écrites dans {args.sortie} "
+        f"en {duree:.2f} s ({nb_images / max(duree, 1e-9):.0f} images/s, "
+        f"attentes encodeur : {encodeur.nb_attentes})"
+    )
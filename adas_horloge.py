@@ -0,0 +1,112 @@
+"""
+Pas de temps fixe pour la physique et cadencement de l'affichage.
+
+Les vitesses sont exprimées par seconde ; la physique avance toujours par
+pas de PAS_TEMPS secondes, quel que soit le rythme des frames :
+- un accumulateur convertit le temps réel écoulé en nombre de pas à
+  simuler (plusieurs pas si l'affichage a pris du retard, aucun s'il est
+  en avance) ;
+- l'affichage vise fps_cible ; sous charge, des frames sont sautées au
+  lieu de ralentir la simulation ;
+- en mode illimité, la simulation enchaîne les pas sans attendre le temps
+  réel et n'affiche qu'une frame par période d'affichage.
+"""
+
+import time
+
+# Pas fixe de la physique : 50 Hz, le rythme de l'ancien cv2.waitKey(20)
+PAS_TEMPS = 1.0 / 50.0
+
+
+class HorlogeSimulation:
+    """
+    Utilisation dans une boucle d'affichage :
+
+        horloge = HorlogeSimulation()
+        while True:
+            while horloge.pas_suivant():
+                step(etat, ...)
+            if horloge.afficher():
+                ... dessin + imshow ...
+            key = cv2.waitKey(horloge.attente_ms())
+    """
+
+    def __init__(self, dt=PAS_TEMPS, fps_cible=50.0, vitesse=1.0, illimite=False,
+                 max_pas_par_frame=25, max_frames_sautees=5):
+        self.dt = dt
+        self.periode = 1.0 / fps_cible
+        self.vitesse = vitesse                 # 2.0 : deux fois le temps réel
+        self.illimite = illimite
+        self.max_pas_par_frame = max_pas_par_frame
+        self.max_frames_sautees = max_frames_sautees
+
+        maintenant = time.perf_counter()
+        self.precedent = maintenant
+        self.prochaine_frame = maintenant
+        self.accumulateur = 0.0
+        self.pas_frame = 0
+
+        self.nb_pas = 0
+        self.nb_frames = 0
+        self.nb_frames_sautees = 0
+        self._sautees_de_suite = 0
+
+    def pas_suivant(self):
+        """
+        Faut-il simuler un pas de plus avant la prochaine frame ?
+        """
+        if self.pas_frame == 0:
+            maintenant = time.perf_counter()
+            if not self.illimite:
+                self.accumulateur += (maintenant - self.precedent) * self.vitesse
+            self.precedent = maintenant
+
+        if self.illimite:
+            # Au moins un pas, puis au plus vite jusqu'à l'échéance de la frame
+            continuer = self.pas_frame == 0 or time.perf_counter() < self.prochaine_frame
+        else:
+            if self.pas_frame >= self.max_pas_par_frame:
+                # Trop de retard : on abandonne le temps restant plutôt
+                # que de s'enfoncer (la simulation ralentit exceptionnellement)
+                self.accumulateur = min(self.accumulateur, self.dt)
+                continuer = False
+            else:
+                continuer = self.accumulateur >= self.dt
+            if continuer:
+                self.accumulateur -= self.dt
+
+        if continuer:
+            self.pas_frame += 1
+            self.nb_pas += 1
+        else:
+            self.pas_frame = 0
+        return continuer
+
+    def afficher(self):
+        """
+        Faut-il dessiner cette frame ? Non si l'on a plus d'une période de
+        retard (dans la limite de max_frames_sautees consécutives).
+        """
+        maintenant = time.perf_counter()
+        en_retard = maintenant > self.prochaine_frame + self.periode
+        if en_retard and self._sautees_de_suite < self.max_frames_sautees:
+            self._sautees_de_suite += 1
+            self.nb_frames_sautees += 1
+            self.prochaine_frame += self.periode
+            return False
+
+        self._sautees_de_suite = 0
+        self.nb_frames += 1
+        # Trop de retard accumulé : on se recale sur maintenant
+        self.prochaine_frame = max(self.prochaine_frame + self.periode, maintenant)
+        return True
+
+    def attente_ms(self):
+        """
+        Délai pour cv2.waitKey jusqu'à la prochaine frame (au moins 1 ms).
+        En mode illimité, 1 ms seulement : le temps jusqu'à la frame
+        suivante revient aux pas de simulation (voir pas_suivant).
+        """
+        if self.illimite:
+            return 1
+        return max(1, int((self.prochaine_frame - time.perf_counter()) * 1000))
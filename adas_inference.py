@@ -0,0 +1,264 @@
+"""
+Inférence des mains (MediaPipe) dans un thread dédié.
+
+La boucle d'affichage ne bloque plus sur detector_mains.process() : elle
+soumet ses frames au thread d'inférence et applique le résultat le plus
+récent dès qu'il est publié. L'animation du HUD (dérive latérale,
+mouvement ACC) avance donc au rythme de l'affichage, pas de MediaPipe.
+
+Comme pour la capture, la dernière frame soumise gagne : si l'inférence
+est occupée, la frame en attente est remplacée par la nouvelle. Avec
+sans_perte=True (sources enregistrées), soumettre() attend au contraire
+que la frame précédente soit prise en charge, et chaque frame soumise
+donne un résultat, rendu dans l'ordre par nouveaux_resultats().
+
+Réduction et conversion RGB écrivent dans des tampons réutilisés
+(adas_tampons.TamponVariable) : rien n'est alloué par frame.
+"""
+
+import collections
+import threading
+import time
+
+import cv2
+
+from adas_tampons import TamponVariable
+
+
+class ResultatInference:
+    """
+    Résultat publié par le thread d'inférence.
+    resultats    : sortie brute de detecteur.process()
+    numero       : numéro de la frame soumise (croissant)
+    horodatage   : horodatage de capture de la frame (perf_counter)
+    duree        : durée de l'inférence (s)
+    """
+
+    def __init__(self, resultats, numero, horodatage, duree):
+        self.resultats = resultats
+        self.numero = numero
+        self.horodatage = horodatage
+        self.duree = duree
+
+
+class InferenceThread:
+    """
+    Possède le détecteur (ex. mp.solutions.hands.Hands) : seul ce thread
+    l'appelle. Les frames sont soumises en BGR, la conversion RGB est
+    faite ici pour décharger la boucle d'affichage.
+    pool : adas_tampons.PoolTampons où rendre les frames soumises une
+    fois analysées (ou remplacées avant de l'être).
+    sans_perte : aucune frame remplacée, tous les résultats conservés.
+    """
+
+    def __init__(self, detecteur, conversion=cv2.COLOR_BGR2RGB, pool=None, sans_perte=False):
+        self.detecteur = detecteur
+        self.conversion = conversion
+        self.pool = pool
+        self.sans_perte = sans_perte
+        self.converti = TamponVariable()
+        self.condition = threading.Condition()
+        self.en_attente = None
+        self.resultat = None
+        # Résultats pas encore lus par nouveaux_resultats()
+        self.publies = collections.deque(maxlen=None if sans_perte else 1)
+        self.thread = None
+        self.actif = False
+        self.nb_soumises = 0
+        self.nb_publies = 0
+
+    def demarrer(self):
+        self.actif = True
+        self.thread = threading.Thread(target=self._boucle, name="inference", daemon=True)
+        self.thread.start()
+        return self
+
+    def soumettre(self, image_bgr, horodatage):
+        """
+        Propose une frame à l'inférence. Remplace une éventuelle frame
+        pas encore prise en charge (sans_perte : attend qu'elle le soit).
+        L'image ne doit plus être modifiée par l'appelant.
+        """
+        with self.condition:
+            if self.sans_perte:
+                self.condition.wait_for(lambda: self.en_attente is None or not self.actif)
+            if self.en_attente is not None and self.pool is not None:
+                self.pool.rendre(self.en_attente[1])
+            self.en_attente = (self.nb_soumises, image_bgr, horodatage)
+            self.nb_soumises += 1
+            self.condition.notify_all()
+
+    def dernier_resultat(self):
+        """
+        Dernier résultat publié (ou None si aucun pour l'instant).
+        """
+        return self.resultat
+
+    def nouveaux_resultats(self):
+        """
+        Résultats publiés depuis l'appel précédent, dans l'ordre des
+        frames : tous en mode sans perte, sinon le plus récent seulement.
+        """
+        with self.condition:
+            nouveaux = list(self.publies)
+            self.publies.clear()
+        return nouveaux
+
+    def attendre_resultats(self, timeout=None):
+        """
+        Attend que toutes les frames soumises aient leur résultat
+        (fin d'une source enregistrée). Retourne False si timeout écoulé.
+        """
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: self.nb_publies == self.nb_soumises or not self.actif, timeout
+            )
+
+    def _boucle(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.en_attente is not None or not self.actif)
+                if not self.actif:
+                    break
+                numero, image_bgr, horodatage = self.en_attente
+                self.en_attente = None
+                self.condition.notify_all()
+
+            debut = time.perf_counter()
+            image = image_bgr
+            if self.conversion is not None:
+                image = cv2.cvtColor(image_bgr, self.conversion, dst=self.converti.vue(image_bgr.shape))
+            resultats = self.detecteur.process(image)
+            if self.pool is not None:
+                self.pool.rendre(image_bgr)
+            resultat = ResultatInference(resultats, numero, horodatage, time.perf_counter() - debut)
+            # Publication atomique (simple affectation d'attribut)
+            self.resultat = resultat
+            with self.condition:
+                self.publies.append(resultat)
+                self.nb_publies += 1
+                self.condition.notify_all()
+
+    def arreter(self):
+        self.actif = False
+        with self.condition:
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+
+
+class DetecteurMainsROI:
+    """
+    Enveloppe un détecteur de mains pour réduire le coût d'inférence :
+    - l'image est réduite à `largeur_inference` pixels de large au plus ;
+    - en mode suivi, seule une région d'intérêt autour de la main de la
+      frame précédente (boîte des landmarks + `marge`) est analysée ;
+    - si la main est perdue dans la ROI, on relance aussitôt une recherche
+      sur l'image entière.
+
+    Les landmarks rendus sont remis en coordonnées normalisées de l'image
+    complète : comptage des doigts et draw_landmarks restent inchangés.
+
+    process() attend une image BGR (recadrage et réduction avant la
+    conversion RGB) : utiliser InferenceThread(..., conversion=None).
+
+    Le suivi est fait ici : avec suivi=True, le détecteur doit être
+    construit en static_image_mode=True (voir charger_mediapipe). En mode
+    vidéo, MediaPipe suivrait la main d'un appel à l'autre dans des
+    repères qui changent avec la ROI.
+    """
+
+    def __init__(self, detecteur, largeur_inference=320, suivi=True, marge=0.5, taille_min=64,
+                 chrono=None):
+        self.detecteur = detecteur
+        self.chrono = chrono    # adas_mesures.ChronometreEtapes optionnel
+        self.largeur_inference = largeur_inference
+        self.suivi = suivi
+        self.marge = marge
+        self.taille_min = taille_min
+        self.roi = None   # (x0, y0, x1, y1) en pixels de l'image complète
+        self.reduite = TamponVariable()
+        self.rgb = TamponVariable()
+
+    def process(self, image_bgr):
+        resultats = None
+        if self.suivi and self.roi is not None:
+            resultats = self._analyser(image_bgr, self.roi)
+            if not resultats.multi_hand_landmarks:
+                # Main perdue : recherche sur toute l'image
+                self.roi = None
+        if resultats is None or not resultats.multi_hand_landmarks:
+            hauteur, largeur = image_bgr.shape[:2]
+            resultats = self._analyser(image_bgr, (0, 0, largeur, hauteur))
+
+        if self.suivi and resultats.multi_hand_landmarks:
+            self.roi = self._roi_depuis_landmarks(resultats.multi_hand_landmarks, image_bgr.shape)
+        return resultats
+
+    def _analyser(self, image_bgr, roi):
+        """
+        Inférence sur la région roi (réduite si besoin), landmarks remis
+        en coordonnées de l'image complète.
+        """
+        hauteur, largeur = image_bgr.shape[:2]
+        x0, y0, x1, y1 = roi
+        chrono = self.chrono
+        t = chrono.top() if chrono is not None else 0.0
+
+        region = image_bgr[y0:y1, x0:x1]
+        largeur_roi = x1 - x0
+        hauteur_roi = y1 - y0
+
+        if self.largeur_inference and largeur_roi > self.largeur_inference:
+            echelle = self.largeur_inference / largeur_roi
+            hauteur_reduite = max(1, int(round(hauteur_roi * echelle)))
+            region = cv2.resize(
+                region,
+                (self.largeur_inference, hauteur_reduite),
+                dst=self.reduite.vue((hauteur_reduite, self.largeur_inference) + region.shape[2:]),
+                interpolation=cv2.INTER_AREA
+            )
+        if chrono is not None:
+            t = chrono.noter("reduction", t)
+
+        region = cv2.cvtColor(region, cv2.COLOR_BGR2RGB, dst=self.rgb.vue(region.shape))
+        if chrono is not None:
+            t = chrono.noter("cvtColor", t)
+
+        resultats = self.detecteur.process(region)
+        if chrono is not None:
+            chrono.noter("mediapipe", t)
+
+        if resultats.multi_hand_landmarks and roi != (0, 0, largeur, hauteur):
+            # Coordonnées normalisées ROI -> image complète
+            sx = largeur_roi / largeur
+            sy = hauteur_roi / hauteur
+            ox = x0 / largeur
+            oy = y0 / hauteur
+            for main_landmarks in resultats.multi_hand_landmarks:
+                for lm in main_landmarks.landmark:
+                    lm.x = ox + lm.x * sx
+                    lm.y = oy + lm.y * sy
+                    lm.z = lm.z * sx
+        return resultats
+
+    def _roi_depuis_landmarks(self, multi_hand_landmarks, forme):
+        """
+        Boîte englobante des landmarks, élargie de `marge` et carrée,
+        bornée à l'image.
+        """
+        hauteur, largeur = forme[:2]
+        xs = [lm.x for main in multi_hand_landmarks for lm in main.landmark]
+        ys = [lm.y for main in multi_hand_landmarks for lm in main.landmark]
+        cx = (min(xs) + max(xs)) * 0.5 * largeur
+        cy = (min(ys) + max(ys)) * 0.5 * hauteur
+        cote = max((max(xs) - min(xs)) * largeur, (max(ys) - min(ys)) * hauteur)
+        cote = max(self.taille_min, cote * (1.0 + 2.0 * self.marge))
+
+        x0 = max(0, int(cx - cote / 2))
+        y0 = max(0, int(cy - cote / 2))
+        x1 = min(largeur, int(cx + cote / 2))
+        y1 = min(hauteur, int(cy + cote / 2))
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            return None
+        return x0, y0, x1, y1
@@ -0,0 +1,222 @@
+"""
+Enregistrement binaire des landmarks de la main et relecture rapide.
+
+Chaque résultat d'inférence devient un enregistrement de taille fixe
+(DTYPE_LANDMARKS) : horodatage, présence d'une main, latéralité, taille
+de l'image et les 21 points (x, y, z) en float32. Le tout est sauvé en
+.npy (np.save) et relu en mémoire mappée (np.load(..., mmap_mode="r")).
+
+La relecture enchaîne comptage des doigts (vectorisé sur toutes les
+frames) -> mode ADAS -> moteur de simulation, sans caméra ni MediaPipe,
+dans la scène de la démo webcam : une session de 10 minutes se rejoue en
+une fraction de seconde.
+"""
+
+import numpy as np
+
+from adas_doigts import MAIN_INCONNUE, code_main, compter_doigts_batch
+from adas_horloge import PAS_TEMPS
+from adas_moteur import (
+    MODES_ADAS,
+    PARAMETRES_WEBCAM,
+    ZONE_WEBCAM,
+    action_depuis_chiffre,
+    calculer_zone_adas,
+    changer_zone,
+    creer_etat,
+    simuler,
+)
+
+NB_LANDMARKS = 21
+AUCUNE_MAIN = -1
+
+DTYPE_LANDMARKS = np.dtype([
+    ("horodatage", np.float64),                  # s, depuis le début de l'enregistrement
+    ("presente", np.bool_),                      # une main détectée ?
+    ("main", np.int8),                           # MAIN_GAUCHE / MAIN_DROITE / MAIN_INCONNUE
+    ("largeur", np.uint16),                      # taille de l'image analysée (pixels)
+    ("hauteur", np.uint16),
+    ("points", np.float32, (NB_LANDMARKS, 3)),   # coordonnées normalisées
+])
+
+
+def extraire_main(resultats):
+    """
+    Dernière main d'un résultat MediaPipe (c'est elle qui fixe le chiffre
+    détecté dans la démo).
+    Retourne (presente, main, points) ; points est un tableau (21, 3)
+    float32, ou None si aucune main.
+    """
+    if resultats is None or not resultats.multi_hand_landmarks:
+        return False, MAIN_INCONNUE, None
+
+    id_main = len(resultats.multi_hand_landmarks) - 1
+    main_landmarks = resultats.multi_hand_landmarks[id_main]
+
+    main_label = None
+    if resultats.multi_handedness:
+        main_label = resultats.multi_handedness[id_main].classification[0].label
+
+    points = np.array(
+        [(lm.x, lm.y, lm.z) for lm in main_landmarks.landmark], dtype=np.float32
+    )
+    return True, code_main(main_label), points
+
+
+class EnregistreurLandmarks:
+    """
+    Accumule les enregistrements dans un tableau qui double de taille
+    quand il est plein ; fermer() écrit le fichier .npy.
+    """
+
+    def __init__(self, chemin, capacite=1024):
+        self.chemin = chemin
+        self.donnees = np.zeros(capacite, dtype=DTYPE_LANDMARKS)
+        self.nb = 0
+        self.origine = None
+
+    def ajouter(self, horodatage, presente, main, largeur, hauteur, points=None):
+        if self.origine is None:
+            self.origine = horodatage
+        if self.nb == len(self.donnees):
+            self.donnees = np.concatenate((self.donnees, np.zeros_like(self.donnees)))
+
+        enregistrement = self.donnees[self.nb]
+        enregistrement["horodatage"] = horodatage - self.origine
+        enregistrement["presente"] = presente
+        enregistrement["main"] = main
+        enregistrement["largeur"] = largeur
+        enregistrement["hauteur"] = hauteur
+        if points is not None:
+            enregistrement["points"] = points
+        self.nb += 1
+
+    def fermer(self):
+        np.save(self.chemin, self.donnees[:self.nb])
+        return self.nb
+
+
+def charger_landmarks(chemin):
+    """
+    Ouvre un enregistrement en mémoire mappée (lecture seule).
+    """
+    return np.load(chemin, mmap_mode="r")
+
+
+# ==============================
+# Relecture
+# ==============================
+
+def chiffres_depuis_enregistrement(enregistrement):
+    """
+    Chiffre détecté pour chaque enregistrement (AUCUNE_MAIN si pas de main).
+    Retourne un tableau (F,) d'entiers.
+    """
+    chiffres = compter_doigts_batch(
+        enregistrement["points"], enregistrement["main"],
+        enregistrement["largeur"], enregistrement["hauteur"]
+    )
+    chiffres[~enregistrement["presente"]] = AUCUNE_MAIN
+    return chiffres
+
+
+def modes_depuis_enregistrement(enregistrement, mode_initial="MANUEL"):
+    """
+    Indice (dans MODES_ADAS) du mode en vigueur après chaque enregistrement
+    (>= 4 doigts : le mode courant est conservé).
+    Retourne un tableau (F,) d'entiers.
+    """
+    chiffres = chiffres_depuis_enregistrement(enregistrement)
+
+    # Pas de main / 0 doigt -> MANUEL, 1 -> ACC, 2 -> LKA, 3 -> EMERGENCY, sinon -1
+    modes = np.full(len(chiffres), -1, dtype=np.int64)
+    for chiffre in (AUCUNE_MAIN, 0, 1, 2, 3):
+        action = action_depuis_chiffre(None if chiffre == AUCUNE_MAIN else chiffre)
+        modes[chiffres == chiffre] = MODES_ADAS.index(action)
+
+    # -1 : on propage le dernier mode connu
+    connus = np.where(modes >= 0, np.arange(len(modes)), -1)
+    np.maximum.accumulate(connus, out=connus)
+    return np.where(connus >= 0, modes[connus], MODES_ADAS.index(mode_initial))
+
+
+def actions_depuis_enregistrement(enregistrement, dt=PAS_TEMPS):
+    """
+    Actions du moteur {tick: mode} : chaque enregistrement est placé au
+    pas de simulation (de dt secondes) correspondant à son horodatage.
+    Seuls les changements de mode sont gardés.
+    """
+    modes = modes_depuis_enregistrement(enregistrement)
+    changements = np.flatnonzero(np.diff(modes, prepend=-1))
+    ticks = np.round(enregistrement["horodatage"][changements] / dt).astype(np.int64)
+
+    actions = {}
+    for tick, mode in zip(ticks.tolist(), modes[changements].tolist()):
+        actions[tick] = MODES_ADAS[mode]
+    return actions
+
+
+def changements_de_taille(enregistrement, dt=PAS_TEMPS):
+    """
+    Changements de taille d'image en cours d'enregistrement.
+    Retourne une liste [(tick, largeur, hauteur)], le tick étant celui de la
+    première frame à la nouvelle taille.
+    """
+    largeurs = enregistrement["largeur"]
+    hauteurs = enregistrement["hauteur"]
+    indices = np.flatnonzero(
+        (largeurs[1:] != largeurs[:-1]) | (hauteurs[1:] != hauteurs[:-1])
+    ) + 1
+    ticks = np.round(enregistrement["horodatage"][indices] / dt).astype(np.int64)
+    return list(zip(ticks.tolist(), largeurs[indices].tolist(), hauteurs[indices].tolist()))
+
+
+def rejouer(enregistrement, etat=None):
+    """
+    Rejoue un enregistrement dans le moteur de simulation (pas de etat.dt),
+    au plus vite. Retourne l'état final.
+    Sans etat, on repart de la scène de la démo webcam (PARAMETRES_WEBCAM,
+    ZONE_WEBCAM) à la taille de la première frame, et les changements de
+    taille d'image sont rejoués (changer_zone) comme en direct.
+    """
+    changements = []
+    if etat is None:
+        if len(enregistrement):
+            largeur = int(enregistrement["largeur"][0])
+            hauteur = int(enregistrement["hauteur"][0])
+            etat = creer_etat(largeur, hauteur, ZONE_WEBCAM, **PARAMETRES_WEBCAM)
+            changements = changements_de_taille(enregistrement, etat.dt)
+        else:
+            etat = creer_etat(zone=ZONE_WEBCAM, **PARAMETRES_WEBCAM)
+    nb_pas = 0
+    if len(enregistrement):
+        nb_pas = int(round(float(enregistrement["horodatage"][-1]) / etat.dt)) + 1
+    actions = actions_depuis_enregistrement(enregistrement, etat.dt)
+
+    # Jusqu'à chaque changement de taille, appliqué avant les actions du tick
+    fin = etat.tick + nb_pas
+    for tick, largeur, hauteur in changements:
+        simuler(etat, tick - etat.tick, actions)
+        changer_zone(
+            etat, calculer_zone_adas(largeur, hauteur, ZONE_WEBCAM, etat.zone_params.nb_voies)
+        )
+    return simuler(etat, fin - etat.tick, actions)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Relecture d'un enregistrement de landmarks")
+    parser.add_argument("fichier", help="enregistrement .npy (adas_webcam_demo.py --enregistrer)")
+    args = parser.parse_args()
+
+    debut = time.perf_counter()
+    enregistrement = charger_landmarks(args.fichier)
+    etat = rejouer(enregistrement)
+    duree = time.perf_counter() - debut
+
+    print(
+        f"{len(enregistrement)} frames rejouees en {duree * 1000:.1f} ms "
+        f"-> mode final {etat.mode_adas}, voie {etat.indice_voie_ego + 1}, tick {etat.tick}"
+    )
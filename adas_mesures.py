@@ -0,0 +1,193 @@
+"""
+Chronométrage par étape de la boucle webcam (capture, miroir, copie,
+inférence, dessin, imshow/waitKey...).
+
+Chaque étape garde ses dernières durées dans un tampon circulaire ;
+percentiles() en donne les p50 / p95 / p99 glissants. Les mesures peuvent
+aussi être exportées en CSV par paquets (une écriture toutes les
+periode_export secondes, pas une par frame).
+
+Les étapes s'enchaînent sans indentation supplémentaire : top() prend
+l'heure, noter(nom, t) enregistre la durée depuis t et rend la nouvelle
+heure de départ. Désactivé (actif=False), ni top() ni noter() ne lisent
+l'horloge : le coût se limite à un appel de méthode par étape.
+
+    chrono = ChronometreEtapes(actif=True)
+    t = chrono.top()
+    frame = cv2.flip(frame, 1)
+    t = chrono.noter("flip", t)
+    image = frame.copy()
+    t = chrono.noter("copie", t)
+
+Plusieurs threads notent des étapes (boucle d'affichage, thread
+d'inférence via DetecteurMainsROI) pendant que la boucle lit les
+percentiles : tampons et compteurs sont protégés par un verrou, pris
+seulement quand le chronomètre est actif.
+"""
+
+import collections
+import csv
+import threading
+import time
+
+import cv2
+import numpy as np
+
+PERCENTILES = (50, 95, 99)
+
+# Tableau du HUD (dessiner_mesures) : titre, puis une ligne par étape
+TITRE_MESURES = "Etape        p50 / p95 / p99 (ms)"
+INTERLIGNE_MESURES = 16
+
+
+class ChronometreEtapes:
+    """
+    Durées glissantes par étape (taille_fenetre dernières mesures) et
+    export CSV optionnel (colonnes : horodatage, etape, duree_ms).
+    """
+
+    def __init__(self, actif=True, taille_fenetre=300, fichier_csv=None, periode_export=5.0):
+        self.actif = actif
+        self.taille_fenetre = taille_fenetre
+        self.durees = {}      # étape -> tampon circulaire (s)
+        self.nb = {}          # étape -> nombre total de mesures
+        self.verrou = threading.Lock()
+
+        self.fichier_csv = fichier_csv
+        self.periode_export = periode_export
+        self.a_exporter = collections.deque()
+        self.dernier_export = time.perf_counter()
+        self._entete_ecrite = False
+
+        self._percentiles = {}
+        self._date_percentiles = -float("inf")
+
+    def top(self):
+        """
+        Heure de départ d'une étape (0.0 si désactivé).
+        """
+        if not self.actif:
+            return 0.0
+        return time.perf_counter()
+
+    def noter(self, nom, debut):
+        """
+        Enregistre la durée de l'étape `nom` commencée à `debut` ;
+        rend l'heure de fin (= début de l'étape suivante).
+        """
+        if not self.actif:
+            return 0.0
+        fin = time.perf_counter()
+        self.ajouter(nom, fin - debut)
+        return fin
+
+    def ajouter(self, nom, duree):
+        """
+        Ajoute une durée (s) mesurée ailleurs (ex. thread d'inférence).
+        """
+        if not self.actif:
+            return
+        with self.verrou:
+            tampon = self.durees.get(nom)
+            if tampon is None:
+                tampon = self.durees[nom] = np.zeros(self.taille_fenetre)
+                self.nb[nom] = 0
+            tampon[self.nb[nom] % self.taille_fenetre] = duree
+            self.nb[nom] += 1
+
+        if self.fichier_csv is not None:
+            self.a_exporter.append((time.time(), nom, duree * 1000.0))
+
+    def percentiles(self, periode_cache=0.0):
+        """
+        {étape: (p50, p95, p99)} en millisecondes, sur la fenêtre glissante.
+        periode_cache : le calcul n'est refait qu'au plus toutes les
+        periode_cache secondes (affichage à chaque frame).
+        """
+        maintenant = time.perf_counter()
+        if maintenant - self._date_percentiles < periode_cache:
+            return self._percentiles
+
+        # Copie des fenêtres sous verrou, percentiles calculés hors verrou
+        with self.verrou:
+            fenetres = {
+                nom: tampon[:min(self.nb[nom], self.taille_fenetre)].copy()
+                for nom, tampon in self.durees.items()
+            }
+        resultat = {}
+        for nom, valeurs in fenetres.items():
+            if valeurs.size:
+                resultat[nom] = tuple(np.percentile(valeurs, PERCENTILES) * 1000.0)
+        self._percentiles = resultat
+        self._date_percentiles = maintenant
+        return resultat
+
+    def exporter_si_besoin(self, forcer=False):
+        """
+        Ecrit en bloc les mesures accumulées si periode_export est écoulée.
+        """
+        if self.fichier_csv is None or not self.a_exporter:
+            return
+        maintenant = time.perf_counter()
+        if not forcer and maintenant - self.dernier_export < self.periode_export:
+            return
+        self.dernier_export = maintenant
+
+        # popleft : les ajouts faits pendant l'export par un autre thread
+        # restent pour l'export suivant
+        lignes = [self.a_exporter.popleft() for _ in range(len(self.a_exporter))]
+        with open(self.fichier_csv, "a" if self._entete_ecrite else "w", newline="") as fichier:
+            ecrivain = csv.writer(fichier)
+            if not self._entete_ecrite:
+                ecrivain.writerow(("horodatage", "etape", "duree_ms"))
+                self._entete_ecrite = True
+            ecrivain.writerows(lignes)
+
+    def fermer(self):
+        self.exporter_si_besoin(forcer=True)
+
+
+def dessiner_mesures(image, percentiles, origine):
+    """
+    Affiche une ligne "étape  p50 / p95 / p99 ms" par étape.
+    origine : ligne de titre (voir placer_mesures).
+    """
+    x0, y0 = origine
+    cv2.putText(
+        image, TITRE_MESURES, (x0, y0),
+        cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 255, 255), 1, cv2.LINE_AA
+    )
+    for i, (nom, (p50, p95, p99)) in enumerate(percentiles.items()):
+        cv2.putText(
+            image,
+            f"{nom:<12s} {p50:5.1f} / {p95:5.1f} / {p99:5.1f}",
+            (x0, y0 + (i + 1) * INTERLIGNE_MESURES),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.45,
+            (0, 255, 255),
+            1,
+            cv2.LINE_AA
+        )
+
+
+def placer_mesures(boite, nb_etapes, x_max, y_max, marge=20):
+    """
+    Origine de dessiner_mesures pour nb_etapes étapes, sans chevaucher la
+    boîte (x0, y0, x1, y1) des textes du HUD : à sa droite, titre aligné
+    sur son haut, sinon en dessous. Le tableau doit tenir avant x_max et
+    y_max. Retourne None s'il ne tient nulle part.
+    """
+    (largeur, hauteur_titre), ligne_base = cv2.getTextSize(
+        TITRE_MESURES, cv2.FONT_HERSHEY_SIMPLEX, 0.45, 1
+    )
+    (largeur_ligne, _), _ = cv2.getTextSize(
+        f"{'x' * 12} {999.9:5.1f} / {999.9:5.1f} / {999.9:5.1f}", cv2.FONT_HERSHEY_SIMPLEX, 0.45, 1
+    )
+    largeur = max(largeur, largeur_ligne)
+    hauteur = hauteur_titre + nb_etapes * INTERLIGNE_MESURES + ligne_base
+
+    x0, y0, x1, y1 = boite
+    for x, y in ((x1 + marge, y0), (x0, y1 + marge)):
+        if x + largeur <= x_max and y + hauteur <= y_max:
+            return x, y + hauteur_titre
+    return None
@@ -0,0 +1,297 @@
+"""
+Indicateurs de sécurité calculés au fil de l'eau, en mémoire constante.
+
+Après chaque pas, mettre_a_jour(etat) lit l'état courant et met à jour
+des agrégats (minimums, durées, compteurs) : aucune trajectoire n'est
+gardée, une simulation d'une journée coûte la même mémoire qu'une
+simulation d'une seconde.
+
+Grandeurs instantanées (unités du moteur : positions en hauteur de zone,
+vitesses par seconde, négatives = vers l'avant) :
+- ecart       : position ego - position du véhicule devant, quand l'ego
+                le suit dans sa voie (même grandeur que la marge ACC) ;
+- ecart pare-chocs : ecart - longueur d'un véhicule (>= 0) ;
+- TTC         : temps avant collision, ecart pare-chocs / vitesse de
+                rapprochement (si l'ego se rapproche) ;
+- temps inter-véhiculaire : ecart pare-chocs / vitesse de l'ego ;
+- chevauchement : boîtes ego / véhicule qui se recouvrent (collision) ;
+  chaque début de chevauchement compte pour une collision.
+
+Les tentatives / abandons de changement de voie sont les compteurs du
+moteur (nb_changements_demandes, nb_changements_bloques,
+nb_changements_annules).
+
+MetriquesSecurite suit un EtatSimulation (boucles interactives, avec ou
+sans trafic) ; MetriquesBatch suit un EtatBatch (N scénarios, mêmes
+formules par masques).
+"""
+
+import math
+
+import numpy as np
+
+# Longueur d'un véhicule en hauteur de zone (hauteur_zone / 10 à l'écran)
+LONGUEUR_VEHICULE = 0.1
+
+SEUIL_TTC = 2.0              # s, TTC jugé critique en dessous
+SEUIL_TEMPS_INTER = 1.0      # s, temps inter-véhiculaire trop court en dessous
+
+
+def largeur_vehicule(zone_params):
+    """
+    Largeur d'un véhicule en pixels (3/8 de voie, comme au dessin).
+    """
+    return zone_params.largeur_vehicule
+
+
+class MetriquesSecurite:
+    """
+    Agrégats d'une simulation scalaire (adas_moteur.EtatSimulation).
+    """
+
+    def __init__(self, seuil_ttc=SEUIL_TTC, seuil_temps_inter=SEUIL_TEMPS_INTER,
+                 longueur_vehicule=LONGUEUR_VEHICULE):
+        self.seuil_ttc = seuil_ttc
+        self.seuil_temps_inter = seuil_temps_inter
+        self.longueur_vehicule = longueur_vehicule
+
+        self.nb_pas = 0
+        self.dt = 0.0
+        self.ecart_min = math.inf
+        self.ttc_min = math.inf
+        self.temps_inter_min = math.inf
+        self.somme_temps_inter = 0.0
+        self.nb_temps_inter = 0
+        self.nb_pas_ttc_critique = 0
+        self.nb_pas_temps_inter_court = 0
+        self.nb_pas_distance_min = 0
+        self.nb_collisions = 0
+        self.nb_pas_chevauchement = 0
+        self._chevauchement = False
+
+        # Dernières valeurs instantanées (HUD)
+        self.ttc = math.inf
+        self.temps_inter = math.inf
+
+        self.nb_changements_demandes = 0
+        self.nb_changements_abandonnes = 0
+
+    def mettre_a_jour(self, etat):
+        """
+        À appeler après chaque pas de simulation.
+        """
+        pe = etat.position_relative_ego
+        longueur = self.longueur_vehicule
+
+        # Véhicule suivi : le plus proche devant dans la voie de l'ego
+        devant = None
+        if etat.trafic is not None:
+            vehicule = etat.trafic.vehicule_devant(etat.indice_voie_ego, pe)
+            if vehicule is not None:
+                _, position, vitesse = vehicule
+                devant = (position, vitesse)
+        elif etat.indice_voie_ego == etat.indice_voie_cible and pe > etat.position_relative_cible:
+            devant = (etat.position_relative_cible, etat.v_cible)
+
+        ttc = math.inf
+        temps_inter = math.inf
+        if devant is not None:
+            position, vitesse = devant
+            ecart = pe - position
+            self.ecart_min = min(self.ecart_min, ecart)
+            ecart_pare_chocs = max(ecart - longueur, 0.0)
+            rapprochement = vitesse - etat.v_ego
+            if rapprochement > 0.0:
+                ttc = ecart_pare_chocs / rapprochement
+            if etat.v_ego < 0.0:
+                temps_inter = ecart_pare_chocs / -etat.v_ego
+                self.somme_temps_inter += temps_inter
+                self.nb_temps_inter += 1
+        self.ttc = ttc
+        self.temps_inter = temps_inter
+        self.ttc_min = min(self.ttc_min, ttc)
+        self.temps_inter_min = min(self.temps_inter_min, temps_inter)
+        if ttc < self.seuil_ttc:
+            self.nb_pas_ttc_critique += 1
+        if temps_inter < self.seuil_temps_inter:
+            self.nb_pas_temps_inter_court += 1
+        if etat.distance_min_atteinte:
+            self.nb_pas_distance_min += 1
+
+        # Chevauchement des boîtes (y compris pendant un changement de voie)
+        chevauchement = self._chevauchement_ego(etat, longueur)
+        if chevauchement:
+            self.nb_pas_chevauchement += 1
+            if not self._chevauchement:
+                self.nb_collisions += 1
+        self._chevauchement = chevauchement
+
+        self.nb_changements_demandes = etat.nb_changements_demandes
+        self.nb_changements_abandonnes = etat.nb_changements_bloques + etat.nb_changements_annules
+        self.nb_pas += 1
+        self.dt = etat.dt
+
+    def _chevauchement_ego(self, etat, longueur):
+        centres_voies = etat.zone_params.centres_voies
+        largeur = largeur_vehicule(etat.zone_params)
+        pe = etat.position_relative_ego
+        if etat.trafic is None:
+            return (
+                abs(etat.x_centre_ego - centres_voies[etat.indice_voie_cible]) < largeur and
+                abs(pe - etat.position_relative_cible) < longueur
+            )
+        # Voies que l'ego recouvre latéralement (deux pendant un changement)
+        return any(
+            abs(etat.x_centre_ego - centre) < largeur and etat.trafic.voie_occupee(voie, pe, longueur)
+            for voie, centre in enumerate(centres_voies)
+        )
+
+    def resume(self):
+        """
+        Agrégats sous forme de dictionnaire.
+        """
+        dt = self.dt
+        return {
+            "duree": self.nb_pas * dt,
+            "ecart_min": self.ecart_min,
+            "ttc_min": self.ttc_min,
+            "temps_inter_min": self.temps_inter_min,
+            "temps_inter_moyen": (
+                self.somme_temps_inter / self.nb_temps_inter if self.nb_temps_inter else math.inf
+            ),
+            "duree_ttc_critique": self.nb_pas_ttc_critique * dt,
+            "duree_temps_inter_court": self.nb_pas_temps_inter_court * dt,
+            "duree_distance_min": self.nb_pas_distance_min * dt,
+            "nb_collisions": self.nb_collisions,
+            "duree_chevauchement": self.nb_pas_chevauchement * dt,
+            "nb_changements_demandes": self.nb_changements_demandes,
+            "nb_changements_abandonnes": self.nb_changements_abandonnes,
+        }
+
+
+class MetriquesBatch:
+    """
+    Mêmes agrégats pour les N scénarios d'un adas_batch.EtatBatch
+    (un tableau de N valeurs par agrégat).
+    """
+
+    def __init__(self, n, seuil_ttc=SEUIL_TTC, seuil_temps_inter=SEUIL_TEMPS_INTER,
+                 longueur_vehicule=LONGUEUR_VEHICULE):
+        self.n = n
+        self.seuil_ttc = seuil_ttc
+        self.seuil_temps_inter = seuil_temps_inter
+        self.longueur_vehicule = longueur_vehicule
+
+        self.nb_pas = 0
+        self.dt = 0.0
+        self.ecart_min = np.full(n, np.inf)
+        self.ttc_min = np.full(n, np.inf)
+        self.temps_inter_min = np.full(n, np.inf)
+        self.somme_temps_inter = np.zeros(n)
+        self.nb_temps_inter = np.zeros(n, dtype=np.int64)
+        self.nb_pas_ttc_critique = np.zeros(n, dtype=np.int64)
+        self.nb_pas_temps_inter_court = np.zeros(n, dtype=np.int64)
+        self.nb_pas_distance_min = np.zeros(n, dtype=np.int64)
+        self.nb_collisions = np.zeros(n, dtype=np.int32)
+        self.nb_pas_chevauchement = np.zeros(n, dtype=np.int64)
+        self._chevauchement = np.zeros(n, dtype=bool)
+
+        self.nb_changements_demandes = np.zeros(n, dtype=np.int32)
+        self.nb_changements_abandonnes = np.zeros(n, dtype=np.int32)
+
+        # Tampons de travail
+        self._ecart = np.empty(n)
+        self._valeur = np.empty(n)
+        self._suit = np.empty(n, dtype=bool)
+        self._masque = np.empty(n, dtype=bool)
+
+    def mettre_a_jour(self, etat):
+        """
+        À appeler après chaque pas de simulation (step_batch).
+        """
+        longueur = self.longueur_vehicule
+        pe = etat.position_relative_ego
+        ecart = self._ecart
+        valeur = self._valeur
+        suit = self._suit
+        masque = self._masque
+
+        # Suivi de la cible dans la voie de l'ego
+        np.subtract(pe, etat.position_relative_cible, out=ecart)
+        np.equal(etat.indice_voie_ego, etat.indice_voie_cible, out=suit)
+        suit &= ecart > 0.0
+        np.copyto(valeur, ecart)
+        np.copyto(valeur, np.inf, where=~suit)
+        np.minimum(self.ecart_min, valeur, out=self.ecart_min)
+
+        # Ecart pare-chocs (écrit dans ecart, qui ne sert plus)
+        ecart -= longueur
+        np.maximum(ecart, 0.0, out=ecart)
+
+        # TTC (rapprochement = v_cible - v_ego > 0)
+        rapprochement = etat.v_cible - etat.v_ego
+        np.greater(rapprochement, 0.0, out=masque)
+        masque &= suit
+        valeur.fill(np.inf)
+        np.divide(ecart, rapprochement, out=valeur, where=masque)
+        np.minimum(self.ttc_min, valeur, out=self.ttc_min)
+        self.nb_pas_ttc_critique += valeur < self.seuil_ttc
+
+        # Temps inter-véhiculaire (ego en mouvement)
+        np.less(etat.v_ego, 0.0, out=masque)
+        masque &= suit
+        valeur.fill(np.inf)
+        np.divide(ecart, -etat.v_ego, out=valeur, where=masque)
+        np.minimum(self.temps_inter_min, valeur, out=self.temps_inter_min)
+        self.nb_pas_temps_inter_court += valeur < self.seuil_temps_inter
+        np.add(self.somme_temps_inter, valeur, out=self.somme_temps_inter, where=masque)
+        self.nb_temps_inter += masque
+
+        self.nb_pas_distance_min += etat.distance_min_atteinte
+
+        # Chevauchement des boîtes
+        chevauchement = (
+            (np.abs(etat.x_centre_ego - etat.centres_voies[etat.indice_voie_cible])
+             < largeur_vehicule(etat.zone_params)) &
+            (np.abs(pe - etat.position_relative_cible) < longueur)
+        )
+        self.nb_collisions += chevauchement & ~self._chevauchement
+        self.nb_pas_chevauchement += chevauchement
+        self._chevauchement = chevauchement
+
+        np.copyto(self.nb_changements_demandes, etat.nb_changements_demandes)
+        np.add(etat.nb_changements_bloques, etat.nb_changements_annules, out=self.nb_changements_abandonnes)
+        self.nb_pas += 1
+        self.dt = etat.dt
+
+    def resume(self):
+        """
+        Agrégats sous forme de dictionnaire de tableaux (N valeurs).
+        """
+        dt = self.dt
+        with np.errstate(invalid="ignore", divide="ignore"):
+            temps_inter_moyen = np.where(
+                self.nb_temps_inter > 0, self.somme_temps_inter / self.nb_temps_inter, np.inf
+            )
+        return {
+            "duree": np.full(self.n, self.nb_pas * dt),
+            "ecart_min": self.ecart_min.copy(),
+            "ttc_min": self.ttc_min.copy(),
+            "temps_inter_min": self.temps_inter_min.copy(),
+            "temps_inter_moyen": temps_inter_moyen,
+            "duree_ttc_critique": self.nb_pas_ttc_critique * dt,
+            "duree_temps_inter_court": self.nb_pas_temps_inter_court * dt,
+            "duree_distance_min": self.nb_pas_distance_min * dt,
+            "nb_collisions": self.nb_collisions.copy(),
+            "duree_chevauchement": self.nb_pas_chevauchement * dt,
+            "nb_changements_demandes": self.nb_changements_demandes.copy(),
+            "nb_changements_abandonnes": self.nb_changements_abandonnes.copy(),
+        }
+
+
+def afficher_resume(resume):
+    """
+    Une ligne par agrégat (fin de session interactive).
+    """
+    for nom, valeur in resume.items():
+        print(f"  {nom:26s} {valeur:.3f}" if isinstance(valeur, float) else f"  {nom:26s} {valeur}")
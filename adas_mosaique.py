@@ -0,0 +1,248 @@
+"""
+Mosaïque : K simulations du moteur vectorisé (adas_batch) dessinées
+côte à côte, une tuile par scénario, dans une seule image.
+
+Même langage visuel que dessiner_scene (route grise, lignes blanches,
+cible bleue, ego coloré selon le mode avec contour noir), réduit à la
+taille d'une tuile :
+- le fond (route + lignes) est dessiné une fois pour une tuile puis
+  répété sur toute la mosaïque par diffusion NumPy (broadcasting) ;
+  chaque image repart d'une simple copie de ce fond ;
+- tous les véhicules de toutes les tuiles sont remplis en quelques
+  affectations par indices NumPy (adas_raster.remplir_boites), sans un
+  appel cv2.rectangle par voiture et par tuile.
+
+    python adas_mosaique.py --tuiles 64
+    python adas_mosaique.py --tuiles 256 --taille 96x72 --voies 4
+"""
+
+import collections
+
+import cv2
+import numpy as np
+
+from adas_batch import CODES_ACTIONS, CODE_DROITE, CODE_GAUCHE, creer_etat_batch, step_batch
+from adas_horloge import HorlogeSimulation
+from adas_moteur import COULEURS_MODES, MODES_ADAS, action_depuis_touche, calculer_zone_adas
+from adas_raster import contourer_boites, remplir_boites
+
+# Zone de la route dans une tuile (proportions, comme ZONE_SIMULATION)
+ZONE_TUILE = (0.1, 0.9, 0.03, 0.97)
+
+COULEUR_FOND = (30, 30, 30)
+COULEUR_ROUTE = (50, 50, 50)
+COULEUR_CIBLE = (255, 0, 0)            # bleu
+COULEUR_DISTANCE_MIN = (0, 165, 255)   # orange ("Distance mini atteinte")
+
+
+class Mosaique:
+    """
+    Dessine un EtatBatch de nb_tuiles scénarios sur une grille de tuiles
+    largeur_tuile x hauteur_tuile (colonnes : défaut, grille à peu près carrée).
+    zone_moteur : géométrie (GeometrieRoute) dans laquelle le moteur
+    exprime x_centre_ego ; elle est ramenée à l'échelle de la tuile.
+    """
+
+    def __init__(self, nb_tuiles, zone_moteur, largeur_tuile=160, hauteur_tuile=120, colonnes=None):
+        if colonnes is None:
+            colonnes = int(np.ceil(np.sqrt(nb_tuiles)))
+        lignes = -(-nb_tuiles // colonnes)
+
+        self.nb_tuiles = nb_tuiles
+        self.colonnes = colonnes
+        self.lignes = lignes
+        self.zone_moteur = zone_moteur
+        self.route = route = calculer_zone_adas(
+            largeur_tuile, hauteur_tuile, ZONE_TUILE, zone_moteur.nb_voies
+        )
+        self.echelle = route.largeur_zone / zone_moteur.largeur_zone
+
+        # Véhicules : mêmes proportions que dessiner_scene (bornes incluses)
+        self.demi_largeur = max(1, int(route.largeur_vehicule) // 2)
+        self.hauteur_voiture = max(2, int(route.hauteur_zone / 10.0))
+        self.centres_voies = np.array(route.centres_voies, dtype=np.intp)
+        self.couleurs_modes = np.array([COULEURS_MODES[mode] for mode in MODES_ADAS], dtype=np.uint8)
+
+        # Origine de chaque tuile et zone de route où rogner ses véhicules
+        tuiles = np.arange(nb_tuiles)
+        self.ox = (tuiles % colonnes) * largeur_tuile
+        self.oy = (tuiles // colonnes) * hauteur_tuile
+        self.limites = (
+            self.ox + route.x1, self.oy + route.y1, self.ox + route.x2 + 1, self.oy + route.y2 + 1
+        )
+
+        # Fond d'une tuile, répété sur la grille par diffusion
+        tuile = np.empty((hauteur_tuile, largeur_tuile, 3), dtype=np.uint8)
+        tuile[:] = COULEUR_FOND
+        cv2.rectangle(tuile, (route.x1, route.y1), (route.x2, route.y2), COULEUR_ROUTE, -1)
+        for x_ligne in route.lignes:
+            cv2.line(tuile, (x_ligne, route.y1), (x_ligne, route.y2), (255, 255, 255), 1)
+
+        self.fond = np.empty((lignes * hauteur_tuile, colonnes * largeur_tuile, 3), dtype=np.uint8)
+        self.fond.reshape(lignes, hauteur_tuile, colonnes, largeur_tuile, 3)[:] = tuile[None, :, None]
+        reste = nb_tuiles % colonnes
+        if reste:
+            # Tuiles vides en fin de dernière ligne
+            self.fond[(lignes - 1) * hauteur_tuile:, reste * largeur_tuile:] = COULEUR_FOND
+
+    def nouvelle_image(self):
+        return self.fond.copy()
+
+    def dessiner(self, image, etat):
+        """
+        Redessine toute la mosaïque dans image (forme de self.fond).
+        """
+        if etat.n != self.nb_tuiles:
+            raise ValueError(f"{etat.n} scénarios pour {self.nb_tuiles} tuiles")
+        np.copyto(image, self.fond)
+
+        route = self.route
+        demi = self.demi_largeur
+        largeur = 2 * demi + 1
+        hauteur = self.hauteur_voiture + 1
+        course = route.hauteur_zone - self.hauteur_voiture
+
+        def haut_voiture(position):
+            y_bas = self.oy + route.y2 - (np.clip(position, 0.0, 1.0) * course).astype(np.intp)
+            return y_bas - self.hauteur_voiture
+
+        # Véhicules cibles
+        x_cible = self.ox + self.centres_voies[etat.indice_voie_cible] - demi
+        remplir_boites(
+            image, x_cible, haut_voiture(etat.position_relative_cible), largeur, hauteur,
+            COULEUR_CIBLE, self.limites
+        )
+
+        # Ego : couleur du mode, contour noir
+        x_ego = (
+            self.ox + route.x1 + (etat.x_centre_ego - self.zone_moteur.x1) * self.echelle
+        ).astype(np.intp) - demi
+        y_ego = haut_voiture(etat.position_relative_ego)
+        remplir_boites(
+            image, x_ego, y_ego, largeur, hauteur, self.couleurs_modes[etat.mode], self.limites
+        )
+        contourer_boites(image, x_ego, y_ego, largeur, hauteur, (0, 0, 0), self.limites, remplir_boites)
+
+        # Distance mini atteinte : barre orange au pied de la tuile
+        indices = np.flatnonzero(etat.distance_min_atteinte)
+        if indices.size:
+            remplir_boites(
+                image, self.ox[indices] + route.x1 + 2, self.oy[indices] + route.y2 - 4,
+                route.largeur_zone - 3, 3, COULEUR_DISTANCE_MIN
+            )
+        return image
+
+
+# ==============================
+# Démo
+# ==============================
+
+def creer_scenarios(nb_tuiles, nb_voies=3, graine=0):
+    """
+    nb_tuiles scénarios aux vitesses, marges et vitesses latérales tirées
+    au hasard, tous en ACC.
+    """
+    rng = np.random.default_rng(graine)
+    return creer_etat_batch(
+        nb_tuiles,
+        nb_voies=nb_voies,
+        mode_adas="ACC",
+        v_ego_base=rng.uniform(-0.3, -0.1, nb_tuiles),
+        v_cible=rng.uniform(-0.2, -0.1, nb_tuiles),
+        marge_distance_relative=rng.uniform(0.05, 0.3, nb_tuiles),
+        vitesse_laterale=rng.uniform(200.0, 800.0, nb_tuiles),
+        position_relative_cible=rng.uniform(0.0, 1.0, nb_tuiles),
+    )
+
+
+def actions_aleatoires(rng, n, proba):
+    """
+    Demandes de changement de voie aléatoires (proba par scénario et par pas).
+    Retourne un tableau de codes, ou None si aucune.
+    """
+    demandes = rng.random(n) < proba
+    if not demandes.any():
+        return None
+    return np.where(
+        demandes, np.where(rng.random(n) < 0.5, CODE_GAUCHE, CODE_DROITE), 0
+    ).astype(np.int8)
+
+
+def main(nb_tuiles=64, largeur_tuile=160, hauteur_tuile=120, colonnes=None, nb_voies=3,
+         fps_cible=30.0, proba_action=0.005, nb_pas=None, fichier_capture=None):
+    """
+    Fenêtre interactive (touches appliquées à toutes les tuiles), ou, si
+    nb_pas est donné, nb_pas pas dessinés sans fenêtre pour mesurer le
+    coût du dessin.
+    """
+    etat = creer_scenarios(nb_tuiles, nb_voies)
+    mosaique = Mosaique(nb_tuiles, etat.zone_params, largeur_tuile, hauteur_tuile, colonnes)
+    image = mosaique.nouvelle_image()
+    rng = np.random.default_rng(1)
+
+    if nb_pas is not None:
+        import time
+
+        duree_dessin = 0.0
+        for _ in range(nb_pas):
+            step_batch(etat, actions_aleatoires(rng, nb_tuiles, proba_action))
+            debut = time.perf_counter()
+            mosaique.dessiner(image, etat)
+            duree_dessin += time.perf_counter() - debut
+        print(
+            f"{nb_tuiles} tuiles ({image.shape[1]}x{image.shape[0]}) : "
+            f"{duree_dessin / max(nb_pas, 1) * 1000:.3f} ms par image"
+        )
+        if fichier_capture:
+            cv2.imwrite(fichier_capture, image)
+        return
+
+    horloge = HorlogeSimulation(etat.dt, fps_cible)
+    actions = collections.deque()
+    while True:
+        while horloge.pas_suivant():
+            codes = actions_aleatoires(rng, nb_tuiles, proba_action)
+            if actions:
+                codes = np.full(nb_tuiles, CODES_ACTIONS[actions.popleft()], dtype=np.int8)
+            step_batch(etat, codes)
+
+        if horloge.afficher():
+            mosaique.dessiner(image, etat)
+            cv2.imshow(f"Mosaique ADAS ({nb_tuiles} simulations)", image)
+
+        key = cv2.waitKey(horloge.attente_ms()) & 0xFF
+        if key == 27:
+            break
+        if key != 255:
+            action = action_depuis_touche(key)
+            if action is not None:
+                actions.append(action)
+
+    cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mosaïque de simulations ADAS (moteur vectorisé)")
+    parser.add_argument("--tuiles", type=int, default=64, help="nombre de simulations")
+    parser.add_argument("--taille", default="160x120", help="taille d'une tuile, LARGEURxHAUTEUR")
+    parser.add_argument("--colonnes", type=int, default=None, help="tuiles par ligne")
+    parser.add_argument("--voies", type=int, default=3, help="nombre de voies de la route")
+    parser.add_argument("--fps", type=float, default=30.0, help="fréquence d'affichage visée")
+    parser.add_argument(
+        "--proba-action", type=float, default=0.005,
+        help="probabilité d'un changement de voie aléatoire par tuile et par pas"
+    )
+    parser.add_argument(
+        "--sans-fenetre", type=int, metavar="NB_PAS", default=None,
+        help="dessine NB_PAS pas sans fenêtre et affiche le coût par image"
+    )
+    parser.add_argument("--capture", metavar="FICHIER.png", help="avec --sans-fenetre : sauve la dernière image")
+    args = parser.parse_args()
+
+    largeur_tuile, hauteur_tuile = (int(v) for v in args.taille.split("x"))
+    main(
+        args.tuiles, largeur_tuile, hauteur_tuile, args.colonnes, args.voies, args.fps,
+        args.proba_action, args.sans_fenetre, args.capture
+    )
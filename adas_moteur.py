@@ -0,0 +1,515 @@
+"""
+Moteur de simulation ADAS (2 voitures) sans fenêtre.
+
+Toute la physique de adas_simulation_2cars.main() (ACC, dérive latérale
+"out"/"back", changement de voie, blocage latéral) est regroupée ici :
+- un objet d'état explicite (EtatSimulation),
+- une fonction step(etat, action) qui avance d'un pas,
+- les actions clavier / gestes sont de simples données (chaînes).
+
+Les vitesses sont exprimées par seconde et chaque pas avance la
+physique de etat.dt secondes (PAS_TEMPS par défaut, voir adas_horloge).
+
+C'est le coeur commun des deux démos (zone ADAS, modes, logique
+latérale) : aucun import de cv2 ni de MediaPipe, aucun effet de bord à
+l'import, le module tourne sur une machine sans écran.
+"""
+
+from adas_horloge import PAS_TEMPS
+
+# ==============================
+# Actions
+# ==============================
+
+MODES_ADAS = ("MANUEL", "ACC", "LKA", "EMERGENCY")
+
+ACTION_GAUCHE = "GAUCHE"
+ACTION_DROITE = "DROITE"
+ACTION_ACCELERER = "ACCELERER"
+ACTION_RALENTIR = "RALENTIR"
+
+# Couleur (BGR) de la voiture ego selon le mode, commune à tous les dessins
+COULEURS_MODES = {
+    "MANUEL": (180, 180, 180),     # gris
+    "ACC": (0, 255, 0),            # vert
+    "LKA": (0, 255, 255),          # jaune
+    "EMERGENCY": (0, 0, 255),      # rouge
+}
+COULEUR_MODE_INCONNU = (255, 255, 255)
+
+# Un mode ADAS ("MANUEL", "ACC", ...) est aussi une action valide.
+ACTIONS = MODES_ADAS + (ACTION_GAUCHE, ACTION_DROITE, ACTION_ACCELERER, ACTION_RALENTIR)
+
+# Réglage de v_ego_base par z/s, en hauteur de zone par seconde
+# (vitesses négatives = vers le haut)
+PAS_V_EGO = 0.05
+V_EGO_MAX = -0.5      # le plus rapide
+V_EGO_MIN = -0.025    # le plus lent
+
+
+# Zone ADAS en proportions de la fenêtre : (x1, x2, y1, y2)
+ZONE_SIMULATION = (0.25, 0.75, 0.05, 0.95)   # simulation 2 voitures (plein écran)
+ZONE_WEBCAM = (0.55, 0.95, 0.1, 0.9)         # démo webcam (à droite de l'image)
+
+# Scène de la démo webcam : cible immobile au centre, ego qui remonte
+PARAMETRES_WEBCAM = {
+    "position_relative_ego": 0.8,
+    "position_relative_cible": 0.4,
+    "v_ego_base": -0.15,              # hauteur de zone par seconde, vers le haut
+    "v_cible": 0.0,
+    "marge_distance_relative": 0.15,
+    # seuil pour considérer que la voiture cible est "à côté" (longitudinalement)
+    "seuil_blocage_lateral": 0.20,
+    "vitesse_laterale": 500.0,        # px/s, vitesse latérale pour animations
+}
+
+
+# ==============================
+# Fonctions utilitaires
+# ==============================
+
+def calculer_mode_adas(touche):
+    """
+    Map clavier -> mode ADAS.
+    0 -> MANUEL
+    1 -> ACC
+    2 -> LKA
+    3 -> EMERGENCY
+    """
+    if touche == ord('1'):
+        return "ACC"
+    elif touche == ord('2'):
+        return "LKA"
+    elif touche == ord('3'):
+        return "EMERGENCY"
+    elif touche == ord('0'):
+        return "MANUEL"
+    return None
+
+
+class GeometrieRoute:
+    """
+    Géométrie de la zone ADAS pour une route à nb_voies voies (3 par défaut,
+    davantage pour une autoroute large).
+
+    Tout ce dont la logique latérale a besoin est précalculé en tables
+    indexées par voie :
+      centres_voies[voie]          : x du centre de la voie
+      bords_gauche[voie]           : ligne (ou bord de route) à gauche de la voie
+      bords_droite[voie]           : ligne (ou bord de route) à droite
+      bords[direction][voie]       : idem, direction -1 (gauche) / +1 (droite)
+    lignes : x des lignes blanches entre voies (nb_voies - 1 valeurs).
+    voie_defaut : voie de départ par défaut de l'ego et de la cible (la
+    voie du milieu à 3 voies, la seule voie à 1 voie).
+    """
+
+    def __init__(self, x1, x2, y1, y2, nb_voies=3):
+        if nb_voies < 1:
+            raise ValueError("nb_voies doit être au moins 1")
+        self.x1 = x1
+        self.x2 = x2
+        self.y1 = y1
+        self.y2 = y2
+        self.largeur_zone = x2 - x1
+        self.hauteur_zone = y2 - y1
+        self.nb_voies = nb_voies
+        self.largeur_voie = self.largeur_zone / float(nb_voies)
+
+        # Véhicule : 3/8 de voie de large (largeur_zone / 8 à 3 voies)
+        self.largeur_vehicule = self.largeur_zone * 3.0 / (8.0 * nb_voies)
+
+        self.centres_voies = [
+            int(x1 + self.largeur_voie * (voie + 0.5)) for voie in range(nb_voies)
+        ]
+        self.lignes = [int(x1 + self.largeur_voie * voie) for voie in range(1, nb_voies)]
+        self.voie_defaut = min(1, nb_voies - 1)
+
+        self.bords_gauche = tuple(float(x) for x in [x1] + self.lignes)
+        self.bords_droite = tuple(float(x) for x in self.lignes + [x2])
+        self.bords = {-1: self.bords_gauche, 1: self.bords_droite}
+
+        # Identifie la géométrie (cache du fond pré-rendu)
+        self.cle = (x1, x2, y1, y2, nb_voies)
+
+
+def calculer_zone_adas(largeur, hauteur, proportions=ZONE_SIMULATION, nb_voies=3):
+    """
+    Calcule la géométrie de la zone ADAS (GeometrieRoute).
+    proportions : (x1, x2, y1, y2) relatifs à la fenêtre (ZONE_SIMULATION,
+    ZONE_WEBCAM...).
+    """
+    px1, px2, py1, py2 = proportions
+    return GeometrieRoute(
+        int(largeur * px1), int(largeur * px2), int(hauteur * py1), int(hauteur * py2), nb_voies
+    )
+
+
+def action_depuis_touche(touche):
+    """
+    Convertit un code touche (cv2.waitKey & 0xFF) en action.
+    Retourne None si la touche n'a pas d'effet sur la simulation.
+    """
+    mode = calculer_mode_adas(touche)
+    if mode is not None:
+        return mode
+    if touche == ord('q') or touche == 81:   # flèche gauche
+        return ACTION_GAUCHE
+    if touche == ord('d') or touche == 83:   # flèche droite
+        return ACTION_DROITE
+    if touche == ord('z'):
+        return ACTION_ACCELERER
+    if touche == ord('s'):
+        return ACTION_RALENTIR
+    return None
+
+
+def action_depuis_chiffre(chiffre_detecte):
+    """
+    Convertit le nombre de doigts détectés en action (mode ADAS).
+    0 ou None -> MANUEL, 1 -> ACC, 2 -> LKA, 3 -> EMERGENCY
+    >=4 -> None (le mode courant est conservé, comme dans la démo webcam)
+    """
+    if chiffre_detecte is None or chiffre_detecte == 0:
+        return "MANUEL"
+    if chiffre_detecte == 1:
+        return "ACC"
+    if chiffre_detecte == 2:
+        return "LKA"
+    if chiffre_detecte == 3:
+        return "EMERGENCY"
+    return None
+
+
+# ==============================
+# Etat de la simulation
+# ==============================
+
+class EtatSimulation:
+    """
+    Etat complet de la simulation 2 voitures.
+    Reprend une à une les variables locales de l'ancienne boucle main().
+    """
+
+    def __init__(
+        self,
+        zone_params,
+        mode_adas="MANUEL",
+        position_relative_ego=0.8,
+        position_relative_cible=0.3,
+        v_ego_base=-0.2,
+        v_cible=-0.15,
+        marge_distance_relative=0.15,
+        seuil_blocage_lateral=0.20,
+        indice_voie_ego=None,
+        indice_voie_cible=None,
+        vitesse_laterale=500.0,
+        trafic=None,
+        dt=PAS_TEMPS
+    ):
+        self.zone_params = zone_params
+        centres_voies = zone_params.centres_voies
+
+        self.mode_adas = mode_adas
+
+        # 0 = haut, 1 = bas
+        self.position_relative_ego = position_relative_ego
+        self.position_relative_cible = position_relative_cible
+
+        # vitesses par seconde (négatives = vers le haut)
+        self.v_ego_base = v_ego_base   # réglable par z/s
+        self.v_cible = v_cible         # fixe
+        self.v_ego = v_ego_base        # vitesse effectivement appliquée
+
+        self.marge_distance_relative = marge_distance_relative
+        self.seuil_blocage_lateral = seuil_blocage_lateral
+
+        # Voies par défaut : zone_params.voie_defaut
+        if indice_voie_ego is None:
+            indice_voie_ego = zone_params.voie_defaut
+        if indice_voie_cible is None:
+            indice_voie_cible = zone_params.voie_defaut
+        for nom, voie in (("indice_voie_ego", indice_voie_ego), ("indice_voie_cible", indice_voie_cible)):
+            if not 0 <= voie < zone_params.nb_voies:
+                raise ValueError(f"{nom}={voie} hors de la route ({zone_params.nb_voies} voies)")
+
+        self.indice_voie_cible = indice_voie_cible
+        self.indice_voie_ego = indice_voie_ego
+        self.indice_voie_ego_cible = indice_voie_ego
+
+        self.x_centre_ego = float(centres_voies[indice_voie_ego])
+
+        # Changement de voie "classique"
+        self.changement_voie_en_cours = False
+
+        # Dérive latérale (LKA ou blocage latéral)
+        self.lateral_phase = "idle"   # "idle" / "out" / "back"
+        self.lateral_direction = 0    # -1 gauche, +1 droite
+        self.lateral_boundary_x = 0.0
+
+        self.vitesse_laterale = vitesse_laterale  # px/s
+
+        # Trafic dense optionnel (adas_trafic.Trafic). S'il est fourni, ACC et
+        # blocage latéral se basent sur ses véhicules et non sur la cible unique.
+        self.trafic = trafic
+
+        self.distance_min_atteinte = False
+        self.dt = dt     # durée d'un pas (s)
+        self.tick = 0
+
+        # Changements de voie demandés (voie cible existante, hors LKA),
+        # refusés (voie bloquée -> dérive + retour) et annulés en cours
+        # (passage en LKA)
+        self.nb_changements_demandes = 0
+        self.nb_changements_bloques = 0
+        self.nb_changements_annules = 0
+
+
+def creer_etat(largeur=900, hauteur=600, zone=ZONE_SIMULATION, nb_voies=3, **parametres):
+    """
+    Crée un EtatSimulation pour une fenêtre largeur x hauteur.
+    Les paramètres nommés sont passés tels quels à EtatSimulation.
+    """
+    return EtatSimulation(calculer_zone_adas(largeur, hauteur, zone, nb_voies), **parametres)
+
+
+def changer_zone(etat, zone_params):
+    """
+    Remplace la géométrie de la route en cours de simulation (ex. nouvelle
+    résolution de la caméra), avec le même nombre de voies.
+    Les positions longitudinales sont relatives et ne changent pas ; les
+    abscisses en pixels sont ramenées dans la nouvelle zone :
+    - ego au repos : au centre de sa voie, exactement comme avant ;
+    - ego en mouvement latéral : même fraction de la largeur de zone ;
+    - dérive en cours : ligne visée recalculée dans la nouvelle zone.
+    """
+    ancienne = etat.zone_params
+    if zone_params.nb_voies != ancienne.nb_voies:
+        raise ValueError(
+            f"changer_zone : {zone_params.nb_voies} voies au lieu de {ancienne.nb_voies}"
+        )
+    etat.zone_params = zone_params
+
+    if etat.lateral_phase == "idle" and not etat.changement_voie_en_cours:
+        etat.x_centre_ego = float(zone_params.centres_voies[etat.indice_voie_ego])
+    else:
+        echelle = zone_params.largeur_zone / ancienne.largeur_zone
+        etat.x_centre_ego = zone_params.x1 + (etat.x_centre_ego - ancienne.x1) * echelle
+    if etat.lateral_phase == "out":
+        etat.lateral_boundary_x = zone_params.bords[etat.lateral_direction][etat.indice_voie_ego]
+
+
+def voie_bloquee(etat, target_lane):
+    """
+    Voie cible bloquée latéralement ? (véhicule cible "à côté")
+    """
+    if etat.trafic is not None:
+        return etat.trafic.voie_occupee(
+            target_lane, etat.position_relative_ego, etat.seuil_blocage_lateral
+        )
+    return (
+        target_lane == etat.indice_voie_cible and
+        abs(etat.position_relative_ego - etat.position_relative_cible) <= etat.seuil_blocage_lateral
+    )
+
+
+def _demarrer_derive(etat, direction):
+    """
+    Lance la phase "out" vers la ligne de la voie courante.
+    """
+    bord = etat.zone_params.bords[direction][etat.indice_voie_ego]
+    if (direction == -1 and etat.x_centre_ego > bord) or (direction == 1 and etat.x_centre_ego < bord):
+        etat.lateral_direction = direction
+        etat.lateral_boundary_x = bord
+        etat.lateral_phase = "out"
+
+
+def appliquer_action(etat, action, evenements=None):
+    """
+    Applique une action (touche ou geste déjà converti) à l'état.
+    Les messages destinés à l'utilisateur sont ajoutés à evenements.
+    """
+    if action is None:
+        return
+
+    centres_voies = etat.zone_params.centres_voies
+
+    # Changer de mode ADAS
+    if action in MODES_ADAS:
+        if action != etat.mode_adas:
+            etat.mode_adas = action
+            if evenements is not None:
+                evenements.append(f"➡ Nouveau mode ADAS : {etat.mode_adas}")
+
+            if etat.mode_adas == "LKA":
+                if etat.changement_voie_en_cours:
+                    etat.nb_changements_annules += 1
+                etat.changement_voie_en_cours = False
+                etat.indice_voie_ego_cible = etat.indice_voie_ego
+                etat.x_centre_ego = float(centres_voies[etat.indice_voie_ego])
+                etat.lateral_phase = "idle"
+        return
+
+    # Ajuster la vitesse de l'ego (z/s)
+    if action == ACTION_ACCELERER:
+        etat.v_ego_base = max(etat.v_ego_base - PAS_V_EGO, V_EGO_MAX)
+        if evenements is not None:
+            evenements.append(f"v_ego_base (accel) = {etat.v_ego_base:.4f}")
+        return
+    if action == ACTION_RALENTIR:
+        etat.v_ego_base = min(etat.v_ego_base + PAS_V_EGO, V_EGO_MIN)
+        if evenements is not None:
+            evenements.append(f"v_ego_base (ralenti) = {etat.v_ego_base:.4f}")
+        return
+
+    if action == ACTION_GAUCHE:
+        direction = -1
+    elif action == ACTION_DROITE:
+        direction = 1
+    else:
+        raise ValueError(f"Action inconnue : {action!r}")
+
+    if etat.mode_adas == "LKA":
+        # dérive vers la ligne puis retour
+        if etat.lateral_phase == "idle":
+            _demarrer_derive(etat, direction)
+        return
+
+    if etat.lateral_phase == "idle" and not etat.changement_voie_en_cours:
+        target_lane = etat.indice_voie_ego + direction
+        if 0 <= target_lane < etat.zone_params.nb_voies:
+            etat.nb_changements_demandes += 1
+            if voie_bloquee(etat, target_lane):
+                # sécurité latérale -> dérive + retour
+                etat.nb_changements_bloques += 1
+                _demarrer_derive(etat, direction)
+            else:
+                etat.indice_voie_ego_cible = target_lane
+                etat.changement_voie_en_cours = True
+                if evenements is not None:
+                    cote = "gauche" if direction == -1 else "droite"
+                    evenements.append(
+                        f"➡ Changement de voie vers la {cote} (voie {target_lane + 1})"
+                    )
+
+
+def avancer(etat):
+    """
+    Avance la physique d'un pas (longitudinal puis latéral).
+    """
+    # ------------------------------
+    # Màj longitudinales des deux voitures
+    # ------------------------------
+    # Voiture cible : avance toujours à v_cible
+    dt = etat.dt
+    etat.position_relative_cible += etat.v_cible * dt
+    if etat.position_relative_cible < 0.0:
+        # On la remet en bas
+        etat.position_relative_cible = 1.0
+
+    if etat.trafic is not None:
+        etat.trafic.avancer(dt)
+
+    # Ego : vitesse dépend du mode (ACC / EMERGENCY) à partir de v_ego_base
+    distance_min_atteinte = False
+    v_ego = etat.v_ego_base
+
+    if etat.mode_adas == "EMERGENCY":
+        v_ego = 0.0
+
+    elif etat.mode_adas == "ACC" and etat.trafic is not None:
+        # Véhicule le plus proche devant l'ego dans sa voie
+        devant = etat.trafic.vehicule_devant(etat.indice_voie_ego, etat.position_relative_ego)
+        if devant is not None:
+            _, position_devant, v_devant = devant
+            if etat.position_relative_ego - position_devant <= etat.marge_distance_relative:
+                distance_min_atteinte = True
+                v_ego = v_devant
+
+    elif etat.mode_adas == "ACC":
+        # Ego dans la même voie et derrière la cible ?
+        if (etat.indice_voie_ego == etat.indice_voie_cible and
+                etat.position_relative_ego > etat.position_relative_cible):
+            distance = etat.position_relative_ego - etat.position_relative_cible
+            if distance <= etat.marge_distance_relative:
+                # Trop proche : on se cale à la vitesse de la cible
+                distance_min_atteinte = True
+                v_ego = etat.v_cible
+
+    etat.v_ego = v_ego
+    etat.distance_min_atteinte = distance_min_atteinte
+
+    etat.position_relative_ego += v_ego * dt
+    if etat.position_relative_ego < 0.0:
+        etat.position_relative_ego = 1.0
+
+    # ------------------------------
+    # Dynamique latérale (dérive + retour / changement de voie)
+    # ------------------------------
+    vitesse_laterale = etat.vitesse_laterale * dt   # px pendant ce pas
+    centres_voies = etat.zone_params.centres_voies
+
+    # 1) Phase "out": dérive vers la ligne
+    if etat.lateral_phase == "out":
+        if etat.lateral_direction == -1:
+            etat.x_centre_ego -= vitesse_laterale
+            if etat.x_centre_ego <= etat.lateral_boundary_x:
+                etat.x_centre_ego = etat.lateral_boundary_x
+                etat.lateral_phase = "back"
+        elif etat.lateral_direction == 1:
+            etat.x_centre_ego += vitesse_laterale
+            if etat.x_centre_ego >= etat.lateral_boundary_x:
+                etat.x_centre_ego = etat.lateral_boundary_x
+                etat.lateral_phase = "back"
+
+    # 2) Phase "back": retour au centre de la même voie
+    elif etat.lateral_phase == "back":
+        x_centre_voie = float(centres_voies[etat.indice_voie_ego])
+        diff = x_centre_voie - etat.x_centre_ego
+        if abs(diff) <= vitesse_laterale:
+            etat.x_centre_ego = x_centre_voie
+            etat.lateral_phase = "idle"
+        else:
+            etat.x_centre_ego += vitesse_laterale * (1.0 if diff > 0 else -1.0)
+
+    # 3) Changement de voie "classique"
+    if etat.lateral_phase == "idle" and etat.mode_adas != "LKA":
+        if etat.changement_voie_en_cours:
+            cible_x = float(centres_voies[etat.indice_voie_ego_cible])
+            diff = cible_x - etat.x_centre_ego
+            if abs(diff) <= vitesse_laterale:
+                etat.x_centre_ego = cible_x
+                etat.indice_voie_ego = etat.indice_voie_ego_cible
+                etat.changement_voie_en_cours = False
+            else:
+                etat.x_centre_ego += vitesse_laterale * (1.0 if diff > 0 else -1.0)
+
+    etat.tick += 1
+
+
+def step(etat, action=None):
+    """
+    Un pas de simulation : applique l'action (ou None) puis avance la physique.
+    Retourne la liste des messages produits (changement de mode, de voie...).
+    """
+    evenements = []
+    appliquer_action(etat, action, evenements)
+    avancer(etat)
+    return evenements
+
+
+def simuler(etat, nb_pas, actions=None):
+    """
+    Mode sans fenêtre : enchaîne nb_pas pas de simulation au plus vite.
+    actions : dict {tick: action} (optionnel), tick absolu : l'action est
+    appliquée au pas où etat.tick vaut cette clé (comme dans les journaux
+    d'adas_replay). Reprendre un état au tick 100 applique donc
+    actions[100] au premier pas, pas actions[0].
+    Retourne l'état final.
+    """
+    if actions is None:
+        actions = {}
+    debut = etat.tick
+    for i in range(nb_pas):
+        appliquer_action(etat, actions.get(debut + i))
+        avancer(etat)
+    return etat
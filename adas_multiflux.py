@@ -0,0 +1,274 @@
+"""
+Analyse des gestes sur de nombreux flux enregistrés à la fois.
+
+Chaque flux est soit un enregistrement de landmarks (.npy, voir
+adas_landmarks), soit une vidéo / un dossier d'images (adas_sources) dont
+les mains sont détectées par MediaPipe. Les flux sont répartis sur un
+pool de processus :
+- chaque processus possède son propre détecteur mp.solutions.hands.Hands,
+  construit à la première vidéo qu'il traite (après le fork : MediaPipe
+  n'est jamais importé par le processus principal). Il est en mode image
+  (static_image_mode) : rien de la fin d'une vidéo n'est suivi dans la
+  première frame de la suivante ;
+- une vidéo est d'abord ramenée à un enregistrement de landmarks, puis
+  tous les flux suivent le même chemin vectorisé que la relecture :
+  chiffres (compter_doigts_batch) -> modes ADAS.
+
+Par flux : chronologie des modes, histogramme des chiffres détectés,
+temps passé dans chaque mode. fusionner() cumule le tout.
+
+Les flux sont indépendants : le débit croît avec le nombre de coeurs
+tant qu'il y a au moins autant de flux que de processus.
+
+    python adas_multiflux.py sessions/*.npy videos/*.mp4 --processus 8
+"""
+
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from adas_landmarks import (
+    AUCUNE_MAIN,
+    DTYPE_LANDMARKS,
+    EnregistreurLandmarks,
+    charger_landmarks,
+    chiffres_depuis_enregistrement,
+    extraire_main,
+    modes_depuis_enregistrement,
+)
+from adas_moteur import MODES_ADAS
+
+# Chiffres comptés : AUCUNE_MAIN, puis 0 à 5 doigts
+NB_CHIFFRES = 7
+
+# Détecteur de mains du processus courant (un par processus du pool)
+_detecteur = None
+
+
+def _detecteur_processus():
+    """
+    Détecteur MediaPipe du processus, construit au premier appel. Mode
+    image : sans état d'un appel à l'autre, il sert à tous les flux du
+    processus (le suivi de la main est fait par DetecteurMainsROI, propre
+    à chaque flux).
+    """
+    global _detecteur
+    if _detecteur is None:
+        from adas_webcam_demo import charger_mediapipe
+
+        _, _, _detecteur = charger_mediapipe(mode_image=True)
+    return _detecteur
+
+
+# ==============================
+# Un flux
+# ==============================
+
+def landmarks_depuis_video(description, miroir=True, nb_frames_max=None):
+    """
+    Détecte la main sur chaque frame d'une vidéo (ou d'un dossier d'images).
+    miroir : retourne l'image comme la démo webcam avant l'inférence
+    (latéralité et pouce identiques à une session en direct).
+    Retourne un tableau DTYPE_LANDMARKS, horodaté au FPS de la source.
+    """
+    import cv2
+
+    from adas_inference import DetecteurMainsROI
+    from adas_sources import ouvrir_source
+    from adas_webcam_demo import LARGEUR_INFERENCE, SUIVI_ROI
+
+    source = ouvrir_source(description, rapide=True)
+    if not source.isOpened():
+        raise IOError(f"Impossible d'ouvrir {description}")
+
+    # Le ROI suit la main d'un flux : un détecteur enveloppé par flux
+    detecteur = DetecteurMainsROI(
+        _detecteur_processus(), largeur_inference=LARGEUR_INFERENCE, suivi=SUIVI_ROI
+    )
+    enregistreur = EnregistreurLandmarks(None)
+    frame = None
+    image = None
+    try:
+        while nb_frames_max is None or enregistreur.nb < nb_frames_max:
+            ret, frame = source.read(frame)
+            if not ret:
+                break
+            if miroir:
+                if image is None or image.shape != frame.shape:
+                    image = np.empty_like(frame)
+                cv2.flip(frame, 1, dst=image)
+            else:
+                image = frame
+
+            hauteur, largeur = image.shape[:2]
+            presente, main, points = extraire_main(detecteur.process(image))
+            enregistreur.ajouter(enregistreur.nb / source.fps, presente, main, largeur, hauteur, points)
+    finally:
+        source.release()
+    return enregistreur.donnees[:enregistreur.nb]
+
+
+def analyser_landmarks(enregistrement):
+    """
+    Statistiques d'un enregistrement de landmarks :
+      nb_frames, duree (s),
+      chiffres     : histogramme (NB_CHIFFRES,) [aucune main, 0, 1, ..., 5 doigts]
+      temps_modes  : temps passé dans chaque mode de MODES_ADAS (s)
+      chronologie  : [(temps, mode)] à chaque changement de mode
+    """
+    nb_frames = len(enregistrement)
+    if not nb_frames:
+        return {
+            "nb_frames": 0,
+            "duree": 0.0,
+            "chiffres": np.zeros(NB_CHIFFRES, dtype=np.int64),
+            "temps_modes": np.zeros(len(MODES_ADAS)),
+            "chronologie": [],
+        }
+
+    horodatages = np.asarray(enregistrement["horodatage"], dtype=np.float64)
+    chiffres = chiffres_depuis_enregistrement(enregistrement)
+    modes = modes_depuis_enregistrement(enregistrement)
+
+    # Un mode dure jusqu'à la frame suivante (la dernière ne compte pas)
+    durees = np.diff(horodatages, append=horodatages[-1])
+    changements = np.flatnonzero(np.diff(modes, prepend=-1))
+
+    return {
+        "nb_frames": nb_frames,
+        "duree": float(horodatages[-1] - horodatages[0]),
+        "chiffres": np.bincount(
+            np.clip(chiffres - AUCUNE_MAIN, 0, NB_CHIFFRES - 1), minlength=NB_CHIFFRES
+        ),
+        "temps_modes": np.bincount(modes, weights=durees, minlength=len(MODES_ADAS)),
+        "chronologie": [
+            (float(horodatages[i]), MODES_ADAS[modes[i]]) for i in changements.tolist()
+        ],
+    }
+
+
+def _traiter_flux(tache):
+    """
+    Tâche d'un processus du pool : un flux complet.
+    Toute erreur (fichier illisible, MediaPipe absent, image mal décodée,
+    enregistrement mal formé...) est rendue dans le résultat du flux
+    plutôt que d'interrompre les autres flux.
+    """
+    description, miroir, nb_frames_max = tache
+    debut = time.perf_counter()
+    try:
+        if description.endswith(".npy"):
+            enregistrement = charger_landmarks(description)
+            if nb_frames_max is not None:
+                enregistrement = enregistrement[:nb_frames_max]
+        else:
+            enregistrement = landmarks_depuis_video(description, miroir, nb_frames_max)
+        resultat = analyser_landmarks(enregistrement)
+        resultat["erreur"] = None
+    except Exception as erreur:
+        resultat = analyser_landmarks(np.zeros(0, dtype=DTYPE_LANDMARKS))
+        resultat["erreur"] = f"{type(erreur).__name__}: {erreur}"
+    resultat["flux"] = description
+    resultat["processus"] = os.getpid()
+    resultat["duree_traitement"] = time.perf_counter() - debut
+    return resultat
+
+
+# ==============================
+# Tous les flux
+# ==============================
+
+def analyser_flux(descriptions, nb_processus=None, miroir=True, nb_frames_max=None):
+    """
+    Analyse chaque flux (chemin .npy, vidéo ou dossier d'images) sur un
+    pool de nb_processus processus (défaut : tous les coeurs).
+    Retourne la liste des résultats par flux, dans l'ordre de descriptions.
+    """
+    taches = [(description, miroir, nb_frames_max) for description in descriptions]
+    if nb_processus is None:
+        nb_processus = os.cpu_count() or 1
+    if nb_processus > 1 and len(taches) > 1:
+        with multiprocessing.Pool(min(nb_processus, len(taches))) as pool:
+            # chunksize=1 : les flux longs ne s'accumulent pas sur un même processus
+            return pool.map(_traiter_flux, taches, chunksize=1)
+    return [_traiter_flux(tache) for tache in taches]
+
+
+def fusionner(resultats):
+    """
+    Cumule les résultats par flux (flux en erreur exclus).
+    """
+    valides = [r for r in resultats if r["erreur"] is None]
+    return {
+        "nb_flux": len(valides),
+        "nb_erreurs": len(resultats) - len(valides),
+        "nb_frames": sum(r["nb_frames"] for r in valides),
+        "duree": sum(r["duree"] for r in valides),
+        "chiffres": sum((r["chiffres"] for r in valides), np.zeros(NB_CHIFFRES, dtype=np.int64)),
+        "temps_modes": sum((r["temps_modes"] for r in valides), np.zeros(len(MODES_ADAS))),
+        "nb_changements_mode": sum(max(len(r["chronologie"]) - 1, 0) for r in valides),
+        "duree_traitement": sum(r["duree_traitement"] for r in resultats),
+    }
+
+
+def en_json(resultat):
+    """
+    Résultat (par flux ou fusionné) sérialisable par json.dump.
+    """
+    return {
+        cle: valeur.tolist() if isinstance(valeur, np.ndarray) else valeur
+        for cle, valeur in resultat.items()
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Analyse des gestes sur plusieurs flux (multiprocessus)")
+    parser.add_argument(
+        "flux", nargs="+",
+        help="enregistrements .npy (adas_webcam_demo.py --enregistrer), vidéos ou dossiers d'images"
+    )
+    parser.add_argument("--processus", type=int, default=None, help="nombre de processus (défaut : tous les coeurs)")
+    parser.add_argument("--sans-miroir", action="store_true", help="vidéos déjà retournées comme la démo")
+    parser.add_argument("--frames-max", type=int, default=None, help="frames analysées au plus par flux")
+    parser.add_argument("--sortie", metavar="FICHIER.json", help="écrit les résultats par flux et le cumul")
+    args = parser.parse_args()
+
+    debut = time.perf_counter()
+    resultats = analyser_flux(args.flux, args.processus, not args.sans_miroir, args.frames_max)
+    duree = time.perf_counter() - debut
+    total = fusionner(resultats)
+
+    for resultat in resultats:
+        if resultat["erreur"] is not None:
+            print(f"  {resultat['flux']} : ignoré ({resultat['erreur']})")
+            continue
+        modes = ", ".join(
+            f"{mode} {temps:.1f} s" for mode, temps in zip(MODES_ADAS, resultat["temps_modes"])
+        )
+        print(
+            f"  {resultat['flux']} : {resultat['nb_frames']} frames, "
+            f"{len(resultat['chronologie'])} modes successifs ({modes})"
+        )
+
+    print(
+        f"{total['nb_flux']} flux, {total['nb_frames']} frames en {duree:.2f} s "
+        f"({total['nb_frames'] / max(duree, 1e-9):.0f} frames/s)"
+    )
+    print("  chiffres : " + "  ".join(
+        f"{'aucune main' if i == 0 else i - 1}: {nb}" for i, nb in enumerate(total["chiffres"])
+    ))
+    print("  temps par mode : " + "  ".join(
+        f"{mode} {temps:.1f} s" for mode, temps in zip(MODES_ADAS, total["temps_modes"])
+    ))
+
+    if args.sortie:
+        with open(args.sortie, "w", encoding="utf-8") as fichier:
+            json.dump(
+                {"flux": [en_json(r) for r in resultats], "total": en_json(total)},
+                fichier, indent=2
+            )
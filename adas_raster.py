@@ -0,0 +1,135 @@
+"""
+Remplissage de boîtes par tranches NumPy : dessin des véhicules par lots.
+
+Les véhicules d'une scène ont tous la même taille ; seuls leurs coins
+changent. Au lieu d'un cv2.rectangle par véhicule (plus un pour le
+contour de l'ego), les boîtes arrivent en tableaux (coins, couleurs) et
+sont peintes en quelques opérations vectorisées :
+
+- remplir_colonnes : boîtes alignées en colonnes (véhicules d'une même
+  voie). Pour chaque colonne, les lignes couvertes sont obtenues par
+  différences cumulées, puis peintes en une affectation
+  image[lignes, xa:xb] = couleur. Des véhicules qui se chevauchent ne
+  sont peints qu'une fois : c'est le cas du trafic dense.
+- remplir_boites : boîtes dispersées et petites (mosaïque) : une seule
+  affectation par indices pour toutes les boîtes, quelle que soit leur
+  position.
+- contourer_boites : contour de 2 pixels, pixel pour pixel celui de
+  cv2.rectangle(..., 2).
+
+Comme avec cv2.rectangle, (xa, ya) est le coin haut-gauche et la boîte
+couvre largeur x hauteur pixels. limites = (x_min, y_min, x_max, y_max),
+bornes max exclues, rogne les boîtes (par défaut : l'image).
+"""
+
+import numpy as np
+
+
+def _limites(image, limites):
+    if limites is None:
+        return 0, 0, image.shape[1], image.shape[0]
+    return limites
+
+
+def remplir_colonnes(image, xa, ya, largeur, hauteur, couleur, limites=None):
+    """
+    Remplit N boîtes de même taille et de même couleur (3,), groupées par
+    abscisse xa. Une couleur par appel : l'ordre de peinture entre
+    couleurs reste celui des appels, comme avec cv2.
+    limites : bornes scalaires, communes à toutes les boîtes.
+    """
+    x_min, y_min, x_max, y_max = _limites(image, limites)
+    xa = np.asarray(xa, dtype=np.intp).ravel()
+    ya = np.asarray(ya, dtype=np.intp).ravel()
+    if largeur <= 0 or hauteur <= 0 or not xa.size:
+        return
+    # Une ligne de pixels déjà à la couleur : recopier des lignes entières
+    # est bien plus rapide que diffuser une couleur (3,) pixel par pixel
+    ligne = np.empty((largeur,) + image.shape[2:], dtype=image.dtype)
+    ligne[:] = couleur
+
+    if xa.size == 1:
+        # Une seule boîte (ego, cible) : bornes en entiers Python
+        x0, x1 = max(int(xa[0]), x_min), min(int(xa[0]) + largeur, x_max)
+        y0, y1 = max(int(ya[0]), y_min), min(int(ya[0]) + hauteur, y_max)
+        if x0 < x1 and y0 < y1:
+            image[y0:y1, x0:x1] = ligne[:x1 - x0]
+        return
+
+    x0 = np.maximum(xa, x_min)
+    x1 = np.minimum(xa + largeur, x_max)
+    y0 = np.clip(ya, y_min, y_max)
+    y1 = np.clip(ya + hauteur, y_min, y_max)
+
+    visibles = (x0 < x1) & (y0 < y1)
+    colonnes, groupes = np.unique(xa[visibles], return_inverse=True)
+    x0, x1, y0, y1 = x0[visibles], x1[visibles], y0[visibles], y1[visibles]
+
+    hauteur_zone = y_max - y_min
+    bande = image[y_min:y_max]
+    nb_par_colonne = np.bincount(groupes, minlength=len(colonnes))
+    for groupe in range(len(colonnes)):
+        dans_groupe = np.flatnonzero(groupes == groupe)
+        i = dans_groupe[0]
+        if nb_par_colonne[groupe] == 1:
+            image[y0[i]:y1[i], x0[i]:x1[i]] = ligne[:x1[i] - x0[i]]
+            continue
+        # +1 au début de chaque boîte, -1 après sa fin : somme cumulée > 0
+        # sur les lignes couvertes par au moins une boîte
+        couverture = np.cumsum(
+            np.bincount(y0[dans_groupe] - y_min, minlength=hauteur_zone + 1)
+            - np.bincount(y1[dans_groupe] - y_min, minlength=hauteur_zone + 1)
+        )
+        bande[couverture[:hauteur_zone] > 0, x0[i]:x1[i]] = ligne[:x1[i] - x0[i]]
+
+
+def remplir_boites(image, xa, ya, largeur, hauteur, couleurs, limites=None):
+    """
+    Remplit N boîtes de même taille en une seule affectation par indices.
+    couleurs : une couleur (3,) ou une par boîte (N, 3)
+    limites  : bornes scalaires ou (N,) (une zone par boîte, ex. tuiles).
+
+    Une boîte à cheval sur ses limites est rognée : ses indices hors zone
+    sont ramenés sur le bord, qu'elle recouvre de toute façon. Les boîtes
+    entièrement hors zone sont écartées.
+    Coût proportionnel au nombre de pixels : réservé aux petites boîtes.
+    """
+    if largeur <= 0 or hauteur <= 0:
+        return
+    xa = np.asarray(xa, dtype=np.intp)
+    ya = np.asarray(ya, dtype=np.intp)
+    couleurs = np.asarray(couleurs, dtype=image.dtype)
+    x_min, y_min, x_max, y_max = (
+        np.broadcast_to(np.asarray(borne, dtype=np.intp), xa.shape)
+        for borne in _limites(image, limites)
+    )
+
+    visibles = (xa < x_max) & (xa + largeur > x_min) & (ya < y_max) & (ya + hauteur > y_min)
+    if not visibles.all():
+        xa, ya = xa[visibles], ya[visibles]
+        x_min, y_min, x_max, y_max = x_min[visibles], y_min[visibles], x_max[visibles], y_max[visibles]
+        if couleurs.ndim == 2:
+            couleurs = couleurs[visibles]
+    if not xa.size:
+        return
+
+    colonnes = np.clip(xa[:, None] + np.arange(largeur), x_min[:, None], x_max[:, None] - 1)
+    lignes = np.clip(ya[:, None] + np.arange(hauteur), y_min[:, None], y_max[:, None] - 1)
+    if couleurs.ndim == 2:
+        couleurs = couleurs[:, None, None, :]
+    image[lignes[:, :, None], colonnes[:, None, :]] = couleurs
+
+
+def contourer_boites(image, xa, ya, largeur, hauteur, couleur, limites=None, remplir=remplir_colonnes):
+    """
+    Contour de 2 pixels de N boîtes, identique à cv2.rectangle(..., 2) :
+    un anneau de 3 pixels centré sur le bord de la boîte, sans les quatre
+    coins extérieurs. Comme avec cv2 : remplir d'abord, contourer ensuite.
+    """
+    xa = np.asarray(xa, dtype=np.intp)
+    ya = np.asarray(ya, dtype=np.intp)
+    # Bandes haute et basse (largeur de la boîte), gauche et droite (hauteur de la boîte)
+    remplir(image, xa, ya - 1, largeur, 3, couleur, limites)
+    remplir(image, xa, ya + hauteur - 2, largeur, 3, couleur, limites)
+    remplir(image, xa - 1, ya, 3, hauteur, couleur, limites)
+    remplir(image, xa + largeur - 2, ya, 3, hauteur, couleur, limites)
@@ -0,0 +1,255 @@
+"""
+Journal des entrées et relecture déterministe de la simulation.
+
+Toute action appliquée au moteur (touche ou geste converti) est notée
+avec le tick auquel elle s'applique, de même qu'un changement de taille
+de la zone (résolution de la caméra en cours de session). Avec les paramètres de départ
+(taille de la zone, trafic, graine, dt), cela suffit à reproduire la
+simulation à l'identique : rejouer() relance le moteur au plus vite,
+sans fenêtre, et calcule une empreinte de l'état à chaque tick.
+
+Comparer les empreintes de deux versions du code (ACC, logique latérale)
+donne le premier tick où leurs comportements divergent.
+"""
+
+import hashlib
+import json
+import struct
+
+import numpy as np
+
+from adas_batch import CODES_ACTIONS
+from adas_horloge import PAS_TEMPS
+from adas_moteur import (
+    MODES_ADAS,
+    ZONE_SIMULATION,
+    appliquer_action,
+    avancer,
+    calculer_zone_adas,
+    changer_zone,
+    creer_etat,
+)
+from adas_trafic import Trafic
+
+ACTIONS_PAR_CODE = {code: action for action, code in CODES_ACTIONS.items()}
+
+PHASES_LATERALES = ("idle", "out", "back")
+
+# Champs scalaires de l'état pris dans l'empreinte
+_FORMAT_ETAT = struct.Struct("<6d6b?")
+
+
+class JournalEntrees:
+    """
+    Actions horodatées en ticks de simulation + paramètres de départ
+    (parametres : arguments nommés de EtatSimulation, ex. v_cible).
+    zones : changements de taille de la zone [(tick, largeur, hauteur)].
+    """
+
+    def __init__(self, largeur=900, hauteur=600, nb_vehicules=0,
+                 proba_changement_voie=0.0, graine=0, dt=PAS_TEMPS,
+                 zone=ZONE_SIMULATION, parametres=None, nb_voies=3):
+        self.largeur = largeur
+        self.hauteur = hauteur
+        self.zone = tuple(zone)
+        self.nb_voies = nb_voies
+        self.parametres = dict(parametres or {})
+        self.nb_vehicules = nb_vehicules
+        self.proba_changement_voie = proba_changement_voie
+        self.graine = graine
+        self.dt = dt
+        self.ticks = []
+        self.actions = []
+        self.zones = []
+        self.nb_pas = 0
+
+    def ajouter(self, tick, action):
+        self.ticks.append(tick)
+        self.actions.append(action)
+
+    def changer_taille(self, tick, largeur, hauteur):
+        """
+        Note un changement de taille de la fenêtre (avant le pas `tick`).
+        """
+        self.zones.append((tick, largeur, hauteur))
+
+    def zone_params(self, largeur, hauteur):
+        """
+        Géométrie de la route pour une fenêtre largeur x hauteur.
+        """
+        return calculer_zone_adas(largeur, hauteur, self.zone, self.nb_voies)
+
+    def creer_etat(self):
+        """
+        Etat de départ identique à celui de la session enregistrée.
+        """
+        trafic = None
+        if self.nb_vehicules:
+            trafic = Trafic(
+                self.nb_vehicules,
+                nb_voies=self.nb_voies,
+                proba_changement_voie=self.proba_changement_voie,
+                graine=self.graine
+            )
+        return creer_etat(
+            self.largeur, self.hauteur, self.zone, self.nb_voies,
+            trafic=trafic, dt=self.dt, **self.parametres
+        )
+
+    def sauver(self, chemin, nb_pas=None):
+        if nb_pas is not None:
+            self.nb_pas = nb_pas
+        np.savez(
+            chemin,
+            ticks=np.array(self.ticks, dtype=np.int64),
+            actions=np.array([CODES_ACTIONS[a] for a in self.actions], dtype=np.int8),
+            largeur=self.largeur,
+            hauteur=self.hauteur,
+            nb_vehicules=self.nb_vehicules,
+            proba_changement_voie=self.proba_changement_voie,
+            graine=self.graine,
+            dt=self.dt,
+            zone=np.array(self.zone),
+            nb_voies=self.nb_voies,
+            zones=np.array(self.zones, dtype=np.int64).reshape(-1, 3),
+            parametres=json.dumps(self.parametres),
+            nb_pas=self.nb_pas
+        )
+
+
+def charger_journal(chemin):
+    """
+    Relit un journal sauvé par JournalEntrees.sauver(). Les champs absents
+    des journaux plus anciens prennent les valeurs qu'ils sous-entendaient :
+    zone ZONE_SIMULATION et paramètres par défaut de creer_etat() (avant la
+    démo webcam), route à 3 voies (avant GeometrieRoute).
+    """
+    with np.load(chemin) as donnees:
+        zone = donnees["zone"].tolist() if "zone" in donnees else ZONE_SIMULATION
+        parametres = json.loads(str(donnees["parametres"])) if "parametres" in donnees else {}
+        nb_voies = int(donnees["nb_voies"]) if "nb_voies" in donnees else 3
+        journal = JournalEntrees(
+            int(donnees["largeur"]),
+            int(donnees["hauteur"]),
+            int(donnees["nb_vehicules"]),
+            float(donnees["proba_changement_voie"]),
+            int(donnees["graine"]),
+            float(donnees["dt"]),
+            zone,
+            parametres,
+            nb_voies
+        )
+        journal.ticks = donnees["ticks"].tolist()
+        journal.actions = [ACTIONS_PAR_CODE[c] for c in donnees["actions"].tolist()]
+        if "zones" in donnees:
+            journal.zones = [tuple(zone) for zone in donnees["zones"].tolist()]
+        journal.nb_pas = int(donnees["nb_pas"])
+    return journal
+
+
+# ==============================
+# Empreinte de l'état
+# ==============================
+
+def empreinte_etat(etat):
+    """
+    Empreinte 64 bits de l'état : positions, voies, phase latérale et bord
+    visé, mode, vitesses. Avec du trafic : taille de chaque voie, identifiants
+    et positions par rang, voie et vitesse de chaque véhicule (un véhicule
+    passé de la fin d'une voie au début de la suivante change l'empreinte).
+    """
+    h = hashlib.blake2b(digest_size=8)
+    h.update(_FORMAT_ETAT.pack(
+        etat.position_relative_ego,
+        etat.position_relative_cible,
+        etat.x_centre_ego,
+        etat.v_ego_base,
+        etat.v_ego,
+        etat.lateral_boundary_x,
+        MODES_ADAS.index(etat.mode_adas),
+        PHASES_LATERALES.index(etat.lateral_phase),
+        etat.lateral_direction,
+        etat.indice_voie_ego,
+        etat.indice_voie_ego_cible,
+        etat.indice_voie_cible,
+        etat.changement_voie_en_cours
+    ))
+    trafic = etat.trafic
+    if trafic is not None:
+        h.update(np.array([len(ids) for ids in trafic.ids], dtype=np.int64).tobytes())
+        for ids, positions in zip(trafic.ids, trafic.positions):
+            h.update(ids.astype(np.int64).tobytes())
+            h.update(positions.tobytes())
+        h.update(trafic.voies.tobytes())
+        h.update(trafic.vitesses.tobytes())
+    return int.from_bytes(h.digest(), "little")
+
+
+def rejouer(journal, etat=None):
+    """
+    Rejoue le journal au plus vite.
+    Retourne (etat final, empreintes) ; empreintes[i] est l'empreinte
+    après le tick i (tableau uint64 de journal.nb_pas valeurs).
+    """
+    if etat is None:
+        etat = journal.creer_etat()
+
+    actions = {}
+    for tick, action in zip(journal.ticks, journal.actions):
+        actions.setdefault(tick, []).append(action)
+    zones = {}
+    for tick, largeur, hauteur in journal.zones:
+        zones.setdefault(tick, []).append((largeur, hauteur))
+
+    empreintes = np.empty(journal.nb_pas, dtype=np.uint64)
+    for i in range(journal.nb_pas):
+        for largeur, hauteur in zones.get(etat.tick, ()):
+            changer_zone(etat, journal.zone_params(largeur, hauteur))
+        for action in actions.get(etat.tick, ()):
+            appliquer_action(etat, action)
+        avancer(etat)
+        empreintes[i] = empreinte_etat(etat)
+    return etat, empreintes
+
+
+def premiere_divergence(empreintes_a, empreintes_b):
+    """
+    Premier tick où les deux séries d'empreintes diffèrent (None si aucune).
+    """
+    n = min(len(empreintes_a), len(empreintes_b))
+    differences = np.flatnonzero(empreintes_a[:n] != empreintes_b[:n])
+    if differences.size:
+        return int(differences[0])
+    if len(empreintes_a) != len(empreintes_b):
+        return n
+    return None
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Relecture d'un journal d'entrées")
+    parser.add_argument("journal", help="journal .npz (adas_simulation_2cars.py --journal)")
+    parser.add_argument("--empreintes", metavar="FICHIER.npy", help="sauve les empreintes par tick")
+    parser.add_argument("--reference", metavar="FICHIER.npy", help="compare à des empreintes de référence")
+    args = parser.parse_args()
+
+    journal = charger_journal(args.journal)
+    debut = time.perf_counter()
+    etat, empreintes = rejouer(journal)
+    duree = time.perf_counter() - debut
+    print(
+        f"{journal.nb_pas} ticks ({journal.nb_pas * journal.dt:.0f} s simulées), "
+        f"{len(journal.ticks)} entrées rejouées en {duree:.2f} s"
+    )
+
+    if args.empreintes:
+        np.save(args.empreintes, empreintes)
+    if args.reference:
+        tick = premiere_divergence(np.load(args.reference), empreintes)
+        if tick is None:
+            print("Identique à la référence")
+        else:
+            print(f"Divergence au tick {tick}")
+            raise SystemExit(1)
@@ -1,56 +1,204 @@
+import collections
+
 import cv2
 import numpy as np
 
+from adas_horloge import HorlogeSimulation
+from adas_metriques import MetriquesSecurite, afficher_resume
+from adas_moteur import (
+    COULEUR_MODE_INCONNU,
+    COULEURS_MODES,
+    action_depuis_touche,
+    avancer,
+    creer_etat,
+    step,
+)
+from adas_raster import contourer_boites, remplir_colonnes
+from adas_replay import JournalEntrees
+from adas_trafic import Trafic
+from adas_trajectoire import JournalTrajectoire
+
 # ==============================
 # Fonctions utilitaires
 # ==============================
 
-def calculer_mode_adas(touche):
+def dessiner_fond(image, zone_params):
+    """
+    Dessine la partie statique de la scène sous les véhicules (ne change
+    jamais d'une frame à l'autre pour une même zone) :
+    - fond, route (zone_params.nb_voies voies), lignes de séparation
+    """
+
+    x1, x2, y1, y2 = zone_params.x1, zone_params.x2, zone_params.y1, zone_params.y2
+
+    # Fond
+    image[:] = (30, 30, 30)
+
+    # Route
+    cv2.rectangle(image, (x1, y1), (x2, y2), (50, 50, 50), -1)
+
+    # Lignes de séparation des voies
+    for x_ligne in zone_params.lignes:
+        cv2.line(image, (x_ligne, y1), (x_ligne, y2), (255, 255, 255), 2)
+
+
+# Légende des touches, dessinée par-dessus tout le reste
+LIGNES_LEGENDE = [
+    "Touches :",
+    "0 -> MANUEL, 1 -> ACC, 2 -> LKA, 3 -> EMERGENCY",
+    "Q / Fleche gauche  -> tourner a gauche",
+    "D / Fleche droite -> tourner a droite",
+    "Z -> accelerer ego, S -> ralentir ego",
+    "Deux voitures avancent (ego + cible)",
+    "Blocage lateral si vehicule a cote",
+    "ECHAP -> quitter",
+]
+
+
+def dessiner_legende(image):
+    """
+    Dessine la légende des touches en bas à gauche (dernière couche).
+    """
+    hauteur = image.shape[0]
+    x0, y0 = 20, hauteur - 180
+    for i, texte in enumerate(LIGNES_LEGENDE):
+        cv2.putText(
+            image,
+            texte,
+            (x0, y0 + i * 22),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.6,
+            (200, 200, 200),
+            1,
+            cv2.LINE_AA
+        )
+
+
+def rectangle_legende(image):
     """
-    Map clavier -> mode ADAS.
-    0 -> MANUEL
-    1 -> ACC
-    2 -> LKA
-    3 -> EMERGENCY
+    Rectangle (xa, ya, xb, yb), bornes exclues, couvert par dessiner_legende.
     """
-    if touche == ord('1'):
-        return "ACC"
-    elif touche == ord('2'):
-        return "LKA"
-    elif touche == ord('3'):
-        return "EMERGENCY"
-    elif touche == ord('0'):
-        return "MANUEL"
-    return None
-
-
-def calculer_zone_adas(largeur, hauteur):
+    hauteur, largeur = image.shape[:2]
+    x0, y0 = 20, hauteur - 180
+    xb = yb = 0
+    ya = hauteur
+    for i, texte in enumerate(LIGNES_LEGENDE):
+        (w, h), ligne_base = cv2.getTextSize(texte, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)
+        y = y0 + i * 22
+        ya = min(ya, y - h - 3)
+        yb = max(yb, y + ligne_base + 3)
+        xb = max(xb, x0 + w + 3)
+    return max(0, x0 - 3), max(0, ya), min(largeur, xb), min(hauteur, yb)
+
+
+class CacheScene:
     """
-    Calcule les paramètres géométriques de la zone ADAS.
-    Retourne :
-      x1, x2, y1, y2, largeur_zone, hauteur_zone,
-      centres_voies (3 valeurs),
-      x_sep1, x_sep2 (lignes blanches entre voies)
+    Fond statique pré-rendu et rectangles salis par la frame précédente.
+
+    Le fond (route, lignes) est dessiné une seule fois par zone_params ;
+    à chaque frame on ne recopie depuis ce fond que les rectangles occupés
+    auparavant par les véhicules, les textes du HUD et la légende. La
+    légende reste la dernière couche (voir terminer). Il faut donc
+    repasser la même image à chaque appel.
     """
-    x1 = int(largeur * 0.25)
-    x2 = int(largeur * 0.75)
-    y1 = int(hauteur * 0.05)
-    y2 = int(hauteur * 0.95)
 
-    largeur_zone = x2 - x1
-    hauteur_zone = y2 - y1
-    largeur_voie = largeur_zone / 3.0
+    def __init__(self):
+        self.cle = None
+        self.fond = None
+        self.legende = None
+        self.rectangle_legende = None
+        self.rectangles = []
+
+    def preparer(self, image, zone_params):
+        """
+        Remet l'image dans l'état "fond seul" pour la nouvelle frame.
+        """
+        cle = (image.shape, zone_params.cle)
+        if cle != self.cle:
+            self.fond = np.empty_like(image)
+            dessiner_fond(self.fond, zone_params)
+            # Zone de la légende telle qu'elle est sur le fond nu
+            xa, ya, xb, yb = self.rectangle_legende = rectangle_legende(image)
+            avec_legende = self.fond.copy()
+            dessiner_legende(avec_legende)
+            self.legende = avec_legende[ya:yb, xa:xb].copy()
+            image[:] = self.fond
+            self.cle = cle
+        else:
+            fond = self.fond
+            for xa, ya, xb, yb in self.rectangles:
+                image[ya:yb, xa:xb] = fond[ya:yb, xa:xb]
+        self.rectangles = []
+
+    def marquer(self, xa, ya, xb, yb):
+        """
+        Note un rectangle dessiné cette frame (bornes incluses), borné à l'image.
+        """
+        hauteur, largeur = self.fond.shape[:2]
+        xa = max(0, xa)
+        ya = max(0, ya)
+        xb = min(largeur, xb + 1)
+        yb = min(hauteur, yb + 1)
+        if xa < xb and ya < yb:
+            self.rectangles.append((xa, ya, xb, yb))
+
+    def terminer(self, image):
+        """
+        Pose la légende par-dessus les éléments mobiles de la frame.
+
+        Si rien n'a été dessiné sur sa zone, on recopie la légende
+        pré-rendue ; sinon on la redessine sur ce qui s'y trouve, comme
+        sans cache. Dans les deux cas sa zone est restaurée à la frame
+        suivante.
+        """
+        xa, ya, xb, yb = self.rectangle_legende
+        recouverte = any(
+            xa < rxb and rxa < xb and ya < ryb and rya < yb
+            for rxa, rya, rxb, ryb in self.rectangles
+        )
+        if recouverte:
+            dessiner_legende(image)
+        else:
+            image[ya:yb, xa:xb] = self.legende
+        self.rectangles.append(self.rectangle_legende)
+
 
-    centres_voies = [
-        int(x1 + largeur_voie * 0.5),   # voie 1 (gauche)
-        int(x1 + largeur_voie * 1.5),   # voie 2 (centre)
-        int(x1 + largeur_voie * 2.5)    # voie 3 (droite)
-    ]
+def _dessiner_vehicules(image, cache, xa, ya, largeur, hauteur, couleur, contour=None):
+    """
+    Remplit des boîtes de véhicules (tableaux de coins haut-gauche) et,
+    si contour est donné, les entoure d'un trait noir de 2 pixels (comme
+    cv2.rectangle(..., 2)). Le cache n'a qu'une zone à restaurer : la
+    boîte englobante de tous les véhicules.
+    """
+    remplir_colonnes(image, xa, ya, largeur, hauteur, couleur)
+    if contour is not None:
+        contourer_boites(image, xa, ya, largeur, hauteur, contour)
+    if cache is not None and len(xa):
+        e = 2 if contour is not None else 0
+        cache.marquer(
+            int(xa.min()) - e, int(ya.min()) - e,
+            int(xa.max()) + largeur - 1 + e, int(ya.max()) + hauteur - 1 + e
+        )
 
-    x_sep1 = int(x1 + largeur_voie)      # ligne blanche entre voie 1 et 2
-    x_sep2 = int(x1 + 2 * largeur_voie)  # ligne blanche entre voie 2 et 3
 
-    return x1, x2, y1, y2, largeur_zone, hauteur_zone, centres_voies, x_sep1, x_sep2
+def _dessiner_texte(image, cache, texte, origine, echelle, couleur, epaisseur):
+    cv2.putText(
+        image,
+        texte,
+        origine,
+        cv2.FONT_HERSHEY_SIMPLEX,
+        echelle,
+        couleur,
+        epaisseur,
+        cv2.LINE_AA
+    )
+    if cache is not None:
+        (w, h), ligne_base = cv2.getTextSize(texte, cv2.FONT_HERSHEY_SIMPLEX, echelle, epaisseur)
+        e = epaisseur + 2  # anti-aliasing
+        cache.marquer(
+            origine[0] - e, origine[1] - h - e,
+            origine[0] + w + e, origine[1] + ligne_base + e
+        )
 
 
 def dessiner_scene(
@@ -64,30 +212,31 @@ def dessiner_scene(
     indice_voie_cible,
     v_ego_base,
     v_cible,
-    zone_params
+    zone_params,
+    trafic=None,
+    cache=None
 ):
     """
     Dessine la scène :
-    - route à 3 voies
+    - route (dessiner_fond)
     - voiture ego
-    - véhicule cible
+    - véhicule cible (ou tous les véhicules de `trafic` s'il est fourni)
     - HUD (mode, voie, messages, vitesses)
-    """
-
-    (x1, x2, y1, y2, largeur_zone,
-     hauteur_zone, centres_voies, x_sep1, x_sep2) = zone_params
-
-    hauteur, largeur, _ = image.shape
+    - légende (dessiner_legende), par-dessus le reste
 
-    # Fond
-    image[:] = (30, 30, 30)
+    Avec un CacheScene, le fond n'est pas redessiné : seules les zones
+    salies à la frame précédente sont restaurées avant de dessiner les
+    éléments mobiles.
+    """
 
-    # Route
-    cv2.rectangle(image, (x1, y1), (x2, y2), (50, 50, 50), -1)
+    x1, y1, y2 = zone_params.x1, zone_params.y1, zone_params.y2
+    hauteur_zone = zone_params.hauteur_zone
+    centres_voies = zone_params.centres_voies
 
-    # Lignes de séparation des voies
-    cv2.line(image, (x_sep1, y1), (x_sep1, y2), (255, 255, 255), 2)
-    cv2.line(image, (x_sep2, y1), (x_sep2, y2), (255, 255, 255), 2)
+    if cache is None:
+        dessiner_fond(image, zone_params)
+    else:
+        cache.preparer(image, zone_params)
 
     # Borne les positions relatives
     position_relative_ego = max(0.0, min(1.0, position_relative_ego))
@@ -96,26 +245,34 @@ def dessiner_scene(
     marge = 40  # marge verticale
 
     # Paramètres des véhicules
-    largeur_voiture = int(largeur_zone / 8.0)
+    largeur_voiture = int(zone_params.largeur_vehicule)
     hauteur_voiture = int(hauteur_zone / 10.0)
 
-    # ------------------------------
-    # Véhicule cible (qui bouge)
-    # ------------------------------
-    y_bas_cible = int(y2 - 10 - position_relative_cible * (hauteur_zone - marge))
-    y_haut_cible = y_bas_cible - hauteur_voiture
-
-    x_centre_cible = centres_voies[indice_voie_cible]
-    x_cible_g = x_centre_cible - largeur_voiture // 2
-    x_cible_d = x_centre_cible + largeur_voiture // 2
+    # Boîtes (bornes incluses) : centre +/- largeur_voiture // 2, bas - hauteur_voiture
+    demi_largeur = largeur_voiture // 2
+    largeur_boite = 2 * demi_largeur + 1
+    hauteur_boite = hauteur_voiture + 1
 
     couleur_cible = (255, 0, 0)  # bleu
-    cv2.rectangle(
-        image,
-        (x_cible_g, y_haut_cible),
-        (x_cible_d, y_bas_cible),
-        couleur_cible,
-        -1
+
+    if trafic is not None:
+        # ------------------------------
+        # Trafic dense : tous les véhicules en un lot
+        # ------------------------------
+        positions = np.concatenate(trafic.positions)
+        voies = np.repeat(np.arange(len(trafic.positions)), [len(p) for p in trafic.positions])
+        y_bas_cible = (y2 - 10 - np.minimum(1.0, positions) * (hauteur_zone - marge)).astype(np.intp)
+        x_centre_cible = np.asarray(centres_voies, dtype=np.intp)[voies]
+    else:
+        # ------------------------------
+        # Véhicule cible (qui bouge)
+        # ------------------------------
+        y_bas_cible = np.array([int(y2 - 10 - position_relative_cible * (hauteur_zone - marge))])
+        x_centre_cible = np.array([centres_voies[indice_voie_cible]])
+
+    _dessiner_vehicules(
+        image, cache, x_centre_cible - demi_largeur, y_bas_cible - hauteur_voiture,
+        largeur_boite, hauteur_boite, couleur_cible
     )
 
     # ------------------------------
@@ -123,379 +280,209 @@ def dessiner_scene(
     # ------------------------------
     y_bas_ego = int(y2 - 10 - position_relative_ego * (hauteur_zone - marge))
     y_haut_ego = y_bas_ego - hauteur_voiture
+    x_ego_g = int(x_centre_ego - demi_largeur)
 
-    x_ego_g = int(x_centre_ego - largeur_voiture // 2)
-    x_ego_d = int(x_centre_ego + largeur_voiture // 2)
-
-    if mode_adas == "MANUEL":
-        couleur_ego = (180, 180, 180)   # gris
-    elif mode_adas == "ACC":
-        couleur_ego = (0, 255, 0)       # vert
-    elif mode_adas == "LKA":
-        couleur_ego = (0, 255, 255)     # jaune
-    elif mode_adas == "EMERGENCY":
-        couleur_ego = (0, 0, 255)       # rouge
-    else:
-        couleur_ego = (255, 255, 255)
+    couleur_ego = COULEURS_MODES.get(mode_adas, COULEUR_MODE_INCONNU)
 
-    cv2.rectangle(
-        image,
-        (x_ego_g, y_haut_ego),
-        (x_ego_d, y_bas_ego),
-        couleur_ego,
-        -1
-    )
-    cv2.rectangle(
-        image,
-        (x_ego_g, y_haut_ego),
-        (x_ego_d, y_bas_ego),
-        (0, 0, 0),
-        2
+    _dessiner_vehicules(
+        image, cache, np.array([x_ego_g]), np.array([y_haut_ego]),
+        largeur_boite, hauteur_boite, couleur_ego, contour=(0, 0, 0)
     )
 
     # Texte EMERGENCY
     if mode_adas == "EMERGENCY":
-        cv2.putText(
-            image,
-            "BRAKE!",
-            (x1 + 20, y1 + 40),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            1.2,
-            (0, 0, 255),
-            3,
-            cv2.LINE_AA
-        )
+        _dessiner_texte(image, cache, "BRAKE!", (x1 + 20, y1 + 40), 1.2, (0, 0, 255), 3)
 
     # Distance mini atteinte
     if distance_min_atteinte:
-        cv2.putText(
-            image,
-            "Distance mini atteinte",
-            (x1 + 20, y2 - 20),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.7,
-            (0, 165, 255),
-            2,
-            cv2.LINE_AA
+        _dessiner_texte(
+            image, cache, "Distance mini atteinte", (x1 + 20, y2 - 20), 0.7, (0, 165, 255), 2
         )
 
     # HUD
-    cv2.putText(
-        image,
-        f"Mode ADAS : {mode_adas}",
-        (20, 40),
-        cv2.FONT_HERSHEY_SIMPLEX,
-        0.8,
-        (255, 255, 255),
-        2,
-        cv2.LINE_AA
-    )
-    cv2.putText(
-        image,
-        f"Voie ego : {indice_voie_ego + 1}",
-        (20, 80),
-        cv2.FONT_HERSHEY_SIMPLEX,
-        0.8,
-        (255, 255, 255),
-        2,
-        cv2.LINE_AA
+    _dessiner_texte(image, cache, f"Mode ADAS : {mode_adas}", (20, 40), 0.8, (255, 255, 255), 2)
+    _dessiner_texte(
+        image, cache, f"Voie ego : {indice_voie_ego + 1}", (20, 80), 0.8, (255, 255, 255), 2
     )
 
     # Affichage vitesses
-    cv2.putText(
+    _dessiner_texte(
         image,
-        f"v_ego: {abs(v_ego_base):.4f}  v_cible: {abs(v_cible):.4f}",
+        cache,
+        f"v_ego: {abs(v_ego_base):.3f}/s  v_cible: {abs(v_cible):.3f}/s",
         (20, 120),
-        cv2.FONT_HERSHEY_SIMPLEX,
         0.7,
         (200, 200, 200),
-        2,
-        cv2.LINE_AA
+        2
     )
 
-    # Légende
-    lignes = [
-        "Touches :",
-        "0 -> MANUEL, 1 -> ACC, 2 -> LKA, 3 -> EMERGENCY",
-        "Q / Fleche gauche  -> tourner a gauche",
-        "D / Fleche droite -> tourner a droite",
-        "Z -> accelerer ego, S -> ralentir ego",
-        "Deux voitures avancent (ego + cible)",
-        "Blocage lateral si vehicule a cote",
-        "ECHAP -> quitter",
-    ]
-    x0, y0 = 20, hauteur - 180
-    for i, texte in enumerate(lignes):
-        cv2.putText(
-            image,
-            texte,
-            (x0, y0 + i * 22),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.6,
-            (200, 200, 200),
-            1,
-            cv2.LINE_AA
-        )
+    # Légende en dernier, par-dessus les véhicules
+    if cache is None:
+        dessiner_legende(image)
+    else:
+        cache.terminer(image)
 
 
 # ==============================
 # Programme principal
 # ==============================
 
-def main():
+def main(nb_vehicules=0, fps_cible=50.0, vitesse=1.0, illimite=False, fichier_journal=None,
+         fichier_trajectoire=None, nb_voies=3):
     # Fenetre
     largeur = 900
     hauteur = 600
     image = np.zeros((hauteur, largeur, 3), dtype=np.uint8)
 
-    # Zone ADAS
-    zone_params = calculer_zone_adas(largeur, hauteur)
-    (x1, x2, y1, y2, largeur_zone,
-     hauteur_zone, centres_voies, x_sep1, x_sep2) = zone_params
-
-    # Etat initial
-    mode_adas = "MANUEL"
-
-    # 0 = haut, 1 = bas
-    position_relative_ego = 0.8
-    position_relative_cible = 0.3  # devant ego au début
-
-    # vitesses (négatives = vers le haut)
-    v_ego_base = -0.004   # réglable par z/s
-    v_cible = -0.003      # fixe
-
-    marge_distance_relative = 0.15
-    seuil_blocage_lateral = 0.20
-
-    indice_voie_cible = 1     # centre
-    indice_voie_ego = 1       # centre
-    indice_voie_ego_cible = indice_voie_ego
+    # Etat initial (zone ADAS comprise), avec trafic dense éventuel ; le
+    # journal garde de quoi le reconstruire et toutes les actions appliquées
+    journal = JournalEntrees(
+        largeur, hauteur, nb_vehicules, proba_changement_voie=0.002, nb_voies=nb_voies
+    )
+    etat = journal.creer_etat()
 
-    x_centre_ego = float(centres_voies[indice_voie_ego])
+    # Fond pré-rendu + rectangles à restaurer
+    cache = CacheScene()
 
-    # Changement de voie "classique"
-    changement_voie_en_cours = False
+    # Physique à pas fixe, affichage cadencé à fps_cible
+    horloge = HorlogeSimulation(etat.dt, fps_cible, vitesse, illimite)
 
-    # Dérive latérale (LKA ou blocage latéral)
-    lateral_phase = "idle"   # "idle" / "out" / "back"
-    lateral_direction = 0    # -1 gauche, +1 droite
-    lateral_boundary_x = 0.0
+    # Indicateurs de sécurité (TTC, temps inter-véhiculaire...), mis à jour à chaque pas
+    metriques = MetriquesSecurite()
 
-    vitesse_laterale = 10.0  # px/frame
+    # Trajectoire tick par tick (écrite par un thread, voir adas_trajectoire)
+    trajectoire = None
+    if fichier_trajectoire is not None:
+        trajectoire = JournalTrajectoire(fichier_trajectoire).demarrer()
 
+    # Touches pas encore prises en compte par la physique (une par pas)
+    actions = collections.deque()
     while True:
         # ------------------------------
-        # Màj longitudinales des deux voitures
-        # ------------------------------
-        # Voiture cible : avance toujours à v_cible
-        position_relative_cible += v_cible
-        if position_relative_cible < 0.0:
-            # On la remet en bas
-            position_relative_cible = 1.0
-
-        # Ego : vitesse dépend du mode (ACC / EMERGENCY) à partir de v_ego_base
-        distance_min_atteinte = False
-        v_ego = v_ego_base
-
-        if mode_adas == "EMERGENCY":
-            v_ego = 0.0
-
-        elif mode_adas == "ACC":
-            if indice_voie_ego == indice_voie_cible:
-                # Ego derrière la cible ?
-                if position_relative_ego > position_relative_cible:
-                    distance = position_relative_ego - position_relative_cible
-
-                    if distance <= marge_distance_relative:
-                        # Trop proche : on se cale à la vitesse de la cible
-                        distance_min_atteinte = True
-                        v_ego = v_cible
-                    else:
-                        # On garde la vitesse demandée par le conducteur
-                        v_ego = v_ego_base
-                else:
-                    # Ego déjà devant -> on laisse la vitesse du conducteur
-                    v_ego = v_ego_base
-            else:
-                # Pas dans la même voie -> ACC n'agit pas
-                v_ego = v_ego_base
-
-        else:
-            v_ego = v_ego_base
-
-        position_relative_ego += v_ego
-        if position_relative_ego < 0.0:
-            position_relative_ego = 1.0
-
-        # ------------------------------
-        # Dynamique latérale (dérive + retour / changement de voie)
+        # Physique : autant de pas que de temps écoulé
         # ------------------------------
-        # 1) Phase "out": dérive vers la ligne
-        if lateral_phase == "out":
-            if lateral_direction == -1:
-                x_centre_ego -= vitesse_laterale
-                if x_centre_ego <= lateral_boundary_x:
-                    x_centre_ego = lateral_boundary_x
-                    lateral_phase = "back"
-            elif lateral_direction == 1:
-                x_centre_ego += vitesse_laterale
-                if x_centre_ego >= lateral_boundary_x:
-                    x_centre_ego = lateral_boundary_x
-                    lateral_phase = "back"
-
-        # 2) Phase "back": retour au centre de la même voie
-        elif lateral_phase == "back":
-            x_centre_voie = float(centres_voies[indice_voie_ego])
-            diff = x_centre_voie - x_centre_ego
-            if abs(diff) <= vitesse_laterale:
-                x_centre_ego = x_centre_voie
-                lateral_phase = "idle"
-            else:
-                x_centre_ego += vitesse_laterale * (1.0 if diff > 0 else -1.0)
-
-        # 3) Changement de voie "classique"
-        if lateral_phase == "idle" and mode_adas != "LKA":
-            if changement_voie_en_cours:
-                cible_x = float(centres_voies[indice_voie_ego_cible])
-                diff = cible_x - x_centre_ego
-                if abs(diff) <= vitesse_laterale:
-                    x_centre_ego = cible_x
-                    indice_voie_ego = indice_voie_ego_cible
-                    changement_voie_en_cours = False
-                else:
-                    x_centre_ego += vitesse_laterale * (1.0 if diff > 0 else -1.0)
+        while horloge.pas_suivant():
+            action = actions.popleft() if actions else None
+            if action is not None:
+                journal.ajouter(etat.tick, action)
+            for message in step(etat, action):
+                print(message)
+            metriques.mettre_a_jour(etat)
+            if trajectoire is not None:
+                trajectoire.noter(etat)
 
         # ------------------------------
-        # Dessin
+        # Dessin (sauté si l'affichage est en retard)
         # ------------------------------
-        dessiner_scene(
-            image,
-            mode_adas,
-            position_relative_ego,
-            position_relative_cible,
-            distance_min_atteinte,
-            x_centre_ego,
-            indice_voie_ego,
-            indice_voie_cible,
-            v_ego_base,
-            v_cible,
-            zone_params
-        )
-
-        cv2.imshow("Simulation ADAS (2 voitures)", image)
+        if horloge.afficher():
+            dessiner_scene(
+                image,
+                etat.mode_adas,
+                etat.position_relative_ego,
+                etat.position_relative_cible,
+                etat.distance_min_atteinte,
+                etat.x_centre_ego,
+                etat.indice_voie_ego,
+                etat.indice_voie_cible,
+                etat.v_ego_base,
+                etat.v_cible,
+                etat.zone_params,
+                etat.trafic,
+                cache
+            )
+
+            cv2.imshow("Simulation ADAS (2 voitures)", image)
 
         # ------------------------------
         # Clavier
         # ------------------------------
-        key = cv2.waitKey(20) & 0xFF
+        key = cv2.waitKey(horloge.attente_ms()) & 0xFF
+
+        # Quitter
+        if key == 27:
+            break
 
         if key != 255:
-            # Quitter
-            if key == 27:
-                break
-
-            # Changer de mode ADAS
-            nouveau_mode = calculer_mode_adas(key)
-            if nouveau_mode is not None and nouveau_mode != mode_adas:
-                ancien_mode = mode_adas
-                mode_adas = nouveau_mode
-                print(f"➡ Nouveau mode ADAS : {mode_adas}")
-
-                if mode_adas == "LKA":
-                    changement_voie_en_cours = False
-                    indice_voie_ego_cible = indice_voie_ego
-                    x_centre_ego = float(centres_voies[indice_voie_ego])
-                    lateral_phase = "idle"
-
-            # Ajuster la vitesse de l'ego (z/s)
-            if key == ord('z'):
-                v_ego_base -= 0.001
-                v_ego_base = max(v_ego_base, -0.01)
-                print(f"v_ego_base (accel) = {v_ego_base:.4f}")
-            if key == ord('s'):
-                v_ego_base += 0.001
-                v_ego_base = min(v_ego_base, -0.0005)
-                print(f"v_ego_base (ralenti) = {v_ego_base:.4f}")
-
-            # Fonction utilitaire : voie bloquée latéralement ?
-            def voie_bloquee(target_lane):
-                return (
-                    target_lane == indice_voie_cible and
-                    abs(position_relative_ego - position_relative_cible) <= seuil_blocage_lateral
-                )
-
-            # Gauche : q ou flèche gauche (81)
-            if key == ord('q') or key == 81:
-                if mode_adas == "LKA":
-                    # dérive vers la ligne puis retour
-                    if lateral_phase == "idle":
-                        if indice_voie_ego == 0:
-                            boundary_gauche = x1
-                        elif indice_voie_ego == 1:
-                            boundary_gauche = x_sep1
-                        else:
-                            boundary_gauche = x_sep2
-                        if x_centre_ego > boundary_gauche:
-                            lateral_direction = -1
-                            lateral_boundary_x = boundary_gauche
-                            lateral_phase = "out"
-                else:
-                    if lateral_phase == "idle" and not changement_voie_en_cours:
-                        target_lane = indice_voie_ego - 1
-                        if target_lane >= 0:
-                            if voie_bloquee(target_lane):
-                                # sécurité latérale -> dérive + retour
-                                if indice_voie_ego == 0:
-                                    boundary_gauche = x1
-                                elif indice_voie_ego == 1:
-                                    boundary_gauche = x_sep1
-                                else:
-                                    boundary_gauche = x_sep2
-                                if x_centre_ego > boundary_gauche:
-                                    lateral_direction = -1
-                                    lateral_boundary_x = boundary_gauche
-                                    lateral_phase = "out"
-                            else:
-                                indice_voie_ego_cible = target_lane
-                                changement_voie_en_cours = True
-                                print(f"➡ Changement de voie vers la gauche (voie {indice_voie_ego_cible + 1})")
-
-            # Droite : d ou flèche droite (83)
-            if key == ord('d') or key == 83:
-                if mode_adas == "LKA":
-                    if lateral_phase == "idle":
-                        if indice_voie_ego == 0:
-                            boundary_droite = x_sep1
-                        elif indice_voie_ego == 1:
-                            boundary_droite = x_sep2
-                        else:
-                            boundary_droite = x2
-                        if x_centre_ego < boundary_droite:
-                            lateral_direction = 1
-                            lateral_boundary_x = boundary_droite
-                            lateral_phase = "out"
-                else:
-                    if lateral_phase == "idle" and not changement_voie_en_cours:
-                        target_lane = indice_voie_ego + 1
-                        if target_lane <= 2:
-                            if voie_bloquee(target_lane):
-                                if indice_voie_ego == 0:
-                                    boundary_droite = x_sep1
-                                elif indice_voie_ego == 1:
-                                    boundary_droite = x_sep2
-                                else:
-                                    boundary_droite = x2
-                                if x_centre_ego < boundary_droite:
-                                    lateral_direction = 1
-                                    lateral_boundary_x = boundary_droite
-                                    lateral_phase = "out"
-                            else:
-                                indice_voie_ego_cible = target_lane
-                                changement_voie_en_cours = True
-                                print(f"➡ Changement de voie vers la droite (voie {indice_voie_ego_cible + 1})")
+            action = action_depuis_touche(key)
+            if action is not None:
+                actions.append(action)
 
     cv2.destroyAllWindows()
 
+    print("Indicateurs de sécurité :")
+    afficher_resume(metriques.resume())
+
+    if trajectoire is not None:
+        nb = trajectoire.fermer()
+        print(f"{nb} ticks de trajectoire enregistrés dans {fichier_trajectoire}")
+
+    if fichier_journal is not None:
+        journal.sauver(fichier_journal, etat.tick)
+        print(f"{len(journal.ticks)} entrées ({etat.tick} ticks) enregistrées dans {fichier_journal}")
+
+
+def main_sans_fenetre(nb_pas, nb_vehicules=0, nb_voies=3):
+    """
+    Simulation sans fenêtre (CI, balayages) : nb_pas pas au plus vite.
+    """
+    trafic = None
+    if nb_vehicules:
+        trafic = Trafic(nb_vehicules, nb_voies, proba_changement_voie=0.002)
+    etat = creer_etat(nb_voies=nb_voies, trafic=trafic)
+    metriques = MetriquesSecurite()
+    for _ in range(nb_pas):
+        avancer(etat)
+        metriques.mettre_a_jour(etat)
+    print(
+        f"{nb_pas} pas : mode={etat.mode_adas} "
+        f"ego={etat.position_relative_ego:.4f} cible={etat.position_relative_cible:.4f} "
+        f"voie ego={etat.indice_voie_ego + 1}"
+    )
+    afficher_resume(metriques.resume())
+
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Simulation ADAS (2 voitures)")
+    parser.add_argument(
+        "--sans-fenetre", type=int, metavar="NB_PAS", default=None,
+        help="simule NB_PAS pas sans ouvrir de fenêtre"
+    )
+    parser.add_argument(
+        "--trafic", type=int, metavar="NB_VEHICULES", default=0,
+        help="remplace la cible unique par NB_VEHICULES véhicules"
+    )
+    parser.add_argument(
+        "--voies", type=int, default=3,
+        help="nombre de voies de la route (ex. 6 pour une autoroute large)"
+    )
+    parser.add_argument(
+        "--fps", type=float, default=50.0,
+        help="fréquence d'affichage visée (la physique reste à pas fixe)"
+    )
+    parser.add_argument(
+        "--vitesse", type=float, default=1.0,
+        help="facteur de temps (2 = deux fois plus vite que le temps réel)"
+    )
+    parser.add_argument(
+        "--illimite", action="store_true",
+        help="simulation au plus vite, affichage à --fps"
+    )
+    parser.add_argument(
+        "--journal", metavar="FICHIER.npz",
+        help="enregistre les entrées pour relecture (adas_replay.py)"
+    )
+    parser.add_argument(
+        "--trajectoire", metavar="FICHIER.traj",
+        help="enregistre l'état à chaque tick (adas_trajectoire.py)"
+    )
+    args = parser.parse_args()
+
+    if args.sans_fenetre is not None:
+        main_sans_fenetre(args.sans_fenetre, args.trafic, args.voies)
+    else:
+        main(
+            args.trafic, args.fps, args.vitesse, args.illimite, args.journal, args.trajectoire,
+            args.voies
+        )
@@ -0,0 +1,212 @@
+"""
+Sources d'images interchangeables pour la démo webcam.
+
+Toutes les sources exposent la même interface que cv2.VideoCapture
+(read(), isOpened(), release(), set()) et peuvent donc être passées
+telles quelles à CaptureThread :
+- SourceCamera      : caméra réelle (backend choisi selon la plateforme),
+- SourceVideo       : fichier vidéo enregistré,
+- SourceDossier     : dossier d'images (triées par nom),
+- SourceSynthetique : images générées (aucun fichier, aucune caméra).
+
+read(image) accepte, comme cv2.VideoCapture, un tampon de destination
+réutilisé quand il a la bonne forme (voir adas_tampons).
+
+Les sources "fichier" et synthétique sont cadencées à leur FPS nominal,
+sauf en mode rapide=True : les frames sont alors rendues aussi vite que
+possible, pour mesurer le débit du pipeline hors ligne.
+
+en_direct distingue la caméra (les frames périmées peuvent être jetées)
+des sources enregistrées, qui doivent être lues sans perte.
+"""
+
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+EXTENSIONS_IMAGES = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+
+class SourceCadencee:
+    """
+    Base des sources hors caméra : cadencement à `fps` (sauf si rapide).
+    """
+
+    en_direct = False
+
+    def __init__(self, fps=30.0, rapide=False):
+        self.fps = fps
+        self.rapide = rapide
+        self._prochaine = None
+        self.ouverte = True
+
+    def _attendre(self):
+        if self.rapide or not self.fps:
+            return
+        maintenant = time.perf_counter()
+        if self._prochaine is None:
+            self._prochaine = maintenant
+        elif self._prochaine > maintenant:
+            time.sleep(self._prochaine - maintenant)
+        self._prochaine = max(self._prochaine, maintenant) + 1.0 / self.fps
+
+    def read(self, image=None):
+        if not self.ouverte:
+            return False, None
+        frame = self._lire(image)
+        if frame is None:
+            return False, None
+        self._attendre()
+        return True, frame
+
+    def _lire(self, image):
+        """
+        Frame suivante (écrite dans image si possible), None à la fin.
+        """
+        raise NotImplementedError
+
+    def isOpened(self):
+        return self.ouverte
+
+    def set(self, propriete, valeur):
+        # Propriétés caméra (CAP_PROP_BUFFERSIZE...) sans objet ici
+        return False
+
+    def release(self):
+        self.ouverte = False
+
+
+class SourceCamera:
+    """
+    Caméra réelle. Le backend Media Foundation n'est utilisé que sous Windows.
+    """
+
+    en_direct = True
+
+    def __init__(self, index=0, backend=None):
+        if backend is None:
+            backend = cv2.CAP_MSMF if sys.platform == "win32" else cv2.CAP_ANY
+        self.cap = cv2.VideoCapture(index, backend)
+
+    def read(self, image=None):
+        return self.cap.read(image)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def set(self, propriete, valeur):
+        return self.cap.set(propriete, valeur)
+
+    def release(self):
+        self.cap.release()
+
+
+class SourceVideo(SourceCadencee):
+    """
+    Fichier vidéo, cadencé à son propre FPS (ou au plus vite).
+    """
+
+    def __init__(self, chemin, rapide=False, boucle=False):
+        self.cap = cv2.VideoCapture(chemin)
+        fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        super().__init__(fps, rapide)
+        self.ouverte = self.cap.isOpened()
+        self.boucle = boucle
+
+    def _lire(self, image):
+        ret, frame = self.cap.read(image)
+        if not ret and self.boucle:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read(image)
+        return frame if ret else None
+
+    def release(self):
+        super().release()
+        self.cap.release()
+
+
+class SourceDossier(SourceCadencee):
+    """
+    Dossier d'images, lues dans l'ordre alphabétique.
+    """
+
+    def __init__(self, dossier, fps=30.0, rapide=False, boucle=False):
+        super().__init__(fps, rapide)
+        self.fichiers = sorted(
+            os.path.join(dossier, nom)
+            for nom in os.listdir(dossier)
+            if nom.lower().endswith(EXTENSIONS_IMAGES)
+        )
+        self.ouverte = bool(self.fichiers)
+        self.boucle = boucle
+        self.indice = 0
+
+    def _lire(self, image):
+        # cv2.imread alloue toujours son image
+        if self.indice >= len(self.fichiers):
+            if not self.boucle:
+                return None
+            self.indice = 0
+        frame = cv2.imread(self.fichiers[self.indice])
+        self.indice += 1
+        return frame
+
+
+class SourceSynthetique(SourceCadencee):
+    """
+    Images générées : dégradé fixe + disque clair qui se déplace.
+    nb_frames=None -> source infinie.
+    """
+
+    def __init__(self, largeur=640, hauteur=480, nb_frames=None, fps=30.0, rapide=False):
+        super().__init__(fps, rapide)
+        self.largeur = largeur
+        self.hauteur = hauteur
+        self.nb_frames = nb_frames
+        self.indice = 0
+
+        degrade = np.linspace(40, 120, largeur, dtype=np.float32).astype(np.uint8)
+        self.fond = np.repeat(degrade[None, :, None], hauteur, axis=0).repeat(3, axis=2)
+
+    def _lire(self, image):
+        if self.nb_frames is not None and self.indice >= self.nb_frames:
+            return None
+        t = self.indice / 30.0
+        self.indice += 1
+
+        if image is not None and image.shape == self.fond.shape:
+            frame = image
+            np.copyto(frame, self.fond)
+        else:
+            frame = self.fond.copy()
+        centre = (
+            int(self.largeur * (0.3 + 0.2 * np.sin(t))),
+            int(self.hauteur * (0.5 + 0.2 * np.cos(1.3 * t)))
+        )
+        cv2.circle(frame, centre, max(4, self.hauteur // 8), (180, 200, 230), -1)
+        return frame
+
+
+def ouvrir_source(description, rapide=False):
+    """
+    Construit une source depuis une description texte :
+      "camera" / "camera:1" / "1"   -> SourceCamera
+      "synthetique" / "synthetique:1280x720" -> SourceSynthetique
+      chemin de dossier             -> SourceDossier
+      autre chemin                  -> SourceVideo
+    """
+    if description.isdigit():
+        return SourceCamera(int(description))
+    if description == "camera" or description.startswith("camera:"):
+        _, _, index = description.partition(":")
+        return SourceCamera(int(index or 0))
+    if description == "synthetique" or description.startswith("synthetique:"):
+        _, _, taille = description.partition(":")
+        largeur, hauteur = (int(v) for v in taille.split("x")) if taille else (640, 480)
+        return SourceSynthetique(largeur, hauteur, rapide=rapide)
+    if os.path.isdir(description):
+        return SourceDossier(description, rapide=rapide)
+    return SourceVideo(description, rapide=rapide)
@@ -0,0 +1,80 @@
+"""
+Tampons d'images réutilisables pour la boucle webcam.
+
+Sans eux, chaque frame alloue plusieurs images (lecture caméra, miroir,
+copie d'affichage, réduction, conversion RGB) : à 1080p et 30 FPS, des
+centaines de Mo/s passent par l'allocateur. Les fonctions OpenCV
+acceptent une destination (dst=..., cap.read(image)) : si elle a la
+bonne forme, elles écrivent dedans sans rien allouer.
+
+- PoolTampons     : images de la taille de la capture qui passent d'un
+                    thread à l'autre (capture -> boucle -> inférence) ;
+                    chaque propriétaire rend le tampon quand il a fini.
+- TamponVariable  : une seule zone mémoire réutilisée pour des images
+                    de taille variable (région d'intérêt de l'inférence).
+"""
+
+import collections
+
+import numpy as np
+
+
+class PoolTampons:
+    """
+    Tampons libres d'une même forme. prendre() en rend un (ou en alloue
+    un si tous sont en service), rendre() le remet à disposition.
+    Si la forme demandée change (nouvelle résolution), les anciens
+    tampons sont abandonnés.
+
+    deque.append / deque.pop sont atomiques : prendre() et rendre()
+    peuvent être appelés depuis des threads différents.
+    """
+
+    def __init__(self, dtype=np.uint8):
+        self.dtype = dtype
+        self.forme = None
+        self.libres = collections.deque()
+        self.nb_allocations = 0
+
+    def prendre(self, forme):
+        """
+        Tampon libre de forme `forme` (tuple, ex. frame.shape).
+        """
+        if forme != self.forme:
+            self.forme = forme
+            self.libres.clear()
+
+        while True:
+            try:
+                tampon = self.libres.pop()
+            except IndexError:
+                self.nb_allocations += 1
+                return np.empty(forme, dtype=self.dtype)
+            if tampon.shape == forme:
+                return tampon
+
+    def rendre(self, tampon):
+        """
+        Remet un tampon dans le pool (ignoré s'il n'a pas la forme courante).
+        """
+        if tampon is not None and tampon.shape == self.forme and tampon.dtype == self.dtype:
+            self.libres.append(tampon)
+
+
+class TamponVariable:
+    """
+    Zone mémoire qui ne fait que grandir ; vue(forme) en rend une vue
+    contiguë de la forme voulue (réallocation seulement si elle dépasse
+    la plus grande taille déjà vue).
+    """
+
+    def __init__(self, dtype=np.uint8):
+        self.donnees = np.empty(0, dtype=dtype)
+        self.nb_allocations = 0
+
+    def vue(self, forme):
+        taille = int(np.prod(forme))
+        if taille > self.donnees.size:
+            self.donnees = np.empty(taille, dtype=self.donnees.dtype)
+            self.nb_allocations += 1
+        return self.donnees[:taille].reshape(forme)
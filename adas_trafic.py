@@ -0,0 +1,216 @@
+"""
+Trafic dense : des centaines de véhicules répartis sur les voies.
+
+Chaque voie garde ses véhicules dans un tableau trié par position
+(0 = haut, 1 = bas), ce qui ramène les deux questions posées par la
+simulation à des recherches dichotomiques (np.searchsorted, O(log n)) :
+- "véhicule le plus proche devant moi dans ma voie" (ACC),
+- "un véhicule à moins de seuil_blocage_lateral dans la voie visée ?"
+  (blocage latéral d'un changement de voie).
+
+L'index est mis à jour au fil de l'eau : les positions avancent en place,
+seuls les véhicules qui en ont dépassé d'autres sont réinsérés à leur
+rang, et les véhicules sortis par le haut sont simplement déplacés en fin
+de tableau. Le rang de chaque véhicule dans sa voie est tenu à jour à
+chaque retrait / insertion, pour le retrouver sans parcourir la voie.
+"""
+
+import numpy as np
+
+from adas_horloge import PAS_TEMPS
+
+
+class Trafic:
+    """
+    Véhicules du trafic, indexés par voie.
+
+    positions[voie] : positions triées (croissantes) des véhicules de la voie
+    ids[voie]       : identifiant du véhicule à chaque rang
+    vitesses[id]    : vitesse demandée de chaque véhicule, par seconde
+                      (négative = vers le haut)
+    voies[id]       : voie courante de chaque véhicule
+    rangs[id]       : rang courant de chaque véhicule dans sa voie
+                      (ids[voies[id]][rangs[id]] == id)
+    """
+
+    def __init__(
+        self,
+        nb_vehicules,
+        nb_voies=3,
+        v_min=-0.2,
+        v_max=-0.1,
+        marge_distance_relative=0.02,
+        seuil_blocage_lateral=0.05,
+        proba_changement_voie=0.0,
+        graine=0
+    ):
+        self.rng = np.random.default_rng(graine)
+        self.nb_voies = nb_voies
+        self.marge_distance_relative = marge_distance_relative
+        self.seuil_blocage_lateral = seuil_blocage_lateral
+        self.proba_changement_voie = proba_changement_voie
+
+        self.vitesses = self.rng.uniform(v_min, v_max, nb_vehicules)
+        self.voies = self.rng.integers(0, nb_voies, nb_vehicules).astype(np.int8)
+        positions = self.rng.uniform(0.0, 1.0, nb_vehicules)
+
+        self.positions = []
+        self.ids = []
+        self.rangs = np.empty(nb_vehicules, dtype=np.intp)
+        for voie in range(nb_voies):
+            ids_voie = np.flatnonzero(self.voies == voie)
+            ordre = np.argsort(positions[ids_voie], kind="stable")
+            self.ids.append(ids_voie[ordre])
+            self.positions.append(positions[ids_voie][ordre])
+            self.rangs[ids_voie[ordre]] = np.arange(len(ids_voie))
+
+    @property
+    def nb_vehicules(self):
+        return len(self.vitesses)
+
+    # ==============================
+    # Requêtes (dichotomie)
+    # ==============================
+
+    def vehicule_devant(self, voie, position):
+        """
+        Véhicule le plus proche devant `position` dans `voie`
+        (position strictement plus petite = plus haut à l'écran).
+        Retourne (id, position, vitesse) ou None.
+        """
+        positions = self.positions[voie]
+        rang = int(np.searchsorted(positions, position, side="left")) - 1
+        if rang < 0:
+            return None
+        id_vehicule = int(self.ids[voie][rang])
+        return id_vehicule, float(positions[rang]), float(self.vitesses[id_vehicule])
+
+    def voie_occupee(self, voie, position, seuil):
+        """
+        Un véhicule de `voie` est-il à moins de `seuil` de `position` ?
+        """
+        if voie < 0 or voie >= self.nb_voies:
+            return False
+        positions = self.positions[voie]
+        debut = np.searchsorted(positions, position - seuil, side="left")
+        fin = np.searchsorted(positions, position + seuil, side="right")
+        return bool(fin > debut)
+
+    # ==============================
+    # Mises à jour incrémentales
+    # ==============================
+
+    def changer_voie(self, id_vehicule, nouvelle_voie):
+        """
+        Déplace un véhicule dans une autre voie (retrait + insertion triée).
+        """
+        ancienne_voie = int(self.voies[id_vehicule])
+        if nouvelle_voie == ancienne_voie:
+            return
+
+        rang = int(self.rangs[id_vehicule])
+        position = self.positions[ancienne_voie][rang]
+        ids = np.delete(self.ids[ancienne_voie], rang)
+        self.ids[ancienne_voie] = ids
+        self.positions[ancienne_voie] = np.delete(self.positions[ancienne_voie], rang)
+        # Les véhicules derrière lui remontent d'un rang
+        self.rangs[ids[rang:]] -= 1
+
+        rang = int(np.searchsorted(self.positions[nouvelle_voie], position, side="right"))
+        ids = np.insert(self.ids[nouvelle_voie], rang, id_vehicule)
+        self.ids[nouvelle_voie] = ids
+        self.positions[nouvelle_voie] = np.insert(self.positions[nouvelle_voie], rang, position)
+        # ... et ceux de la nouvelle voie derrière lui descendent d'un rang
+        self.rangs[ids[rang + 1:]] += 1
+        self.rangs[id_vehicule] = rang
+        self.voies[id_vehicule] = nouvelle_voie
+
+    def _reinserer_depasseurs(self, positions, ids, depasseurs):
+        """
+        Remet en ordre (en place) une voie dont les véhicules `depasseurs`
+        (indices croissants) viennent d'en dépasser d'autres : seuls ceux-là
+        sont réinsérés à leur rang, après les positions égales, ce qui donne
+        le même ordre qu'un tri stable. Les autres gardent leur ordre relatif.
+        """
+        # Dépasseurs triés entre eux, puis fusionnés avec les autres (triés)
+        depasseurs = depasseurs[np.argsort(positions[depasseurs], kind="stable")]
+        restants = np.ones(positions.size, dtype=bool)
+        restants[depasseurs] = False
+        rangs_depasseurs = np.searchsorted(
+            positions[restants], positions[depasseurs], side="right"
+        ) + np.arange(depasseurs.size)
+
+        ordre = np.empty(positions.size, dtype=np.intp)
+        ordre[rangs_depasseurs] = depasseurs
+        libres = np.ones(positions.size, dtype=bool)
+        libres[rangs_depasseurs] = False
+        ordre[libres] = np.flatnonzero(restants)
+
+        # Rien ne bouge avant le premier rang d'insertion
+        debut = int(rangs_depasseurs[0])
+        ordre = ordre[debut:]
+        positions[debut:] = positions[ordre]
+        ids[debut:] = ids[ordre]
+        self.rangs[ids[debut:]] = np.arange(debut, positions.size)
+
+    def _avancer_voie(self, voie, dt):
+        """
+        Fait avancer tous les véhicules d'une voie en gardant le tableau trié.
+        """
+        positions = self.positions[voie]
+        ids = self.ids[voie]
+        if positions.size == 0:
+            return
+
+        # Suivi simple : trop près du véhicule de devant -> on prend sa vitesse
+        vitesses = self.vitesses[ids]
+        if positions.size > 1:
+            ecart = positions[1:] - positions[:-1]
+            trop_pres = ecart <= self.marge_distance_relative
+            vitesses[1:] = np.where(
+                trop_pres, np.maximum(vitesses[1:], vitesses[:-1]), vitesses[1:]
+            )
+
+        positions += vitesses * dt
+
+        # Ordre cassé (dépassement dans la voie) : on ne déplace que les
+        # dépasseurs, c.-à-d. les véhicules devant le plus bas de ceux qui
+        # les précèdent dans le tableau
+        if positions.size > 1:
+            depasseurs = np.flatnonzero(positions[1:] < np.maximum.accumulate(positions[:-1]))
+            if depasseurs.size:
+                self._reinserer_depasseurs(positions, ids, depasseurs + 1)
+
+        # Sortis par le haut : remis en bas, donc en fin de tableau
+        nb_sortis = int(np.searchsorted(positions, 0.0, side="left"))
+        if nb_sortis:
+            positions = np.concatenate((positions[nb_sortis:], np.ones(nb_sortis)))
+            ids = np.concatenate((ids[nb_sortis:], ids[:nb_sortis]))
+            self.rangs[ids] = np.arange(ids.size)
+
+        self.positions[voie] = positions
+        self.ids[voie] = ids
+
+    def _changements_aleatoires(self):
+        """
+        Quelques véhicules tentent de changer de voie, si la voie visée est libre.
+        """
+        candidats = np.flatnonzero(self.rng.random(self.nb_vehicules) < self.proba_changement_voie)
+        for id_vehicule in candidats:
+            voie = int(self.voies[id_vehicule])
+            nouvelle_voie = voie + (1 if self.rng.random() < 0.5 else -1)
+            if nouvelle_voie < 0 or nouvelle_voie >= self.nb_voies:
+                continue
+            position = self.positions[voie][self.rangs[id_vehicule]]
+            if not self.voie_occupee(nouvelle_voie, position, self.seuil_blocage_lateral):
+                self.changer_voie(id_vehicule, nouvelle_voie)
+
+    def avancer(self, dt=PAS_TEMPS):
+        """
+        Un pas de trafic (dt secondes) : changements de voie éventuels puis
+        avance longitudinale.
+        """
+        if self.proba_changement_voie > 0.0:
+            self._changements_aleatoires()
+        for voie in range(self.nb_voies):
+            self._avancer_voie(voie, dt)
@@ -0,0 +1,200 @@
+"""
+Journal de trajectoire : un enregistrement par tick de simulation.
+
+noter(etat) recopie les champs utiles de l'état (mode, positions, voies,
+phase latérale, vitesses) dans un anneau préalloué de taille fixe ; un
+thread d'écriture vide l'anneau par blocs entiers dans le fichier. La
+boucle de simulation ne fait jamais d'entrée / sortie.
+
+Le fichier est une suite brute d'enregistrements DTYPE_TRAJECTOIRE :
+charger_trajectoire() le relit en mémoire mappée, sans copie.
+
+    journal = JournalTrajectoire("session.traj").demarrer()
+    ...
+    step(etat, action)
+    journal.noter(etat)
+    ...
+    journal.fermer()
+"""
+
+import os
+import threading
+
+import numpy as np
+
+from adas_moteur import MODES_ADAS
+from adas_replay import PHASES_LATERALES
+
+CODES_MODES = {mode: code for code, mode in enumerate(MODES_ADAS)}
+CODES_PHASES = {phase: code for code, phase in enumerate(PHASES_LATERALES)}
+
+DTYPE_TRAJECTOIRE = np.dtype([
+    ("tick", np.int64),
+    ("mode", np.int8),                     # indice dans MODES_ADAS
+    ("phase_laterale", np.int8),           # indice dans PHASES_LATERALES
+    ("voie_ego", np.int8),
+    ("voie_ego_cible", np.int8),
+    ("voie_cible", np.int8),
+    ("changement_voie", np.bool_),
+    ("distance_min_atteinte", np.bool_),
+    ("position_ego", np.float64),
+    ("position_cible", np.float64),
+    ("x_centre_ego", np.float64),
+    ("v_ego", np.float64),
+    ("v_ego_base", np.float64),
+    ("v_cible", np.float64),
+])
+
+
+class JournalTrajectoire:
+    """
+    Anneau de `capacite` enregistrements vidé par blocs de `taille_bloc`.
+    Si l'écriture prend plus de `capacite` ticks de retard, noter()
+    attend le thread d'écriture plutôt que d'écraser des enregistrements
+    (nb_attentes).
+    """
+
+    def __init__(self, chemin, capacite=1 << 16, taille_bloc=1 << 12):
+        if taille_bloc > capacite:
+            raise ValueError("taille_bloc doit être inférieure ou égale à capacite")
+        self.chemin = chemin
+        self.anneau = np.zeros(capacite, dtype=DTYPE_TRAJECTOIRE)
+        self.capacite = capacite
+        self.taille_bloc = taille_bloc
+
+        self.nb_notes = 0       # écrit par noter() uniquement
+        self.nb_ecrits = 0      # écrit par le thread d'écriture uniquement
+        self.condition = threading.Condition()
+        self.thread = None
+        self.actif = False
+        self.nb_attentes = 0
+
+        self.fichier = open(chemin, "wb")
+
+    def demarrer(self):
+        self.actif = True
+        self.thread = threading.Thread(target=self._boucle, name="trajectoire", daemon=True)
+        self.thread.start()
+        return self
+
+    def noter(self, etat):
+        """
+        Ajoute l'état courant (après un pas) à l'anneau.
+        """
+        if self.nb_notes - self.nb_ecrits >= self.capacite:
+            self.nb_attentes += 1
+            with self.condition:
+                self.condition.notify_all()
+                self.condition.wait_for(lambda: self.nb_notes - self.nb_ecrits < self.capacite)
+
+        self.anneau[self.nb_notes % self.capacite] = (
+            etat.tick,
+            CODES_MODES[etat.mode_adas],
+            CODES_PHASES[etat.lateral_phase],
+            etat.indice_voie_ego,
+            etat.indice_voie_ego_cible,
+            etat.indice_voie_cible,
+            etat.changement_voie_en_cours,
+            etat.distance_min_atteinte,
+            etat.position_relative_ego,
+            etat.position_relative_cible,
+            etat.x_centre_ego,
+            etat.v_ego,
+            etat.v_ego_base,
+            etat.v_cible,
+        )
+        self.nb_notes += 1
+
+        if self.nb_notes % self.taille_bloc == 0:
+            with self.condition:
+                self.condition.notify_all()
+
+    def _boucle(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(
+                    lambda: self.nb_notes - self.nb_ecrits >= self.taille_bloc or not self.actif
+                )
+                fin = self.nb_notes
+                dernier = not self.actif
+            self._vider(fin)
+            if dernier:
+                break
+
+    def _vider(self, fin):
+        """
+        Ecrit les enregistrements [nb_ecrits, fin) (en deux morceaux si
+        l'anneau fait le tour).
+        """
+        while self.nb_ecrits < fin:
+            debut = self.nb_ecrits % self.capacite
+            nb = min(fin - self.nb_ecrits, self.capacite - debut)
+            self.anneau[debut:debut + nb].tofile(self.fichier)
+            with self.condition:
+                self.nb_ecrits += nb
+                self.condition.notify_all()
+
+    def fermer(self):
+        """
+        Vide l'anneau et ferme le fichier. Retourne le nombre d'enregistrements.
+        """
+        if self.thread is not None:
+            with self.condition:
+                self.actif = False
+                self.condition.notify_all()
+            self.thread.join()
+            self.thread = None
+        else:
+            self._vider(self.nb_notes)
+        self.fichier.close()
+        return self.nb_ecrits
+
+
+def charger_trajectoire(chemin):
+    """
+    Relit un journal en mémoire mappée (lecture seule).
+    """
+    if os.path.getsize(chemin) == 0:
+        # np.memmap refuse les fichiers vides
+        return np.zeros(0, dtype=DTYPE_TRAJECTOIRE)
+    return np.memmap(chemin, dtype=DTYPE_TRAJECTOIRE, mode="r")
+
+
+def evenements(trajectoire):
+    """
+    Changements de mode et de voie, retrouvés par différences.
+    Retourne [(tick, message)] triés par tick.
+    """
+    resultat = []
+    for indice in np.flatnonzero(np.diff(trajectoire["mode"])) + 1:
+        resultat.append((
+            int(trajectoire["tick"][indice]),
+            f"mode {MODES_ADAS[trajectoire['mode'][indice]]}"
+        ))
+    for indice in np.flatnonzero(np.diff(trajectoire["voie_ego"])) + 1:
+        resultat.append((
+            int(trajectoire["tick"][indice]),
+            f"voie {trajectoire['voie_ego'][indice] + 1}"
+        ))
+    return sorted(resultat)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Lecture d'un journal de trajectoire")
+    parser.add_argument("fichier", help="journal (adas_simulation_2cars.py --trajectoire)")
+    parser.add_argument("--evenements", action="store_true", help="liste les changements de mode / voie")
+    args = parser.parse_args()
+
+    trajectoire = charger_trajectoire(args.fichier)
+    print(f"{len(trajectoire)} ticks")
+    if len(trajectoire):
+        print(
+            f"  position ego min/max : {trajectoire['position_ego'].min():.3f} / "
+            f"{trajectoire['position_ego'].max():.3f}"
+        )
+        print(f"  distance mini atteinte : {np.count_nonzero(trajectoire['distance_min_atteinte'])} ticks")
+    if args.evenements:
+        for tick, message in evenements(trajectoire):
+            print(f"  tick {tick:8d} : {message}")
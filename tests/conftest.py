@@ -0,0 +1,9 @@
+"""
+Les modules adas_*.py sont à la racine du dépôt : rendus importables
+pour les tests, où que pytest soit lancé.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,112 @@
+"""
+Le moteur vectorisé (adas_batch) doit donner, scénario par scénario,
+exactement l'état du moteur scalaire (adas_moteur) : mêmes paramètres,
+mêmes actions, mêmes valeurs au bit près.
+"""
+
+import numpy as np
+import pytest
+
+from adas_batch import PHASES, coder_actions, creer_etat_batch, simuler_batch
+from adas_moteur import ACTIONS, MODES_ADAS, creer_etat, simuler
+
+NB_SCENARIOS = 40
+NB_PAS = 2000
+
+CHAMPS = (
+    "position_relative_ego",
+    "position_relative_cible",
+    "v_ego",
+    "v_ego_base",
+    "x_centre_ego",
+    "lateral_boundary_x",
+    "indice_voie_ego",
+    "indice_voie_ego_cible",
+    "indice_voie_cible",
+    "lateral_direction",
+    "changement_voie_en_cours",
+    "distance_min_atteinte",
+    "nb_changements_demandes",
+    "nb_changements_bloques",
+    "nb_changements_annules",
+)
+
+
+def scenarios_aleatoires(rng, n, nb_voies):
+    return {
+        "position_relative_ego": rng.uniform(0.0, 1.0, n),
+        "position_relative_cible": rng.uniform(0.0, 1.0, n),
+        "v_ego_base": rng.uniform(-0.4, -0.05, n),
+        "v_cible": rng.uniform(-0.3, 0.0, n),
+        "marge_distance_relative": rng.uniform(0.05, 0.3, n),
+        "seuil_blocage_lateral": rng.uniform(0.05, 0.4, n),
+        "vitesse_laterale": rng.uniform(100.0, 1500.0, n),
+        "indice_voie_ego": rng.integers(0, nb_voies, n),
+        "indice_voie_cible": rng.integers(0, nb_voies, n),
+    }
+
+
+def actions_aleatoires(rng, n, nb_pas, proba=0.03):
+    """
+    {tick: action} par scénario (actions tirées dans adas_moteur.ACTIONS).
+    """
+    actions = [{} for _ in range(n)]
+    for tick, i in zip(*np.nonzero(rng.random((nb_pas, n)) < proba)):
+        actions[i][int(tick)] = ACTIONS[rng.integers(len(ACTIONS))]
+    return actions
+
+
+@pytest.mark.parametrize("graine, nb_voies", [(0, 3), (1, 3), (2, 5), (3, 1)])
+def test_batch_identique_au_moteur_scalaire(graine, nb_voies):
+    rng = np.random.default_rng(graine)
+    parametres = scenarios_aleatoires(rng, NB_SCENARIOS, nb_voies)
+    actions = actions_aleatoires(rng, NB_SCENARIOS, NB_PAS)
+
+    batch = creer_etat_batch(NB_SCENARIOS, nb_voies=nb_voies, **parametres)
+    actions_batch = {
+        tick: coder_actions([actions[i].get(tick) for i in range(NB_SCENARIOS)])
+        for tick in sorted(set().union(*actions))
+    }
+    simuler_batch(batch, NB_PAS, actions_batch)
+
+    for i in range(NB_SCENARIOS):
+        etat = creer_etat(
+            nb_voies=nb_voies,
+            **{nom: valeurs[i].item() for nom, valeurs in parametres.items()}
+        )
+        simuler(etat, NB_PAS, actions[i])
+
+        assert etat.tick == batch.tick
+        assert etat.mode_adas == MODES_ADAS[batch.mode[i]], f"scénario {i}"
+        assert etat.lateral_phase == PHASES[batch.lateral_phase[i]], f"scénario {i}"
+        for champ in CHAMPS:
+            # Egalité exacte : les deux moteurs font les mêmes opérations flottantes
+            assert getattr(etat, champ) == getattr(batch, champ)[i], f"scénario {i}, {champ}"
+
+
+def test_batch_reprise_en_cours_de_route():
+    """
+    Les clés d'actions sont des ticks absolus, pour les deux moteurs :
+    reprendre un état déjà avancé donne le même résultat d'une traite.
+    """
+    rng = np.random.default_rng(4)
+    parametres = scenarios_aleatoires(rng, NB_SCENARIOS, 3)
+    actions = actions_aleatoires(rng, NB_SCENARIOS, 600, proba=0.05)
+    actions_batch = {
+        tick: coder_actions([actions[i].get(tick) for i in range(NB_SCENARIOS)])
+        for tick in sorted(set().union(*actions))
+    }
+
+    d_une_traite = simuler_batch(creer_etat_batch(NB_SCENARIOS, **parametres), 600, actions_batch)
+    en_deux_fois = creer_etat_batch(NB_SCENARIOS, **parametres)
+    simuler_batch(en_deux_fois, 250, actions_batch)
+    simuler_batch(en_deux_fois, 350, actions_batch)
+
+    for champ in CHAMPS:
+        np.testing.assert_array_equal(getattr(d_une_traite, champ), getattr(en_deux_fois, champ))
+
+    etat = creer_etat(**{nom: valeurs[0].item() for nom, valeurs in parametres.items()})
+    simuler(etat, 250, actions[0])
+    simuler(etat, 350, actions[0])
+    assert etat.x_centre_ego == d_une_traite.x_centre_ego[0]
+    assert etat.position_relative_ego == d_une_traite.position_relative_ego[0]
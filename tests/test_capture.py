@@ -0,0 +1,65 @@
+"""
+Capture en thread (adas_capture) : seules les frames réellement écrasées
+ou sautées comptent comme jetées ; sans perte, aucune ne l'est, même
+quand le tampon est plein.
+"""
+
+import time
+
+import numpy as np
+
+from adas_capture import CaptureThread
+
+
+class SourceFinie:
+    """
+    Source de nb frames (numéro de la frame dans chaque pixel), lues au
+    plus vite.
+    """
+
+    def __init__(self, nb):
+        self.nb = nb
+        self.lues = 0
+
+    def read(self):
+        if self.lues == self.nb:
+            return False, None
+        frame = np.full((4, 4, 3), self.lues % 256, dtype=np.uint8)
+        self.lues += 1
+        return True, frame
+
+
+def attendre(condition, timeout=2.0):
+    fin = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < fin:
+        time.sleep(0.001)
+    assert condition()
+
+
+def test_sans_perte_ne_jette_rien():
+    capture = CaptureThread(SourceFinie(50), taille_tampon=4, sans_perte=True).demarrer()
+    # Tampon plein, lecteur en retard : rien n'est perdu pour autant
+    attendre(lambda: len(capture.tampon) == 4)
+    assert capture.nb_jetees == 0
+
+    valeurs = []
+    while True:
+        ok, frame, _ = capture.lire(timeout=2.0)
+        if not ok:
+            break
+        valeurs.append(int(frame[0, 0, 0]))
+    capture.arreter()
+    assert valeurs == list(range(50))
+    assert capture.nb_jetees == 0
+
+
+def test_direct_compte_les_frames_ecrasees():
+    capture = CaptureThread(SourceFinie(50), taille_tampon=2).demarrer()
+    attendre(lambda: capture.termine)
+    # 48 frames écrasées, les 2 dernières encore en attente ne sont pas perdues
+    assert capture.nb_jetees == 48
+    ok, frame, _ = capture.lire(timeout=1.0)
+    capture.arreter()
+    assert ok and int(frame[0, 0, 0]) == 49
+    assert capture.nb_jetees == 49
+    assert capture.nb_jetees + capture.nb_rendues == capture.nb_capturees
@@ -0,0 +1,21 @@
+"""
+Cadencement (adas_horloge) : en mode illimité, l'attente clavier ne doit
+pas reprendre le temps gagné par la simulation.
+"""
+
+from adas_horloge import HorlogeSimulation
+
+
+def test_illimite_attend_au_plus_1_ms():
+    # Frame toutes les 0.5 s : une attente "jusqu'à la frame" serait énorme
+    horloge = HorlogeSimulation(fps_cible=2.0, illimite=True)
+    for _ in range(20):
+        horloge.pas_suivant()
+        horloge.afficher()
+        assert horloge.attente_ms() <= 1
+
+
+def test_cadence_attend_la_frame_suivante():
+    horloge = HorlogeSimulation(fps_cible=2.0)
+    horloge.afficher()
+    assert horloge.attente_ms() > 100
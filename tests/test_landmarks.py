@@ -0,0 +1,92 @@
+"""
+Enregistrement des landmarks (adas_landmarks) : une session de la démo
+webcam, enregistrée résultat par résultat, se rejoue jusqu'au même état
+final, dans la scène de la démo et avec ses changements de résolution.
+Les gestes arrivés entre deux pas sont tous pris en compte.
+"""
+
+import collections
+import types
+
+import numpy as np
+
+from adas_landmarks import EnregistreurLandmarks, charger_landmarks, rejouer
+from adas_moteur import (
+    ACTION_DROITE,
+    PARAMETRES_WEBCAM,
+    ZONE_WEBCAM,
+    calculer_zone_adas,
+    changer_zone,
+    creer_etat,
+    step,
+)
+from adas_replay import empreinte_etat
+from adas_webcam_demo import appliquer_resultat
+
+
+def resultat_main(nb_doigts, horodatage):
+    """
+    Résultat d'inférence au format MediaPipe : main de latéralité inconnue
+    (pouce ignoré) avec nb_doigts doigts levés, ou aucune main (None).
+    """
+    mains = []
+    if nb_doigts is not None:
+        points = np.full((21, 3), 0.5)
+        for pointe in (8, 12, 16, 20)[:nb_doigts]:
+            points[pointe, 1] = 0.3
+        landmarks = [types.SimpleNamespace(x=x, y=y, z=z) for x, y, z in points]
+        mains = [types.SimpleNamespace(landmark=landmarks)]
+    resultats = types.SimpleNamespace(multi_hand_landmarks=mains, multi_handedness=None)
+    return types.SimpleNamespace(resultats=resultats, horodatage=horodatage, duree=0.0)
+
+
+def test_session_webcam_rejouee(tmp_path):
+    # (nombre de frames, doigts levés, taille de l'image)
+    sequence = [
+        (20, 1, (640, 480)), (15, 2, (640, 480)), (10, None, (640, 480)),
+        (25, 1, (1280, 720)), (10, 4, (1280, 720)), (15, 3, (1280, 720)),
+        (20, 0, (320, 240)), (30, 1, (320, 240)),
+    ]
+    enregistreur = EnregistreurLandmarks(tmp_path / "session.npy")
+
+    # Session "en direct" : une frame tous les 2 pas, résultat appliqué
+    # comme dans la démo, physique un pas à la fois
+    taille = sequence[0][2]
+    etat = creer_etat(*taille, ZONE_WEBCAM, **PARAMETRES_WEBCAM)
+    actions = collections.deque()
+    frame = 0
+    for nb_frames, nb_doigts, (largeur, hauteur) in sequence:
+        for _ in range(nb_frames):
+            while etat.tick < 2 * frame:
+                step(etat, actions.popleft() if actions else None)
+            if (largeur, hauteur) != taille:
+                taille = (largeur, hauteur)
+                changer_zone(etat, calculer_zone_adas(largeur, hauteur, ZONE_WEBCAM))
+            resultat = resultat_main(nb_doigts, 100.0 + frame * 2 * etat.dt)
+            appliquer_resultat(resultat, (hauteur, largeur, 3), etat, actions, enregistreur)
+            frame += 1
+    step(etat, actions.popleft() if actions else None)
+    assert not actions
+    assert enregistreur.fermer() == frame
+
+    etat_relu = rejouer(charger_landmarks(tmp_path / "session.npy"))
+    assert etat_relu.tick == etat.tick
+    assert etat_relu.mode_adas == etat.mode_adas
+    assert etat_relu.zone_params.cle == etat.zone_params.cle
+    assert empreinte_etat(etat_relu) == empreinte_etat(etat)
+
+
+def test_retour_au_mode_courant_entre_deux_pas():
+    # MANUEL -> ACC -> MANUEL avant le pas suivant (touche entre les deux) :
+    # l'état finit en MANUEL
+    etat = creer_etat(640, 480, ZONE_WEBCAM, **PARAMETRES_WEBCAM)
+    actions = collections.deque()
+    for i, nb_doigts in enumerate((1, 1, "touche", 0, 0)):
+        if nb_doigts == "touche":
+            actions.append(ACTION_DROITE)
+            continue
+        appliquer_resultat(resultat_main(nb_doigts, i * 0.005), (480, 640, 3), etat, actions)
+    assert list(actions) == ["ACC", ACTION_DROITE, "MANUEL"]
+    while actions:
+        step(etat, actions.popleft())
+    assert etat.mode_adas == "MANUEL"
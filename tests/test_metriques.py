@@ -0,0 +1,98 @@
+"""
+Indicateurs de sécurité (adas_metriques) : définitions fixées sur un cas
+calculé à la main, et MetriquesBatch identique à MetriquesSecurite
+scénario par scénario.
+"""
+
+import numpy as np
+import pytest
+
+from adas_batch import coder_actions, creer_etat_batch, step_batch
+from adas_metriques import MetriquesBatch, MetriquesSecurite
+from adas_moteur import ACTIONS, creer_etat, step
+
+
+def poursuite(nb_pas):
+    """
+    Ego et cible dans la voie du milieu, sans ACC (MANUEL) :
+      ego   : 0.6, v = -0.3 /s -> -0.006 par pas de 0.02 s
+      cible : 0.305, v = -0.1 /s -> -0.002 par pas
+    L'écart après k pas vaut 0.295 - 0.004 k ; rapprochement 0.2 /s.
+    """
+    etat = creer_etat(
+        position_relative_ego=0.6, position_relative_cible=0.305,
+        v_ego_base=-0.3, v_cible=-0.1, dt=0.02
+    )
+    metriques = MetriquesSecurite()
+    for _ in range(nb_pas):
+        step(etat)
+        metriques.mettre_a_jour(etat)
+    return metriques.resume()
+
+
+def test_metriques_calculees_a_la_main_avant_contact():
+    resume = poursuite(40)
+    # Ecart le plus faible au pas 40 : 0.295 - 0.16
+    assert resume["ecart_min"] == pytest.approx(0.135)
+    # Ecart pare-chocs 0.135 - 0.1 (longueur d'un véhicule), / 0.2
+    assert resume["ttc_min"] == pytest.approx(0.175)
+    # Ecart pare-chocs / vitesse de l'ego
+    assert resume["temps_inter_min"] == pytest.approx(0.035 / 0.3)
+    # TTC (0.955 s au premier pas) toujours sous SEUIL_TTC = 2 s
+    assert resume["duree_ttc_critique"] == pytest.approx(40 * 0.02)
+    assert resume["nb_collisions"] == 0
+    assert resume["duree_chevauchement"] == 0.0
+    assert resume["duree_distance_min"] == 0.0
+
+
+def test_metriques_calculees_a_la_main_depassement():
+    resume = poursuite(99)
+    # Dernier pas où l'ego est encore derrière : k = 73, écart 0.003
+    assert resume["ecart_min"] == pytest.approx(0.003)
+    assert resume["ttc_min"] == 0.0
+    # Boîtes superposées tant que |écart| < 0.1 : k = 49 à 98, 50 pas
+    assert resume["nb_collisions"] == 1
+    assert resume["duree_chevauchement"] == pytest.approx(50 * 0.02)
+    assert resume["duree"] == pytest.approx(99 * 0.02)
+
+
+def test_metriques_batch_identiques_au_scalaire():
+    n = 30
+    nb_pas = 1500
+    rng = np.random.default_rng(5)
+    parametres = {
+        "mode_adas": "ACC",
+        "position_relative_ego": rng.uniform(0.3, 1.0, n),
+        "position_relative_cible": rng.uniform(0.0, 0.6, n),
+        "v_ego_base": rng.uniform(-0.4, -0.1, n),
+        "v_cible": rng.uniform(-0.3, 0.0, n),
+        "marge_distance_relative": rng.uniform(0.05, 0.3, n),
+        "seuil_blocage_lateral": rng.uniform(0.05, 0.4, n),
+        "vitesse_laterale": rng.uniform(100.0, 1500.0, n),
+    }
+    tirages = rng.random((nb_pas, n)) < 0.02
+    choix = rng.integers(len(ACTIONS), size=(nb_pas, n))
+    actions = [
+        [ACTIONS[choix[t, i]] if tirages[t, i] else None for i in range(n)]
+        for t in range(nb_pas)
+    ]
+
+    batch = creer_etat_batch(n, **parametres)
+    metriques_batch = MetriquesBatch(n)
+    for t in range(nb_pas):
+        step_batch(batch, coder_actions(actions[t]))
+        metriques_batch.mettre_a_jour(batch)
+    resume_batch = metriques_batch.resume()
+
+    for i in range(n):
+        etat = creer_etat(**{
+            nom: valeur if isinstance(valeur, str) else valeur[i].item()
+            for nom, valeur in parametres.items()
+        })
+        metriques = MetriquesSecurite()
+        for t in range(nb_pas):
+            step(etat, actions[t][i])
+            metriques.mettre_a_jour(etat)
+
+        for nom, valeur in metriques.resume().items():
+            assert valeur == resume_batch[nom][i], f"scénario {i}, {nom}"
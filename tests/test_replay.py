@@ -0,0 +1,184 @@
+"""
+Journal des entrées (adas_replay) : une session enregistrée, sauvée puis
+rechargée, se rejoue à l'identique, empreinte par empreinte ; un journal
+altéré diverge au tick modifié.
+"""
+
+import copy
+
+import numpy as np
+import pytest
+
+from adas_batch import CODES_ACTIONS
+from adas_moteur import (
+    ACTION_DROITE,
+    ACTION_GAUCHE,
+    ACTIONS,
+    MODES_ADAS,
+    ZONE_SIMULATION,
+    ZONE_WEBCAM,
+    changer_zone,
+    creer_etat,
+    step,
+)
+from adas_replay import (
+    JournalEntrees,
+    charger_journal,
+    empreinte_etat,
+    premiere_divergence,
+    rejouer,
+)
+from adas_trafic import Trafic
+
+NB_PAS = 1500
+
+
+def enregistrer_session(journal, graine, proba=0.02):
+    """
+    Session "interactive" : actions aléatoires passées à step() et notées
+    dans le journal comme le font les démos. Retourne les empreintes par
+    tick et les indices des entrées qui ont changé le mode.
+    """
+    rng = np.random.default_rng(graine)
+    etat = journal.creer_etat()
+    empreintes = np.empty(NB_PAS, dtype=np.uint64)
+    changements_mode = []
+    for i in range(NB_PAS):
+        action = None
+        if rng.random() < proba:
+            action = ACTIONS[rng.integers(len(ACTIONS))]
+            if action in MODES_ADAS and action != etat.mode_adas:
+                changements_mode.append(len(journal.ticks))
+            journal.ajouter(etat.tick, action)
+        step(etat, action)
+        empreintes[i] = empreinte_etat(etat)
+    journal.nb_pas = etat.tick
+    return empreintes, changements_mode
+
+
+@pytest.mark.parametrize("nb_vehicules, nb_voies", [(0, 3), (60, 3), (120, 5)])
+def test_relecture_identique_apres_sauvegarde(tmp_path, nb_vehicules, nb_voies):
+    journal = JournalEntrees(
+        nb_vehicules=nb_vehicules, proba_changement_voie=0.01, graine=7, nb_voies=nb_voies,
+        parametres={"v_cible": -0.12, "marge_distance_relative": 0.2}
+    )
+    empreintes, _ = enregistrer_session(journal, graine=nb_vehicules)
+    assert journal.ticks, "session sans entrée"
+
+    chemin = tmp_path / "session.npz"
+    journal.sauver(chemin)
+    relu = charger_journal(chemin)
+    assert relu.ticks == journal.ticks
+    assert relu.actions == journal.actions
+    assert relu.nb_pas == NB_PAS
+
+    _, empreintes_relues = rejouer(relu)
+    assert premiere_divergence(empreintes, empreintes_relues) is None
+    np.testing.assert_array_equal(empreintes, empreintes_relues)
+
+
+@pytest.mark.parametrize("nb_vehicules", [0, 60])
+def test_tick_altere_detecte(tmp_path, nb_vehicules):
+    journal = JournalEntrees(nb_vehicules=nb_vehicules, proba_changement_voie=0.01, graine=3)
+    empreintes, changements_mode = enregistrer_session(journal, graine=11)
+    assert changements_mode
+
+    # Un changement de mode noté un tick trop tard
+    indice = changements_mode[len(changements_mode) // 2]
+    tick = journal.ticks[indice]
+    journal.ticks[indice] = tick + 1
+    journal.sauver(tmp_path / "altere.npz")
+
+    _, empreintes_alterees = rejouer(charger_journal(tmp_path / "altere.npz"))
+    assert premiere_divergence(empreintes, empreintes_alterees) == tick
+
+
+def test_journal_ancien_format(tmp_path):
+    """
+    Journal sans zone, paramètres ni nombre de voies (premier format) :
+    relu avec les valeurs par défaut de creer_etat().
+    """
+    journal = JournalEntrees(nb_vehicules=40, proba_changement_voie=0.01, graine=2)
+    empreintes, _ = enregistrer_session(journal, graine=5)
+
+    chemin = tmp_path / "ancien.npz"
+    np.savez(
+        chemin,
+        ticks=np.array(journal.ticks, dtype=np.int64),
+        actions=np.array([CODES_ACTIONS[a] for a in journal.actions], dtype=np.int8),
+        largeur=journal.largeur,
+        hauteur=journal.hauteur,
+        nb_vehicules=journal.nb_vehicules,
+        proba_changement_voie=journal.proba_changement_voie,
+        graine=journal.graine,
+        dt=journal.dt,
+        nb_pas=journal.nb_pas
+    )
+    relu = charger_journal(chemin)
+    assert relu.zone == ZONE_SIMULATION
+    assert relu.parametres == {}
+    assert relu.nb_voies == 3
+
+    _, empreintes_relues = rejouer(relu)
+    assert premiere_divergence(empreintes, empreintes_relues) is None
+
+
+def test_changement_de_resolution_rejoue(tmp_path):
+    """
+    Résolution changée en cours de session (démo webcam) : l'ego est
+    ramené dans la nouvelle zone et le changement, journalisé, est rejoué.
+    """
+    journal = JournalEntrees(640, 480, zone=ZONE_WEBCAM, parametres={"vitesse_laterale": 300.0})
+    etat = journal.creer_etat()
+    tailles = {100: (1280, 720), 180: (320, 240), 400: (640, 480)}
+    actions = {90: "LKA", 95: ACTION_GAUCHE, 170: ACTION_DROITE, 300: "MANUEL", 310: ACTION_DROITE}
+    empreintes = np.empty(600, dtype=np.uint64)
+    for i in range(600):
+        if etat.tick in tailles:
+            largeur, hauteur = tailles[etat.tick]
+            journal.changer_taille(etat.tick, largeur, hauteur)
+            changer_zone(etat, journal.zone_params(largeur, hauteur))
+            if etat.lateral_phase == "idle" and not etat.changement_voie_en_cours:
+                assert etat.x_centre_ego == etat.zone_params.centres_voies[etat.indice_voie_ego]
+        action = actions.get(etat.tick)
+        if action is not None:
+            journal.ajouter(etat.tick, action)
+        step(etat, action)
+        empreintes[i] = empreinte_etat(etat)
+    journal.sauver(tmp_path / "webcam.npz", etat.tick)
+
+    relu = charger_journal(tmp_path / "webcam.npz")
+    assert relu.zones == [(tick,) + taille for tick, taille in tailles.items()]
+    etat_relu, empreintes_relues = rejouer(relu)
+    assert premiere_divergence(empreintes, empreintes_relues) is None
+    assert etat_relu.zone_params.cle == etat.zone_params.cle
+
+    # Sans les changements de taille, la relecture diverge au premier
+    relu.zones = []
+    _, sans_zones = rejouer(relu)
+    assert premiere_divergence(empreintes, sans_zones) == 100
+
+
+def test_empreinte_voies_du_trafic():
+    """
+    Un véhicule passé de la fin d'une voie au début de la suivante laisse
+    les positions concaténées inchangées : l'empreinte doit quand même
+    changer, comme pour la voie de la cible ou le bord visé.
+    """
+    trafic = Trafic(12, nb_voies=2, graine=4)
+    trafic.positions[0][:] = np.linspace(0.1, 0.3, len(trafic.positions[0]))
+    trafic.positions[1][:] = np.linspace(0.5, 0.9, len(trafic.positions[1]))
+    etat = creer_etat(trafic=trafic, nb_voies=2)
+
+    autre = copy.deepcopy(etat)
+    autre.trafic.changer_voie(int(autre.trafic.ids[0][-1]), 1)
+    assert np.array_equal(np.concatenate(autre.trafic.positions), np.concatenate(trafic.positions))
+    assert empreinte_etat(autre) != empreinte_etat(etat)
+
+    autre = copy.deepcopy(etat)
+    autre.indice_voie_cible = 0
+    assert empreinte_etat(autre) != empreinte_etat(etat)
+
+    autre = copy.deepcopy(etat)
+    autre.lateral_boundary_x = 123.0
+    assert empreinte_etat(autre) != empreinte_etat(etat)